@@ -0,0 +1,178 @@
+import json
+from array import array
+from collections import Counter
+from itertools import chain, islice
+from typing import List, Dict, Optional, Tuple, Iterable
+
+# Fields parts can be sorted by, see Database.get_parts_by_category_paginated
+SORT_FIELDS = ("performance_score", "price", "name")
+
+# Columns read into a snapshot, in the order CatalogSnapshot expects them
+SNAPSHOT_COLUMNS = ("id, name, category, price, performance_score, compatibility_tags, brand, hardware_brand, "
+                    "specifications, socket, wattage")
+
+class CategoryCodes:
+    """Table of the distinct values of a categorical column, each stored as a small integer code"""
+
+    def __init__(self):
+        self.values = []
+        self.codes = {}
+
+    def encode(self, value) -> int:
+        code = self.codes.get(value)
+        if code is None:
+            code = len(self.values)
+            self.codes[value] = code
+            self.values.append(value)
+        return code
+
+class CategoryColumns:
+    """One category's parts as parallel columns, in id order.
+
+    Brands, hardware brands and sockets are stored as codes into the snapshot's
+    code tables. sort_orders holds the row positions sorted ascending by each of
+    SORT_FIELDS, ties in id order.
+    """
+
+    def __init__(self, category: str, rows: List[Tuple], brands: CategoryCodes, sockets: CategoryCodes):
+        self.category = category
+        self.brands = brands
+        self.sockets = sockets
+        self.ids = array("q", (row[0] for row in rows))
+        self.names = tuple(row[1] for row in rows)
+        self.prices = array("d", (row[3] for row in rows))
+        self.performance_scores = array("q", (row[4] for row in rows))
+        # Decoded once; parts handed out share these dicts, so they must not be modified
+        self.compatibility_tags = tuple(json.loads(row[5]) for row in rows)
+        self.brand_codes = array("i", (brands.encode(row[6]) for row in rows))
+        self.hardware_brand_codes = array("i", (brands.encode(row[7]) for row in rows))
+        # Specifications are only decoded for the parts that are returned
+        self.specifications = tuple(row[8] for row in rows)
+        self.socket_codes = array("i", (sockets.encode(row[9]) for row in rows))
+        # -1 for parts without a wattage, so they never pass a minimum
+        self.wattages = array("q", (-1 if row[10] is None else int(row[10]) for row in rows))
+
+        positions = range(len(rows))
+        self.sort_orders = {
+            "performance_score": array("i", sorted(positions, key=self.performance_scores.__getitem__)),
+            "price": array("i", sorted(positions, key=self.prices.__getitem__)),
+            "name": array("i", sorted(positions, key=self.names.__getitem__))
+        }
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def part(self, position: int, decode_specifications: bool = True) -> Dict:
+        """A new part dict for the row at position"""
+        specifications = self.specifications[position]
+        return {
+            "id": self.ids[position],
+            "name": self.names[position],
+            "category": self.category,
+            "price": self.prices[position],
+            "performance_score": self.performance_scores[position],
+            "compatibility_tags": self.compatibility_tags[position],
+            "brand": self.brands.values[self.brand_codes[position]],
+            "hardware_brand": self.brands.values[self.hardware_brand_codes[position]],
+            "specifications": json.loads(specifications) if decode_specifications and specifications else specifications
+        }
+
+    def matching(self, positions: Iterable[int], brand_preference: Optional[Tuple[str, str]] = None,
+                 min_wattage: Optional[int] = None) -> Iterable[int]:
+        """The positions of parts matching a (brand, hardware_brand) preference and minimum wattage"""
+        if brand_preference:
+            brand, hardware_brand = brand_preference
+            if brand != "any":
+                code = self.brands.codes.get(brand)
+                positions = (position for position in positions if self.brand_codes[position] == code)
+            if hardware_brand != "any":
+                code = self.brands.codes.get(hardware_brand)
+                positions = (position for position in positions if self.hardware_brand_codes[position] == code)
+        if min_wattage is not None:
+            positions = (position for position in positions if self.wattages[position] >= min_wattage)
+        return positions
+
+class CatalogSnapshot:
+    """Immutable in-memory copy of the parts catalog at one catalog version.
+
+    Parts are kept per category as columns and turned into dicts only when they
+    are returned, so every caller gets dicts it is free to modify (apart from the
+    shared compatibility_tags). A reloaded catalog gets a new snapshot instead of
+    changing this one, so a request holding a snapshot sees a consistent catalog.
+    """
+
+    def __init__(self, version: int, rows: List[Tuple]):
+        self.version = version
+        self.brands = CategoryCodes()
+        self.sockets = CategoryCodes()
+
+        rows_by_category = {}
+        for row in sorted(rows, key=lambda row: row[0]):
+            rows_by_category.setdefault(row[2], []).append(row)
+        self.categories = {
+            category: CategoryColumns(category, category_rows, self.brands, self.sockets)
+            for category, category_rows in rows_by_category.items()
+        }
+
+        # Part id -> (category columns, position), in id order
+        self._positions = {}
+        for columns in self.categories.values():
+            for position, part_id in enumerate(columns.ids):
+                self._positions[part_id] = (columns, position)
+        self._positions = dict(sorted(self._positions.items()))
+
+    def __len__(self) -> int:
+        return len(self._positions)
+
+    def get_parts_by_category(self, category: str, brand_preference: Optional[Tuple[str, str]] = None,
+                              decode_specifications: bool = True) -> List[Dict]:
+        """Parts of a category in id order, filtered by a (brand, hardware_brand) preference"""
+        columns = self.categories.get(category)
+        if columns is None:
+            return []
+        positions = columns.matching(range(len(columns)), brand_preference)
+        return [columns.part(position, decode_specifications) for position in positions]
+
+    def get_parts_by_category_paginated(self, category: str, brand_preference: Optional[Tuple[str, str]] = None,
+                                        limit: int = 50, offset: int = 0,
+                                        sort_by: str = "performance_score", sort_order: str = "desc",
+                                        min_wattage: Optional[int] = None) -> List[Dict]:
+        """One sorted page of a category's parts"""
+        columns = self.categories.get(category)
+        if columns is None:
+            return []
+
+        order = columns.sort_orders.get(sort_by, columns.sort_orders["performance_score"])
+        if sort_order.lower() == "desc":
+            order = order[::-1]
+
+        if not brand_preference and min_wattage is None:
+            page = order[offset:offset + limit]
+        else:
+            page = islice(columns.matching(order, brand_preference, min_wattage), offset, offset + limit)
+        return [columns.part(position) for position in page]
+
+    def get_parts_by_ids(self, part_ids) -> List[Dict]:
+        """Parts with the given ids, skipping ids not in the catalog"""
+        parts = []
+        for part_id in part_ids:
+            location = self._positions.get(part_id)
+            if location is not None:
+                columns, position = location
+                parts.append(columns.part(position))
+        return parts
+
+    def get_all_parts(self, decode_specifications: bool = True) -> List[Dict]:
+        """Every part, in id order"""
+        return [columns.part(position, decode_specifications) for columns, position in self._positions.values()]
+
+    def stats(self) -> Dict:
+        """Part counts by category and by brand, and the price range, computed from the columns"""
+        brand_counts = Counter(chain.from_iterable(columns.brand_codes for columns in self.categories.values()))
+        prices = [price for columns in self.categories.values() for price in (min(columns.prices), max(columns.prices))]
+        return {
+            "total_parts": len(self),
+            "categories": {category: len(columns) for category, columns in self.categories.items()},
+            "brands": {self.brands.values[code]: count for code, count in brand_counts.items()},
+            "price_range": {"min": min(prices, default=None), "max": max(prices, default=None)}
+        }
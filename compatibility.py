@@ -0,0 +1,232 @@
+from typing import List, Dict, Optional, Tuple, Set
+from bisect import bisect_left
+
+# Older sockets only support DDR4 memory
+DDR4_ONLY_SOCKETS = {"AM4", "LGA1200", "LGA1151"}
+
+# Case form factors that can hold each motherboard form factor
+CASE_FORM_FACTOR_COMPATIBILITY = {
+    "ATX": ["ATX", "Full Tower", "Mid Tower"],
+    "mATX": ["ATX", "mATX", "Full Tower", "Mid Tower", "Mini Tower"],
+    "Mini-ITX": ["ATX", "mATX", "Mini-ITX", "Full Tower", "Mid Tower", "Mini Tower", "Desktop"]
+}
+
+# Compatibility tags that are also stored in typed parts columns, for SQL-side filtering
+COMPATIBILITY_COLUMNS = {
+    "socket": "TEXT",
+    "tdp": "INTEGER",
+    "power": "INTEGER",
+    "length": "INTEGER",
+    "wattage": "INTEGER",
+    "form_factor": "TEXT",
+    "max_gpu_length": "INTEGER",
+    "max_memory": "INTEGER",
+    "ram_type": "TEXT",
+    "ram_capacity_gb": "INTEGER",
+    "storage_type": "TEXT"
+}
+
+def compatibility_column_values(category: str, tags: Dict) -> Dict:
+    """Typed column values for a part's compatibility tags; missing or unparseable tags are None"""
+    def number(value):
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            return value
+        return None
+
+    def text(value):
+        return value if isinstance(value, str) else None
+
+    values = {
+        "socket": text(tags.get("socket")),
+        "tdp": number(tags.get("tdp")),
+        "power": number(tags.get("power")),
+        "length": number(tags.get("length")),
+        "wattage": number(tags.get("wattage")),
+        "form_factor": text(tags.get("form_factor")),
+        "max_gpu_length": number(tags.get("max_gpu_length")),
+        "max_memory": number(tags.get("max_memory")),
+        "ram_type": None,
+        "ram_capacity_gb": None,
+        "storage_type": None
+    }
+    if category == "ram":
+        values["ram_type"] = text(tags.get("type"))
+        try:
+            values["ram_capacity_gb"] = int(tags.get("capacity", "").replace("GB", ""))
+        except (ValueError, TypeError, AttributeError):
+            pass
+    elif category == "storage":
+        values["storage_type"] = text(tags.get("type"))
+    return values
+
+class CompatibilityIndex:
+    """Compatibility lookups built once per catalog load.
+
+    Part attributes are normalised from compatibility_tags up front (with the same
+    defaults the engine's checks use), so searches never decode tags per combination.
+    Attributes that cannot be parsed are stored as None and make the part incompatible.
+    """
+
+    def __init__(self, parts_by_category: Dict[str, List[Dict]]):
+        self.attributes = {}
+        self.motherboards_by_socket = {}
+        self.ram_types_by_socket = {}
+        self.cases_by_motherboard_form_factor = {form_factor: [] for form_factor in CASE_FORM_FACTOR_COMPATIBILITY}
+        self.psus_by_wattage = []
+        self.ram_types = set()
+
+        for category, parts in parts_by_category.items():
+            for part in parts:
+                self.attributes[part["id"]] = self._normalise(category, part)
+
+        for motherboard in parts_by_category.get("motherboard", []):
+            socket = self.attributes[motherboard["id"]]["socket"]
+            self.motherboards_by_socket.setdefault(socket, []).append(motherboard["id"])
+
+        self.ram_types = {self.attributes[ram["id"]]["ram_type"] for ram in parts_by_category.get("ram", [])}
+        for socket in self.motherboards_by_socket:
+            self.ram_types_by_socket[socket] = self._allowed_ram_types(socket, self.ram_types)
+
+        for case in parts_by_category.get("case", []):
+            case_form_factor = self.attributes[case["id"]]["form_factor"]
+            for form_factor, allowed in CASE_FORM_FACTOR_COMPATIBILITY.items():
+                if case_form_factor in allowed:
+                    self.cases_by_motherboard_form_factor[form_factor].append(case["id"])
+
+        self.psus_by_wattage = sorted(
+            (self.attributes[psu["id"]]["wattage"], psu["id"])
+            for psu in parts_by_category.get("psu", [])
+            if self.attributes[psu["id"]]["wattage"] is not None
+        )
+        self.psu_wattages = [wattage for wattage, _ in self.psus_by_wattage]
+
+    def _normalise(self, category: str, part: Dict) -> Dict:
+        """Extract the attributes compatibility checks need from a part's tags"""
+        tags = part["compatibility_tags"]
+        attributes = {}
+
+        if category == "cpu":
+            attributes["socket"] = tags.get("socket", "Unknown")
+            attributes["tdp"] = self._number(tags.get("tdp", 65))
+        elif category == "gpu":
+            attributes["power"] = self._number(tags.get("power", 150))
+            attributes["length"] = self._number(tags.get("length", 280))
+        elif category == "motherboard":
+            attributes["socket"] = tags.get("socket", "Unknown")
+            form_factor = tags.get("form_factor", "ATX")
+            if form_factor not in CASE_FORM_FACTOR_COMPATIBILITY:
+                form_factor = "ATX"  # Default fallback
+            attributes["form_factor"] = form_factor
+            attributes["max_memory"] = self._number(tags.get("max_memory", 128))
+        elif category == "ram":
+            attributes["ram_type"] = tags.get("type", "DDR4")
+            try:
+                attributes["capacity"] = int(tags.get("capacity", "16GB").replace("GB", ""))
+            except (ValueError, TypeError, AttributeError):
+                attributes["capacity"] = None
+        elif category == "psu":
+            attributes["wattage"] = self._number(tags.get("wattage", 650))
+        elif category == "case":
+            attributes["form_factor"] = tags.get("form_factor", "ATX")
+            attributes["max_gpu_length"] = self._number(tags.get("max_gpu_length", 350))
+
+        return attributes
+
+    def _number(self, value) -> Optional[float]:
+        """Numeric tag values; anything else (e.g. "440mm") cannot be compared"""
+        if not isinstance(value, (int, float)):
+            return None
+        return value
+
+    def _allowed_ram_types(self, socket: str, ram_types: Set[str]) -> Set[str]:
+        """RAM types a motherboard socket accepts"""
+        if socket in DDR4_ONLY_SOCKETS:
+            return {ram_type for ram_type in ram_types if ram_type != "DDR5"}
+        return set(ram_types)
+
+    def get(self, category: str, part: Dict) -> Dict:
+        """Normalised attributes for a part, computing them for parts not in the index"""
+        attributes = self.attributes.get(part["id"])
+        if attributes is None:
+            attributes = self._normalise(category, part)
+        return attributes
+
+    def motherboard_key(self, cpu: Dict) -> str:
+        """Socket a motherboard must have to fit the CPU"""
+        return self.get("cpu", cpu)["socket"]
+
+    def ram_key(self, motherboard: Dict) -> Tuple:
+        """(socket, maximum capacity) a RAM kit has to fit"""
+        attributes = self.get("motherboard", motherboard)
+        return (attributes["socket"], attributes["max_memory"])
+
+    def ram_type_allowed(self, socket: str, ram_type: str) -> bool:
+        """Check a RAM type against the socket's allowed types"""
+        allowed_types = self.ram_types_by_socket.get(socket)
+        if allowed_types is not None and ram_type in self.ram_types:
+            return ram_type in allowed_types
+        return self._allowed_ram_types(socket, {ram_type}) == {ram_type}
+
+    def ram_fits(self, ram: Dict, key: Tuple) -> bool:
+        """Check a RAM kit against a motherboard's ram_key"""
+        socket, max_memory = key
+        attributes = self.get("ram", ram)
+        if not self.ram_type_allowed(socket, attributes["ram_type"]):
+            return False
+        if attributes["capacity"] is None or max_memory is None:
+            return False
+        return attributes["capacity"] <= max_memory
+
+    def required_psu_wattage(self, cpu: Dict, gpu: Dict) -> Optional[float]:
+        """Minimum PSU wattage for a CPU and GPU, with overhead and 20% headroom"""
+        cpu_tdp = self.get("cpu", cpu)["tdp"]
+        gpu_power = self.get("gpu", gpu)["power"]
+        if cpu_tdp is None or gpu_power is None:
+            return None
+        # Add overhead for other components (motherboard, RAM, storage, fans)
+        return (cpu_tdp + gpu_power + 100) * 1.2
+
+    def adequate_psus(self, required_wattage: Optional[float]) -> Set[int]:
+        """Ids of the PSUs covering required_wattage: the smallest adequate one, found by bisecting, and all above it"""
+        if required_wattage is None:
+            return set()
+        return {psu_id for _, psu_id in self.psus_by_wattage[bisect_left(self.psu_wattages, required_wattage):]}
+
+    def case_key(self, motherboard: Dict, gpu: Dict) -> Tuple:
+        """(motherboard form factor, GPU length) a case has to accommodate"""
+        return (self.get("motherboard", motherboard)["form_factor"], self.get("gpu", gpu)["length"])
+
+    def fitting_cases(self, key: Tuple) -> Set[int]:
+        """Ids of the cases that hold the motherboard form factor and GPU length of a case_key"""
+        motherboard_form_factor, gpu_length = key
+        if gpu_length is None:
+            return set()
+        return {
+            case_id for case_id in self.cases_by_motherboard_form_factor[motherboard_form_factor]
+            if self.attributes[case_id]["max_gpu_length"] is not None
+            and gpu_length <= self.attributes[case_id]["max_gpu_length"]
+        }
+
+    def case_fits(self, case: Dict, key: Tuple) -> bool:
+        """Check a case against a case_key"""
+        motherboard_form_factor, gpu_length = key
+        attributes = self.get("case", case)
+        if attributes["form_factor"] not in CASE_FORM_FACTOR_COMPATIBILITY[motherboard_form_factor]:
+            return False
+        if gpu_length is None or attributes["max_gpu_length"] is None:
+            return False
+        return gpu_length <= attributes["max_gpu_length"]
+
+    def rule_fits(self, categories: Tuple[str, ...], build: Dict[str, Dict]) -> bool:
+        """Check one of the engine's compatibility rules, named by the categories it involves, for a build"""
+        if categories == ("cpu", "motherboard"):
+            return self.get("motherboard", build["motherboard"])["socket"] == self.motherboard_key(build["cpu"])
+        if categories == ("motherboard", "ram"):
+            return self.ram_fits(build["ram"], self.ram_key(build["motherboard"]))
+        if categories == ("cpu", "gpu", "psu"):
+            required_wattage = self.required_psu_wattage(build["cpu"], build["gpu"])
+            wattage = self.get("psu", build["psu"])["wattage"]
+            return required_wattage is not None and wattage is not None and wattage >= required_wattage
+        if categories == ("motherboard", "gpu", "case"):
+            return self.case_fits(build["case"], self.case_key(build["motherboard"], build["gpu"]))
+        raise ValueError(f"Unknown compatibility rule {categories}")
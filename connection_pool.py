@@ -0,0 +1,115 @@
+import asyncio
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager, asynccontextmanager
+
+class ConnectionPool:
+    """Bounded pool of reusable SQLite connections.
+
+    Connections are opened lazily, up to max_connections, and handed out to one
+    thread at a time. Each keeps its own prepared statement cache, so queries that
+    are run repeatedly are only compiled once per connection. Writable pools switch
+    the database to WAL mode, which lets readers run while the catalog is written;
+    read-only pools open the database with mode=ro.
+    """
+
+    def __init__(self, db_path: str, max_connections: int = 8, read_only: bool = False,
+                 cached_statements: int = 256, timeout: float = 30.0):
+        self.db_path = db_path
+        self.max_connections = max_connections
+        self.read_only = read_only
+        self.cached_statements = cached_statements
+        self.timeout = timeout
+        self._idle = queue.LifoQueue()
+        self._opened = 0
+        self._lock = threading.Lock()
+        self._closed = False
+
+    def _connect(self) -> sqlite3.Connection:
+        """Open a new connection configured for the pool"""
+        if self.read_only:
+            conn = sqlite3.connect(f"file:{self.db_path}?mode=ro", uri=True, timeout=self.timeout,
+                                   check_same_thread=False, cached_statements=self.cached_statements)
+        else:
+            conn = sqlite3.connect(self.db_path, timeout=self.timeout, check_same_thread=False,
+                                   cached_statements=self.cached_statements)
+            # Readers keep working while a writer commits
+            conn.execute("PRAGMA journal_mode=WAL")
+        return conn
+
+    def acquire(self, timeout: float = None) -> sqlite3.Connection:
+        """Take an idle connection, opening a new one while under the limit"""
+        if self._closed:
+            raise sqlite3.ProgrammingError("Connection pool is closed")
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+
+        with self._lock:
+            can_open = self._opened < self.max_connections
+            if can_open:
+                self._opened += 1
+        if can_open:
+            try:
+                return self._connect()
+            except Exception:
+                with self._lock:
+                    self._opened -= 1
+                raise
+
+        try:
+            return self._idle.get(timeout=self.timeout if timeout is None else timeout)
+        except queue.Empty:
+            raise sqlite3.OperationalError(f"No database connection free within {self.timeout}s")
+
+    def release(self, conn: sqlite3.Connection):
+        """Return a connection to the pool, discarding any uncommitted changes"""
+        if conn.in_transaction:
+            conn.rollback()
+        if self._closed:
+            conn.close()
+            return
+        self._idle.put(conn)
+
+    @contextmanager
+    def connection(self):
+        """Borrow a connection for the duration of a with block"""
+        conn = self.acquire()
+        try:
+            yield conn
+        finally:
+            self.release(conn)
+
+    @asynccontextmanager
+    async def connection_async(self):
+        """Borrow a connection without blocking the event loop while the pool is exhausted"""
+        try:
+            conn = self._idle.get_nowait()
+        except queue.Empty:
+            acquiring = asyncio.get_running_loop().run_in_executor(None, self.acquire)
+            try:
+                # Shielded, so a cancelled caller leaves the acquire running instead of losing its connection
+                conn = await asyncio.shield(acquiring)
+            except asyncio.CancelledError:
+                acquiring.add_done_callback(self._release_acquired)
+                raise
+        try:
+            yield conn
+        finally:
+            self.release(conn)
+
+    def _release_acquired(self, acquiring: asyncio.Future):
+        """Return the connection of an acquire whose caller was cancelled, once it has one"""
+        if not acquiring.cancelled() and acquiring.exception() is None:
+            self.release(acquiring.result())
+
+    def close(self):
+        """Close idle connections; connections in use are closed when they are returned"""
+        self._closed = True
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                break
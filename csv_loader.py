@@ -1,9 +1,303 @@
 import pandas as pd
+import numpy as np
 import json
 import sqlite3
 import re
-from typing import Dict, List, Optional, Tuple
+import os
+import hashlib
+import time
+import itertools
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Tuple, Iterable, Iterator
 from pathlib import Path
+from database import set_catalog_version, CATALOG_VERSION_SQL, CREATE_CATALOG_META_SQL, CREATE_BUILD_FRONTIER_SQL
+from migrations import apply_migrations, reset_schema_version
+from compatibility import compatibility_column_values
+from frontier import rebuild_frontier
+
+# Manufacturer and hardware brands and the name fragments identifying them
+BRAND_PATTERNS_FILE = Path("brand_patterns.json")
+
+# Integer columns of each category's price CSV that go into compatibility tags
+INT_TAG_COLUMNS = {
+    "cpu": ("tdp", "core_count"),
+    "gpu": ("length",),
+    "motherboard": ("memory_slots", "max_memory"),
+    "storage": ("capacity",),
+    "psu": ("wattage",),
+}
+
+# Minimum similarity for a benchmark model to match a part name
+MATCH_THRESHOLD = 0.6
+# Bump whenever name cleaning or scoring changes, so saved matches are not reused
+MATCH_CACHE_VERSION = 1
+# Most cleaned names a benchmark matcher memoises (and saves); the least recently used are dropped
+MAX_MEMOISED_MATCHES = 100000
+
+# Rows per executemany call when populating the database
+INSERT_BATCH_SIZE = 1000
+
+# Categories every loaded catalog must have parts for
+CATALOG_CATEGORIES = ("cpu", "gpu", "motherboard", "ram", "storage", "psu", "case")
+# A reload may not leave a category with less than this share of its current parts
+MIN_RELOAD_RATIO = 0.5
+
+class CatalogValidationError(Exception):
+    """Raised when a freshly loaded catalog fails the checks that guard the live one"""
+
+# Largest number of price rows processed as one task when merging with several workers
+MERGE_CHUNK_ROWS = 2500
+
+# Loader and benchmark tables of a merge worker process, reused across its tasks
+_worker_loader = None
+_worker_benchmarks = {}
+
+def _init_merge_worker(db_path: str, benchmark_cache_dir: Path, brand_patterns_file: Path,
+                       performance_data: Dict[str, pd.DataFrame], performance_data_hashes: Dict[str, str]):
+    """Create the loader of a merge worker process, with the benchmark tables of every category"""
+    global _worker_loader, _worker_benchmarks
+    _worker_loader = CSVDataLoader(db_path)
+    _worker_loader.benchmark_cache_dir = benchmark_cache_dir
+    _worker_loader.brand_patterns_file = brand_patterns_file
+    _worker_loader.performance_data_hashes.update(performance_data_hashes)
+    _worker_benchmarks = performance_data
+
+def _merge_chunk_in_worker(category: str, price_chunk: pd.DataFrame) -> Tuple[List[Tuple[str, Optional[Dict]]], Dict]:
+    """Process a chunk of price rows in a worker process, returning the rows and the benchmark matches it found"""
+    perf_df = _worker_benchmarks.get(category)
+    matcher = None
+    if perf_df is not None:
+        matcher = _worker_loader._benchmark_matcher(category, perf_df)
+        if matcher.found_matches is None:
+            matcher.found_matches = {}
+    
+    rows = _worker_loader._process_rows(category, price_chunk, perf_df)
+    new_matches = {}
+    if matcher is not None:
+        # Only the matches not sent back yet; the parent saves them along with the other workers' matches
+        new_matches = matcher.found_matches
+        matcher.found_matches = {}
+    return rows, new_matches
+
+# Columns written for every part, in the order of _part_values
+PART_INSERT_COLUMNS = (
+    "source_key", "name", "category", "price", "performance_score",
+    "compatibility_tags", "brand", "hardware_brand", "specifications",
+    "benchmark_rank", "benchmark_samples", "benchmark_url",
+    "socket", "tdp", "power", "length", "wattage", "form_factor",
+    "max_gpu_length", "max_memory", "ram_type", "ram_capacity_gb", "storage_type"
+)
+
+INSERT_PART_SQL = f'''
+    INSERT INTO parts ({", ".join(PART_INSERT_COLUMNS)})
+    VALUES ({", ".join("?" for _ in PART_INSERT_COLUMNS)})
+'''
+
+# Parts keep their id across reloads as long as their source row is still listed. Listed
+# parts are updated rather than upserted, which would use up an AUTOINCREMENT id each time.
+UPDATE_PART_SQL = f'''
+    UPDATE parts SET {", ".join(f"{column} = ?" for column in PART_INSERT_COLUMNS[1:])}
+    WHERE id = ?
+'''
+
+# Content hashes of the CSV files the stored catalog was loaded from
+CREATE_INGEST_MANIFEST_SQL = '''
+    CREATE TABLE IF NOT EXISTS ingest_manifest (
+        path TEXT PRIMARY KEY,
+        sha256 TEXT NOT NULL
+    )
+'''
+
+def _contains_any(values: pd.Series, fragments: List[str]) -> pd.Series:
+    """Whether each string contains any of the fragments"""
+    return values.str.contains("|".join(re.escape(fragment) for fragment in fragments), regex=True)
+
+def _trie_regex(patterns: List[str]) -> str:
+    """Regex matching any of the patterns, preferring the longest, with the patterns merged into a trie"""
+    trie = {}
+    for pattern in patterns:
+        node = trie
+        for char in pattern:
+            node = node.setdefault(char, {})
+        node[""] = {}
+    
+    def node_regex(node: Dict) -> str:
+        branches = [re.escape(char) + node_regex(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ""
+        regex = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        # Patterns ending here only match if no longer one does
+        return f"(?:{regex})?" if "" in node else regex
+    
+    return node_regex(trie)
+
+class BrandMatcher:
+    """Finds the brand a name mentions with one precompiled regex of all patterns.
+    
+    Brands are (brand, patterns) pairs in priority order, and the first brand
+    with a pattern anywhere in the name wins, wherever the patterns of other
+    brands occur. Names and patterns are compared upper-cased.
+    """
+    
+    def __init__(self, brands: List[Tuple[str, List[str]]]):
+        self.brands = [brand for brand, _ in brands]
+        priorities = {}
+        for priority, (brand, patterns) in enumerate(brands):
+            if not patterns or not all(isinstance(pattern, str) and pattern for pattern in patterns):
+                raise ValueError(f"Brand {brand!r} needs a list of non-empty patterns")
+            for pattern in patterns:
+                priorities.setdefault(pattern.upper(), priority)
+        
+        # The regex finds the longest pattern starting at a position. Every other
+        # pattern matching there is a prefix of it, so a pattern stands for the
+        # highest priority brand among its prefixes.
+        self._priorities = {
+            pattern: min(priority for prefix, priority in priorities.items() if pattern.startswith(prefix))
+            for pattern in priorities
+        }
+        regex = _trie_regex(list(priorities))
+        self._pattern = re.compile(regex) if priorities else None
+        # The longest pattern starting at every position, overlapping ones included
+        self._overlapping_pattern = f"(?=({regex}))" if priorities else None
+    
+    def match(self, name: str) -> Optional[str]:
+        """The highest priority brand the name mentions, or None"""
+        if self._pattern is None:
+            return None
+        text = name.upper()
+        best = None
+        found = self._pattern.search(text)
+        while found is not None:
+            priority = self._priorities[found.group()]
+            if best is None or priority < best:
+                best = priority
+                if best == 0:
+                    break
+            # Patterns may overlap, so look again from the next position
+            found = self._pattern.search(text, found.start() + 1)
+        return None if best is None else self.brands[best]
+    
+    def match_series(self, names: pd.Series) -> pd.Series:
+        """match of every name, looked up once per distinct name with the regex applied column-wise"""
+        if self._pattern is None:
+            return pd.Series(None, index=names.index, dtype=object)
+        unique_names = pd.Series(names.unique())
+        found = unique_names.str.upper().str.findall(self._overlapping_pattern).explode()
+        priorities = found.map(self._priorities).groupby(level=0).min()
+        brands = priorities.map(dict(enumerate(self.brands)))
+        return names.map(dict(zip(unique_names, brands.where(brands.notna(), None))))
+
+def load_brand_matchers(path: Path) -> Tuple[BrandMatcher, Dict[str, BrandMatcher]]:
+    """The manufacturer matcher and the hardware brand matcher of each category, from a brand patterns file.
+    
+    The file is a JSON object with "manufacturers", an object of brand -> name
+    patterns, and "hardware_brands", an object of category -> such an object.
+    Brands are listed in priority order.
+    """
+    with open(path) as f:
+        config = json.load(f)
+    manufacturers = BrandMatcher(list(config.get("manufacturers", {}).items()))
+    hardware_brands = {
+        category: BrandMatcher(list(brands.items()))
+        for category, brands in config.get("hardware_brands", {}).items()
+    }
+    return manufacturers, hardware_brands
+
+class BenchmarkMatcher:
+    """Token index over the cleaned model names of one benchmark table.
+
+    Models are cleaned once and each token maps to the rows containing it. A
+    match needs a similarity above MATCH_THRESHOLD, so at least one shared token,
+    and only rows sharing a token with the name are scored.
+    
+    Results are memoised per cleaned name, up to MAX_MEMOISED_MATCHES of the
+    most recently used. With a cache_path, named after a hash of the benchmark
+    CSV, they are also saved to disk and reused by later loads of the same CSV;
+    the index itself is only built once a name is not memoised.
+    """
+    
+    def __init__(self, perf_df: pd.DataFrame, clean_name, cache_path: Optional[Path] = None):
+        self.perf_df = perf_df
+        self.clean_name = clean_name
+        self.cache_path = cache_path
+        self.model_tokens = None
+        self.postings = None
+        # Cleaned name -> position of its best match, or None, least recently used first
+        self.matches = OrderedDict()
+        self.new_matches = 0
+        # Matches found since they were last collected, when a merge worker collects them
+        self.found_matches = None
+        if cache_path is not None and cache_path.exists():
+            try:
+                with open(cache_path) as f:
+                    self.add_matches(json.load(f))
+            except (OSError, ValueError) as e:
+                print(f"Ignoring unreadable benchmark match cache {cache_path}: {e}")
+            self.new_matches = 0
+    
+    def _build_index(self):
+        """Clean every model name and index the rows by token"""
+        self.model_tokens = []
+        self.postings = {}
+        if 'Model' in self.perf_df.columns:
+            for position, model in enumerate(self.perf_df['Model']):
+                tokens = set(self.clean_name(str(model)).split())
+                self.model_tokens.append(tokens)
+                for token in tokens:
+                    self.postings.setdefault(token, []).append(position)
+    
+    def best_match_position(self, name_clean: str) -> Optional[int]:
+        """Row position of the most similar model, the first one on ties"""
+        if name_clean in self.matches:
+            self.matches.move_to_end(name_clean)
+            return self.matches[name_clean]
+        if self.postings is None:
+            self._build_index()
+        
+        words = set(name_clean.split())
+        candidates = set()
+        for word in words:
+            candidates.update(self.postings.get(word, ()))
+        
+        best_score = 0
+        best_position = None
+        # In table order, so ties go to the same row as a scan of the whole table
+        for position in sorted(candidates):
+            model_words = self.model_tokens[position]
+            score = len(words & model_words) / len(words | model_words)
+            if score > best_score and score > MATCH_THRESHOLD:
+                best_score = score
+                best_position = position
+        
+        self.add_matches({name_clean: best_position})
+        if self.found_matches is not None:
+            self.found_matches[name_clean] = best_position
+        return best_position
+    
+    def add_matches(self, matches: Dict[str, Optional[int]]):
+        """Memoise matches, e.g. found by merge workers, dropping the least recently used over the limit"""
+        for name_clean, position in matches.items():
+            self.matches[name_clean] = position
+            self.matches.move_to_end(name_clean)
+        while len(self.matches) > MAX_MEMOISED_MATCHES:
+            self.matches.popitem(last=False)
+        self.new_matches += len(matches)
+    
+    def save(self):
+        """Write the memoised matches to the cache file, if any were added"""
+        if self.cache_path is None or not self.new_matches:
+            return
+        self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+        # Matches saved for older versions of the benchmark CSV are no longer any use
+        for stale_path in self.cache_path.parent.glob(self.cache_path.name.split("-")[0] + "-*.json"):
+            if stale_path != self.cache_path:
+                stale_path.unlink()
+        temp_path = self.cache_path.with_suffix(".tmp")
+        with open(temp_path, "w") as f:
+            json.dump(self.matches, f)
+        os.replace(temp_path, self.cache_path)
+        self.new_matches = 0
 
 class CSVDataLoader:
     def __init__(self, db_path: str = "buildmyrig.db"):
@@ -11,6 +305,36 @@ class CSVDataLoader:
         self.price_data_dir = Path("price_data")
         self.performance_data_dir = Path("performance_data")
         
+        # Price and benchmark CSV file of each category
+        self.price_files = {
+            "cpu": "CPUs.csv",
+            "gpu": "GPUs.csv",
+            "motherboard": "Motherboards.csv",
+            "ram": "RAMs.csv",
+            "storage": "SSDs.csv",
+            "psu": "Power Supply.csv",
+            "case": "Cases.csv"
+        }
+        self.performance_files = {
+            "cpu": "CPU_UserBenchmarks.csv",
+            "gpu": "GPU_UserBenchmarks.csv",
+            "ram": "RAM_UserBenchmarks.csv",
+            "storage": "SSD_UserBenchmarks.csv"
+        }
+        # Benchmark matches are saved here between loads
+        self.benchmark_cache_dir = Path(".benchmark_cache")
+        # Category -> SHA-256 of its benchmark CSV, set by load_performance_data
+        self.performance_data_hashes = {}
+        # Category (or id of a benchmark table) -> its BenchmarkMatcher
+        self._benchmark_matchers = {}
+        # Normalise price rows with column operations instead of one row at a time
+        self.vectorized_normalization = True
+        # Brand tables, read from brand_patterns_file on first use
+        self.brand_patterns_file = BRAND_PATTERNS_FILE
+        self._brand_matchers = None
+        # Rows, parts and seconds of every chunk of the last streamed load, see stream_database
+        self.chunk_timings = []
+        
         # Filters for relevant parts
         self.relevant_cpu_patterns = [
             'Ryzen 9 7950X3D', 'Ryzen 9 7900X3D', 'Ryzen 7 7800X3D', 'Ryzen 5 7600X3D',
@@ -50,39 +374,73 @@ class CSVDataLoader:
             'case': 200
         }
         
-    def load_all_data(self):
-        """Load all CSV data and populate the database"""
+    def load_all_data(self, full: bool = False, workers: int = 1, chunk_size: Optional[int] = None):
+        """Load CSV data and populate the database.
+        
+        Only categories whose price or benchmark CSV changed since the last load
+        are processed, unless full is set or the database has not been loaded
+        with a manifest before. With several workers, the CSVs are merged in a
+        process pool. With a chunk_size, the price CSVs are streamed that many
+        rows at a time instead, see stream_database.
+        """
+        if chunk_size is not None and workers > 1:
+            raise ValueError("Streamed price CSVs are merged in this process; use one worker")
         print("Loading CSV data...")
         
-        # Initialize database
-        self.init_database()
+        # The live catalog is only replaced once the new one is complete, see populate_database
+        manifest = self.file_manifest()
+        categories = None
+        if not full:
+            stored_manifest = self._stored_manifest()
+            if stored_manifest is not None:
+                categories = self.changed_categories(stored_manifest, manifest)
+                if not categories:
+                    print("No CSV files changed since the last load; catalog is up to date")
+                    return
+                print(f"Reloading changed categories: {', '.join(categories)}")
+        
+        if chunk_size is not None:
+            performance_data = self.load_performance_data(categories)
+            self.stream_database(categories, performance_data, chunk_size, manifest, incremental=categories is not None)
+            rebuild_frontier(self.db_path)
+            print("Database populated with real data!")
+            return
         
         # Load price data
-        price_data = self.load_price_data()
+        price_data = self.load_price_data(categories)
         
         # Load performance data
-        performance_data = self.load_performance_data()
+        performance_data = self.load_performance_data(categories)
         
         # Merge price and performance data
-        merged_data = self.merge_price_performance_data(price_data, performance_data)
+        merged_data = self.merge_price_performance_data(price_data, performance_data, workers)
         
         # Populate database
-        self.populate_database(merged_data)
+        self.populate_database(merged_data, manifest, incremental=categories is not None)
+        
+        # Precompute the recommendation frontier for the new catalog
+        rebuild_frontier(self.db_path)
         
         print("Database populated with real data!")
         
     def init_database(self):
         """Initialize the database schema"""
         conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        # Drop existing table to start fresh
+        self._create_schema(conn.cursor())
+        conn.commit()
+        conn.close()
+    
+    def _create_schema(self, cursor: sqlite3.Cursor):
+        """Recreate an empty parts table"""
+        # Drop existing table to start fresh; its indexes go with it, so migrations run again
         cursor.execute("DROP TABLE IF EXISTS parts")
+        reset_schema_version(cursor.connection)
         
         # Create parts table with enhanced schema
         cursor.execute('''
             CREATE TABLE IF NOT EXISTS parts (
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
+                source_key TEXT,
                 name TEXT NOT NULL,
                 category TEXT NOT NULL,
                 price REAL NOT NULL,
@@ -93,29 +451,31 @@ class CSVDataLoader:
                 specifications TEXT NOT NULL,
                 benchmark_rank INTEGER,
                 benchmark_samples INTEGER,
-                benchmark_url TEXT
+                benchmark_url TEXT,
+                socket TEXT,
+                tdp INTEGER,
+                power INTEGER,
+                length INTEGER,
+                wattage INTEGER,
+                form_factor TEXT,
+                max_gpu_length INTEGER,
+                max_memory INTEGER,
+                ram_type TEXT,
+                ram_capacity_gb INTEGER,
+                storage_type TEXT
             )
         ''')
         
-        conn.commit()
-        conn.close()
+        # Tables the schema migrations also index
+        cursor.execute(CREATE_BUILD_FRONTIER_SQL)
         
-    def load_price_data(self) -> Dict[str, pd.DataFrame]:
-        """Load all price data CSV files"""
+    def load_price_data(self, categories: Optional[List[str]] = None) -> Dict[str, pd.DataFrame]:
+        """Load the price data CSV files, of every category unless categories are given"""
         price_data = {}
         
-        # Define CSV file mappings
-        csv_files = {
-            "cpu": "CPUs.csv",
-            "gpu": "GPUs.csv",
-            "motherboard": "Motherboards.csv",
-            "ram": "RAMs.csv",
-            "storage": "SSDs.csv",
-            "psu": "Power Supply.csv",
-            "case": "Cases.csv"
-        }
-        
-        for category, filename in csv_files.items():
+        for category, filename in self.price_files.items():
+            if categories is not None and category not in categories:
+                continue
             filepath = self.price_data_dir / filename
             if filepath.exists():
                 df = pd.read_csv(filepath)
@@ -126,49 +486,329 @@ class CSVDataLoader:
                 
         return price_data
     
-    def load_performance_data(self) -> Dict[str, pd.DataFrame]:
-        """Load all performance data CSV files"""
+    def load_performance_data(self, categories: Optional[List[str]] = None) -> Dict[str, pd.DataFrame]:
+        """Load the performance data CSV files, of every category unless categories are given"""
         performance_data = {}
         
-        # Define performance CSV files
-        perf_files = {
-            "cpu": "CPU_UserBenchmarks.csv",
-            "gpu": "GPU_UserBenchmarks.csv",
-            "ram": "RAM_UserBenchmarks.csv",
-            "storage": "SSD_UserBenchmarks.csv"
-        }
-        
-        for category, filename in perf_files.items():
+        for category, filename in self.performance_files.items():
+            if categories is not None and category not in categories:
+                continue
             filepath = self.performance_data_dir / filename
             if filepath.exists():
                 df = pd.read_csv(filepath)
                 performance_data[category] = df
+                self.performance_data_hashes[category] = self._file_hash(filepath)
                 print(f"Loaded {len(df)} {category} benchmark entries from {filename}")
             else:
                 print(f"Warning: {filename} not found")
                 
         return performance_data
     
+    def file_manifest(self) -> Dict[str, str]:
+        """SHA-256 of every price and benchmark CSV file and of the brand patterns file there is, by path"""
+        paths = [self.price_data_dir / filename for filename in self.price_files.values()]
+        paths += [self.performance_data_dir / filename for filename in self.performance_files.values()]
+        paths.append(Path(self.brand_patterns_file))
+        return {path.as_posix(): self._file_hash(path) for path in paths if path.exists()}
+    
+    def changed_categories(self, stored_manifest: Dict[str, str], manifest: Dict[str, str]) -> List[str]:
+        """Categories whose price or benchmark file differs from the stored manifest.
+        
+        Brands of every category come from the brand patterns file, so a change
+        to it reloads all of them.
+        """
+        changed = []
+        for category, filename in self.price_files.items():
+            paths = [(self.price_data_dir / filename).as_posix(), Path(self.brand_patterns_file).as_posix()]
+            if category in self.performance_files:
+                paths.append((self.performance_data_dir / self.performance_files[category]).as_posix())
+            if any(stored_manifest.get(path) != manifest.get(path) for path in paths):
+                changed.append(category)
+        return changed
+    
+    def _stored_manifest(self) -> Optional[Dict[str, str]]:
+        """Manifest of the live catalog, or None if it cannot be updated incrementally"""
+        if not os.path.exists(self.db_path):
+            return None
+        conn = sqlite3.connect(self.db_path)
+        try:
+            # Parts loaded before source keys existed cannot be matched up with their CSV rows
+            unkeyed = conn.execute("SELECT COUNT(*) FROM parts WHERE source_key IS NULL").fetchone()[0]
+            manifest = dict(conn.execute("SELECT path, sha256 FROM ingest_manifest").fetchall())
+        except sqlite3.OperationalError:
+            return None
+        finally:
+            conn.close()
+        if unkeyed or not manifest:
+            return None
+        return manifest
+    
+    def _file_hash(self, path: Path) -> str:
+        """SHA-256 of a file's contents"""
+        return hashlib.sha256(path.read_bytes()).hexdigest()
+    
+    def _source_keys(self, price_df: pd.DataFrame) -> List[str]:
+        """Hash of each price row's columns other than the price, identifying the listing across price updates"""
+        identities = pd.Series("", index=price_df.index)
+        for position, column in enumerate(c for c in price_df.columns if c != 'price'):
+            separator = "\x1f" if position else ""
+            identities = identities + separator + f"{column}=" + price_df[column].astype(str)
+        return [hashlib.sha1(identity.encode("utf-8")).hexdigest()[:20] for identity in identities]
+    
     def merge_price_performance_data(self, price_data: Dict[str, pd.DataFrame], 
-                                    performance_data: Dict[str, pd.DataFrame]) -> Dict[str, List[Dict]]:
-        """Merge price and performance data"""
+                                    performance_data: Dict[str, pd.DataFrame], workers: int = 1) -> Dict[str, List[Dict]]:
+        """Merge price and performance data.
+        
+        With more than one worker, categories are split into chunks of up to
+        MERGE_CHUNK_ROWS price rows that are processed in a process pool. Chunks
+        are put back together in file order, so the result is the same as merging
+        serially.
+        """
+        if workers > 1:
+            rows_by_category = self._process_rows_in_pool(price_data, performance_data, workers)
+        else:
+            rows_by_category = {}
+            for category in price_data.keys():
+                print(f"Processing {category}...")
+                rows_by_category[category] = self._process_rows(category, price_data[category],
+                                                                performance_data.get(category))
+        
         merged_data = {}
+        for category, rows in rows_by_category.items():
+            merged_data[category] = self._keyed_parts(rows, {})
         
-        # Process each category
-        for category in price_data.keys():
-            print(f"Processing {category}...")
-            merged_data[category] = []
-            
-            price_df = price_data[category]
-            perf_df = performance_data.get(category)
-            
-            for _, row in price_df.iterrows():
-                part_data = self._process_part_row(row, category, perf_df)
-                if part_data:
-                    merged_data[category].append(part_data)
+        for matcher in self._benchmark_matchers.values():
+            matcher.save()
                     
         return merged_data
     
+    def _keyed_parts(self, rows: List[Tuple[str, Optional[Dict]]], occurrences: Dict[str, int]) -> List[Dict]:
+        """The processed parts of _process_rows, with their source keys.
+        
+        Listings identical apart from the price are told apart by their order in
+        the file: occurrences counts the rows seen so far of each source key.
+        """
+        parts = []
+        for source_key, part_data in rows:
+            occurrences[source_key] = occurrences.get(source_key, 0) + 1
+            if part_data:
+                part_data['source_key'] = f"{source_key}:{occurrences[source_key]}"
+                parts.append(part_data)
+        return parts
+    
+    def _process_rows(self, category: str, price_df: pd.DataFrame,
+                      perf_df: Optional[pd.DataFrame]) -> List[Tuple[str, Optional[Dict]]]:
+        """Source key and processed part (None if skipped) of every price row, in order"""
+        if self.vectorized_normalization:
+            parts = self._normalize_frame(category, price_df, perf_df)
+        else:
+            parts = [self._process_part_row(row, category, perf_df) for _, row in price_df.iterrows()]
+        return list(zip(self._source_keys(price_df), parts))
+    
+    def _normalize_frame(self, category: str, price_df: pd.DataFrame,
+                         perf_df: Optional[pd.DataFrame]) -> List[Optional[Dict]]:
+        """_process_part_row of every price row, computed a column at a time.
+        
+        Gives the same parts as _process_part_row. Brands, performance scores
+        and benchmark info are looked up once per distinct name. Rows with an
+        infinite value in an integer tag column are left to _process_part_row,
+        as is the whole frame if the price or such a column was not read as
+        numbers.
+        """
+        df = price_df.reset_index(drop=True)
+        int_columns = [column for column in INT_TAG_COLUMNS.get(category, ()) if column in df.columns]
+        if any(not pd.api.types.is_numeric_dtype(df[column]) for column in ['price'] + int_columns):
+            return [self._process_part_row(row, category, perf_df) for _, row in df.iterrows()]
+        
+        row_path = pd.Series(False, index=df.index)
+        for column in int_columns:
+            values = df[column].astype(float)
+            row_path |= values.notna() & ~np.isfinite(values)
+        keep = (df['price'].notna() & (df['price'] > 0) & ~row_path).tolist()
+        row_path = row_path.tolist()
+        
+        names = df['name'].astype(str).str.strip()
+        manufacturer_matcher, hardware_brand_matchers = self.brand_matchers()
+        manufacturers = manufacturer_matcher.match_series(names)
+        manufacturers = manufacturers.where(manufacturers.notna(), names.str.split().str[0].fillna("Unknown"))
+        hardware_brand_matcher = hardware_brand_matchers.get(category)
+        if hardware_brand_matcher is not None:
+            hardware_brands = hardware_brand_matcher.match_series(names)
+            hardware_brands = hardware_brands.where(hardware_brands.notna(), manufacturers)
+        else:
+            hardware_brands = manufacturers
+        
+        tag_columns = self._compatibility_tag_columns(df, category)
+        tag_names = [tag for tag, _ in tag_columns]
+        specification_names = [column for column in df.columns if column not in ['name', 'price']]
+        present = (df[specification_names].notna() & (df[specification_names] != '')).to_numpy().tolist()
+        texts = df[specification_names].astype(str).to_numpy().tolist()
+        
+        benchmarks = {}
+        for name in names[keep].unique():
+            benchmarks[name] = (self._get_performance_score(name, category, perf_df),
+                                self._get_benchmark_info(name, category, perf_df))
+        
+        tag_rows = zip(*[values for _, values in tag_columns]) if tag_columns else itertools.repeat(())
+        rows = zip(row_path, keep, names.tolist(), df['price'].astype(float).tolist(), manufacturers.tolist(),
+                   hardware_brands.tolist(), tag_rows, present, texts)
+        parts = []
+        for position, (on_row_path, kept, name, price, manufacturer, hardware_brand, tags, row_present,
+                       row_texts) in enumerate(rows):
+            if on_row_path:
+                parts.append(self._process_part_row(df.iloc[position], category, perf_df))
+                continue
+            if not kept:
+                parts.append(None)
+                continue
+            
+            compatibility_tags = dict(zip(tag_names, tags))
+            compatibility_tags['hardware_brand'] = hardware_brand
+            specifications = {column: text for column, is_present, text
+                              in zip(specification_names, row_present, row_texts) if is_present}
+            performance_score, benchmark_info = benchmarks[name]
+            parts.append({
+                'name': name,
+                'category': category,
+                'price': price,
+                'performance_score': performance_score,
+                'compatibility_tags': json.dumps(compatibility_tags),
+                'brand': manufacturer,
+                'hardware_brand': hardware_brand,
+                'specifications': json.dumps(specifications),
+                'benchmark_rank': benchmark_info.get('rank'),
+                'benchmark_samples': benchmark_info.get('samples'),
+                'benchmark_url': benchmark_info.get('url'),
+                'compatibility_columns': compatibility_column_values(category, compatibility_tags)
+            })
+        return parts
+    
+    def _compatibility_tag_columns(self, df: pd.DataFrame, category: str) -> List[Tuple[str, List]]:
+        """_build_compatibility_tags of every row of a price frame, as (tag, value of each row) pairs in tag order"""
+        raw_upper = df['name'].astype(str).str.upper()
+        
+        def int_column(column: str, default: int) -> List[int]:
+            if column not in df.columns:
+                return [default] * len(df)
+            values = df[column].astype(float)
+            return values.where(np.isfinite(values), default).astype('int64').tolist()
+        
+        def str_column(column: str, default: str) -> List[str]:
+            if column not in df.columns:
+                return [default] * len(df)
+            return df[column].astype(str).where(df[column].notna(), default).tolist()
+        
+        def select(conditions: List[Tuple[pd.Series, object]], default) -> List:
+            if not conditions:
+                return [default] * len(df)
+            return np.select([condition for condition, _ in conditions], [value for _, value in conditions],
+                             default=default).tolist()
+        
+        if category == "cpu":
+            intel = _contains_any(raw_upper, ['INTEL', 'I3', 'I5', 'I7', 'I9'])
+            amd = ~intel & _contains_any(raw_upper, ['AMD', 'RYZEN'])
+            sockets = select([
+                (intel & _contains_any(raw_upper, ['12', '13', '14']), "LGA1700"),
+                (intel & _contains_any(raw_upper, ['10', '11']), "LGA1200"),
+                (intel, "LGA1151"),
+                (amd & _contains_any(raw_upper, ['7000', '8000', '9000']), "AM5"),
+                (amd, "AM4"),
+            ], "Unknown")
+            return [("socket", sockets), ("tdp", int_column('tdp', 65)), ("cores", int_column('core_count', 4))]
+        
+        if category == "gpu":
+            power = select([(_contains_any(raw_upper, [fragment]), watts) for fragment, watts in [
+                ('RTX 4090', 450), ('RTX 4080', 320), ('RTX 4070', 200), ('RTX 4060', 115),
+                ('RTX 30', 220), ('RX 7900', 300), ('RX 7800', 263), ('RX 7700', 245),
+            ]], 150)
+            return [("pcie", ["4.0"] * len(df)), ("power", power), ("length", int_column('length', 280))]
+        
+        if category == "motherboard":
+            sockets = df['socket'].astype(str).tolist() if 'socket' in df.columns else ["Unknown"] * len(df)
+            return [("socket", sockets), ("form_factor", str_column('form_factor', "ATX")),
+                    ("ram_slots", int_column('memory_slots', 4)), ("max_memory", int_column('max_memory', 128))]
+        
+        if category == "ram":
+            ram_types = select([(_contains_any(raw_upper, [ram_type]), ram_type) for ram_type in ['DDR5', 'DDR4', 'DDR3']],
+                               "DDR4")
+            if 'speed' in df.columns:
+                # The last number of the speed is usually the speed
+                speed_numbers = df['speed'].astype(str).str.findall(r'\d+').str[-1].where(df['speed'].notna())
+                speeds = [3200 if pd.isna(number) else int(number) for number in speed_numbers]
+            else:
+                speeds = [3200] * len(df)
+            capacities = (df['name'].astype(str).str.extract(r'(\d+)\s*GB', flags=re.IGNORECASE)[0] + "GB").fillna("16GB")
+            return [("type", ram_types), ("speed", speeds), ("capacity", capacities.tolist())]
+        
+        if category == "storage":
+            named_types = select([(_contains_any(raw_upper, ['SSD']), "SSD"), (_contains_any(raw_upper, ['HDD']), "HDD")],
+                                 "SSD")
+            if 'type' in df.columns:
+                storage_types = df['type'].astype(str).where(df['type'].notna(), pd.Series(named_types)).tolist()
+            else:
+                storage_types = named_types
+            if 'capacity' in df.columns:
+                capacity = pd.Series(int_column('capacity', 0))
+                labels = np.where(capacity >= 1000, (capacity // 1000).astype(str) + "TB", capacity.astype(str) + "GB")
+                capacities = pd.Series(labels).where(df['capacity'].notna(), "1TB").tolist()
+            else:
+                capacities = ["1TB"] * len(df)
+            return [("type", storage_types), ("capacity", capacities),
+                    ("interface", str_column('interface', "SATA 6.0 Gb/s"))]
+        
+        if category == "psu":
+            if 'modular' in df.columns:
+                modular = (df['modular'].astype(str).str.lower().isin(['true', '1', 'yes', 'full', 'semi'])
+                           & df['modular'].notna()).tolist()
+            else:
+                modular = [False] * len(df)
+            return [("wattage", int_column('wattage', 650)), ("efficiency", str_column('efficiency', "80+ Bronze")),
+                    ("modular", modular)]
+        
+        if category == "case":
+            if 'type' in df.columns:
+                case_type = df['type'].astype(str).str.lower()
+                present = df['type'].notna()
+                atx = present & case_type.str.contains('atx', regex=False)
+                micro = present & case_type.str.contains('micro', regex=False)
+                mini = present & case_type.str.contains('mini', regex=False)
+                matx = present & case_type.str.contains('matx', regex=False)
+                form_factors = select([(atx, "ATX"), (micro | matx, "mATX"), (mini, "Mini-ITX")], "ATX")
+                max_gpu_lengths = select([(mini, 200), (micro, 300)], 350)
+            else:
+                form_factors = ["ATX"] * len(df)
+                max_gpu_lengths = [350] * len(df)
+            return [("form_factor", form_factors), ("max_gpu_length", max_gpu_lengths)]
+        
+        return []
+    
+    def _process_rows_in_pool(self, price_data: Dict[str, pd.DataFrame], performance_data: Dict[str, pd.DataFrame],
+                              workers: int) -> Dict[str, List[Tuple[str, Optional[Dict]]]]:
+        """_process_rows of every category, in chunks spread over a process pool"""
+        futures = {}
+        # Benchmark tables go to each worker once, not with every chunk
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_merge_worker,
+                                 initargs=(self.db_path, self.benchmark_cache_dir, self.brand_patterns_file,
+                                           performance_data, self.performance_data_hashes)) as pool:
+            for category, price_df in price_data.items():
+                chunks = [price_df.iloc[start:start + MERGE_CHUNK_ROWS] for start in range(0, len(price_df), MERGE_CHUNK_ROWS)]
+                print(f"Processing {category} in {len(chunks)} chunk(s) on {workers} workers...")
+                futures[category] = [
+                    pool.submit(_merge_chunk_in_worker, category, chunk)
+                    for chunk in chunks
+                ]
+            
+            rows_by_category = {}
+            for category, category_futures in futures.items():
+                rows_by_category[category] = []
+                for future in category_futures:
+                    rows, new_matches = future.result()
+                    rows_by_category[category].extend(rows)
+                    if new_matches:
+                        self._benchmark_matcher(category, performance_data[category]).add_matches(new_matches)
+        
+        return rows_by_category
+    
     def _process_part_row(self, row: pd.Series, category: str, 
                          perf_df: Optional[pd.DataFrame]) -> Optional[Dict]:
         """Process a single part row"""
@@ -186,7 +826,7 @@ class CSVDataLoader:
             manufacturer = self._extract_manufacturer(name)
             
             # Extract hardware brand (AMD, NVIDIA, Intel)
-            hardware_brand = self._extract_hardware_brand(name, category)
+            hardware_brand = self._extract_hardware_brand(name, category, manufacturer)
             
             # Get performance score
             performance_score = self._get_performance_score(name, category, perf_df)
@@ -198,6 +838,9 @@ class CSVDataLoader:
             # Add hardware brand to compatibility tags for filtering
             compatibility_tags['hardware_brand'] = hardware_brand
             
+            # Tags the engine uses also get typed columns
+            compatibility_columns = compatibility_column_values(category, compatibility_tags)
+            
             # Get benchmark info if available
             benchmark_info = self._get_benchmark_info(name, category, perf_df)
             
@@ -212,87 +855,39 @@ class CSVDataLoader:
                 'specifications': json.dumps(specifications),
                 'benchmark_rank': benchmark_info.get('rank'),
                 'benchmark_samples': benchmark_info.get('samples'),
-                'benchmark_url': benchmark_info.get('url')
+                'benchmark_url': benchmark_info.get('url'),
+                'compatibility_columns': compatibility_columns
             }
             
         except Exception as e:
             print(f"Error processing part {row.get('name', 'unknown')}: {e}")
             return None
     
+    def brand_matchers(self) -> Tuple[BrandMatcher, Dict[str, BrandMatcher]]:
+        """The manufacturer matcher and hardware brand matchers, loaded from brand_patterns_file on first use"""
+        if self._brand_matchers is None:
+            self._brand_matchers = load_brand_matchers(self.brand_patterns_file)
+        return self._brand_matchers
+    
     def _extract_manufacturer(self, name: str) -> str:
         """Extract manufacturer brand from part name (MSI, ASUS, etc.)"""
-        manufacturers = {
-            'MSI': ['MSI'],
-            'ASUS': ['ASUS', 'Asus', 'ROG', 'TUF', 'PRIME', 'ProArt'],
-            'Gigabyte': ['Gigabyte', 'AORUS'],
-            'ASRock': ['ASRock'],
-            'Corsair': ['Corsair'],
-            'G.Skill': ['G.Skill', 'Trident', 'Ripjaws', 'Flare'],
-            'Samsung': ['Samsung'],
-            'Western Digital': ['Western Digital', 'WD'],
-            'Seagate': ['Seagate'],
-            'Crucial': ['Crucial'],
-            'Kingston': ['Kingston'],
-            'EVGA': ['EVGA'],
-            'Seasonic': ['Seasonic', 'SeaSonic'],
-            'Thermaltake': ['Thermaltake'],
-            'Cooler Master': ['Cooler Master'],
-            'NZXT': ['NZXT'],
-            'Fractal Design': ['Fractal Design'],
-            'Lian Li': ['Lian Li'],
-            'be quiet!': ['be quiet!'],
-            'Phanteks': ['Phanteks'],
-            'Deepcool': ['Deepcool'],
-            'Montech': ['Montech'],
-            'TEAMGROUP': ['TEAMGROUP'],
-            'Patriot': ['Patriot'],
-            'Silicon Power': ['Silicon Power'],
-            'ADATA': ['ADATA'],
-            'PNY': ['PNY'],
-            'Zotac': ['Zotac'],
-            'Sapphire': ['Sapphire'],
-            'PowerColor': ['PowerColor'],
-            'XFX': ['XFX'],
-            'Intel': ['Intel'],  # Intel is both manufacturer and hardware brand
-            'AMD': ['AMD'],      # AMD is both manufacturer and hardware brand
-        }
-        
-        name_upper = name.upper()
-        for brand, patterns in manufacturers.items():
-            if any(pattern.upper() in name_upper for pattern in patterns):
-                return brand
+        brand = self.brand_matchers()[0].match(name)
+        if brand is not None:
+            return brand
                 
         # Try to extract first word as brand
         first_word = name.split()[0] if name.split() else "Unknown"
         return first_word
     
-    def _extract_hardware_brand(self, name: str, category: str) -> str:
+    def _extract_hardware_brand(self, name: str, category: str, manufacturer: Optional[str] = None) -> str:
         """Extract hardware brand (AMD, NVIDIA, Intel) from part name"""
-        name_upper = name.upper()
-        
-        if category == "cpu":
-            # CPU hardware brands
-            if any(x in name_upper for x in ['INTEL', 'CORE I', 'CELERON', 'PENTIUM', 'XEON']):
-                return 'Intel'
-            elif any(x in name_upper for x in ['AMD', 'RYZEN', 'THREADRIPPER', 'ATHLON', 'FX']):
-                return 'AMD'
-        elif category == "gpu":
-            # GPU hardware brands
-            if any(x in name_upper for x in ['NVIDIA', 'GEFORCE', 'RTX', 'GTX', 'QUADRO', 'TITAN']):
-                return 'NVIDIA'
-            elif any(x in name_upper for x in ['AMD', 'RADEON', 'RX ', 'FIREPRO', 'VEGA']):
-                return 'AMD'
-            elif any(x in name_upper for x in ['INTEL', 'ARC', 'IRIS']):
-                return 'Intel'
-        elif category == "motherboard":
-            # Motherboard chipset brands
-            if any(x in name_upper for x in ['INTEL', 'LGA', 'Z790', 'Z690', 'B660', 'H610']):
-                return 'Intel'
-            elif any(x in name_upper for x in ['AMD', 'AM4', 'AM5', 'X570', 'B550', 'A520']):
-                return 'AMD'
+        matcher = self.brand_matchers()[1].get(category)
+        brand = matcher.match(name) if matcher is not None else None
+        if brand is not None:
+            return brand
         
         # Default to manufacturer if no specific hardware brand detected
-        return self._extract_manufacturer(name)
+        return manufacturer if manufacturer is not None else self._extract_manufacturer(name)
     
     def _get_performance_score(self, name: str, category: str, 
                               perf_df: Optional[pd.DataFrame]) -> int:
@@ -301,29 +896,35 @@ class CSVDataLoader:
             return self._estimate_performance_score(name, category)
             
         # Try to match by name similarity
-        best_match = self._find_best_match(name, perf_df)
+        best_match = self._find_best_match(name, perf_df, category)
         if best_match is not None:
             return int(best_match['Benchmark'])
             
         return self._estimate_performance_score(name, category)
     
-    def _find_best_match(self, name: str, perf_df: pd.DataFrame) -> Optional[Dict]:
+    def _find_best_match(self, name: str, perf_df: pd.DataFrame, category: Optional[str] = None) -> Optional[Dict]:
         """Find best matching benchmark entry"""
-        name_clean = self._clean_name_for_matching(name)
-        
-        best_score = 0
-        best_match = None
-        
-        for _, row in perf_df.iterrows():
-            if 'Model' in row:
-                model_clean = self._clean_name_for_matching(str(row['Model']))
-                score = self._calculate_similarity_score(name_clean, model_clean)
-                
-                if score > best_score and score > 0.6:  # Threshold for similarity
-                    best_score = score
-                    best_match = row
-                    
-        return best_match
+        matcher = self._benchmark_matcher(category, perf_df)
+        position = matcher.best_match_position(self._clean_name_for_matching(name))
+        if position is None:
+            return None
+        return perf_df.iloc[position]
+    
+    def _benchmark_matcher(self, category: Optional[str], perf_df: pd.DataFrame) -> BenchmarkMatcher:
+        """Matcher for a benchmark table, created on first use"""
+        key = category if category is not None else id(perf_df)
+        matcher = self._benchmark_matchers.get(key)
+        if matcher is None or matcher.perf_df is not perf_df:
+            matcher = BenchmarkMatcher(perf_df, self._clean_name_for_matching, self._benchmark_cache_path(category))
+            self._benchmark_matchers[key] = matcher
+        return matcher
+    
+    def _benchmark_cache_path(self, category: Optional[str]) -> Optional[Path]:
+        """File the benchmark matches of a category's current benchmark CSV are saved in"""
+        data_hash = self.performance_data_hashes.get(category)
+        if data_hash is None:
+            return None
+        return self.benchmark_cache_dir / f"{category}-{data_hash[:16]}-v{MATCH_CACHE_VERSION}.json"
     
     def _clean_name_for_matching(self, name: str) -> str:
         """Clean name for better matching"""
@@ -694,7 +1295,7 @@ class CSVDataLoader:
         info = {}
         
         if perf_df is not None:
-            best_match = self._find_best_match(name, perf_df)
+            best_match = self._find_best_match(name, perf_df, category)
             if best_match is not None:
                 info['rank'] = best_match.get('Rank')
                 info['samples'] = best_match.get('Samples')
@@ -702,42 +1303,335 @@ class CSVDataLoader:
                 
         return info
     
-    def populate_database(self, merged_data: Dict[str, List[Dict]]):
-        """Populate database with merged data"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+    def populate_database(self, merged_data: Dict[str, List[Dict]], manifest: Optional[Dict[str, str]] = None,
+                          incremental: bool = False):
+        """Populate database with merged data.
+        
+        The new catalog is built in a staging database next to the live one and
+        checked by validate_catalog. Only then is it copied over the live database
+        with SQLite's backup API, in a single transaction. Servers sharing the live
+        database keep serving the old catalog until then, and switch to the new one
+        when they see its catalog version.
+        
+        A full load replaces every part. An incremental one starts from a copy of
+        the live catalog and upserts only the categories in merged_data, so parts
+        that are still listed keep their ids. manifest, the file hashes the data was
+        loaded from, is stored with the catalog.
+        """
+        batches = {category: [parts] for category, parts in merged_data.items()}
+        self._stage_catalog(
+            lambda staging, catalog_version: self._build_catalog(staging, batches, catalog_version, manifest, incremental),
+            incremental
+        )
+    
+    def stream_database(self, categories: Optional[List[str]], performance_data: Dict[str, pd.DataFrame],
+                        chunk_size: int, manifest: Optional[Dict[str, str]] = None, incremental: bool = False):
+        """Populate the database from the price CSVs, read chunk_size rows at a time.
+        
+        Each chunk is normalised, matched and written to the staging database
+        before the next one is read, so memory use depends on the chunk size
+        rather than on the size of the CSVs. Source key numbering and the keys an
+        incremental load has seen are kept in the staging database too. The
+        catalog is then validated and swapped in as by populate_database, and
+        the timing of every chunk is recorded in chunk_timings.
+        """
+        self.chunk_timings = []
+        price_files = {}
+        for category, filename in self.price_files.items():
+            if categories is not None and category not in categories:
+                continue
+            filepath = self.price_data_dir / filename
+            if filepath.exists():
+                price_files[category] = filepath
+            else:
+                print(f"Warning: {filename} not found")
+        
+        def build(staging: sqlite3.Connection, catalog_version: int) -> Dict[str, int]:
+            batches = {
+                category: self._stream_price_chunks(staging, category, filepath, performance_data.get(category), chunk_size)
+                for category, filepath in price_files.items()
+            }
+            return self._build_catalog(staging, batches, catalog_version, manifest, incremental, streaming=True)
+        
+        self._stage_catalog(build, incremental)
+        
+        for matcher in self._benchmark_matchers.values():
+            matcher.save()
+    
+    def _stream_price_chunks(self, conn: sqlite3.Connection, category: str, filepath: Path,
+                             perf_df: Optional[pd.DataFrame], chunk_size: int) -> Iterator[List[Dict]]:
+        """The merged parts of a price CSV, one chunk at a time, recording each chunk's timing"""
+        conn.execute("CREATE TEMP TABLE IF NOT EXISTS source_key_occurrences "
+                     "(source_key TEXT PRIMARY KEY, occurrences INTEGER NOT NULL)")
+        conn.execute("DELETE FROM source_key_occurrences")
+        # Chunks are read with the column types a read of the whole file gets,
+        # so parts and their source keys are the same as without streaming
+        dtypes = self._price_csv_dtypes(filepath, chunk_size)
         
-        total_parts = 0
-        for category, parts in merged_data.items():
-            print(f"Inserting {len(parts)} {category} parts...")
+        chunks = pd.read_csv(filepath, chunksize=chunk_size, dtype=dtypes)
+        rows_read = 0
+        for chunk_number in itertools.count(1):
+            start = time.perf_counter()
+            price_chunk = next(chunks, None)
+            if price_chunk is None:
+                break
+            read_seconds = time.perf_counter() - start
             
-            for part in parts:
-                cursor.execute('''
-                    INSERT INTO parts (name, category, price, performance_score, 
-                                     compatibility_tags, brand, hardware_brand, specifications,
-                                     benchmark_rank, benchmark_samples, benchmark_url)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                ''', (
-                    part['name'],
-                    part['category'],
-                    part['price'],
-                    part['performance_score'],
-                    part['compatibility_tags'],
-                    part['brand'],
-                    part['hardware_brand'],
-                    part['specifications'],
-                    part['benchmark_rank'],
-                    part['benchmark_samples'],
-                    part['benchmark_url']
-                ))
-                
-            total_parts += len(parts)
+            start = time.perf_counter()
+            rows = self._process_rows(category, price_chunk, perf_df)
+            occurrences = self._stored_occurrences(conn, sorted({source_key for source_key, _ in rows}))
+            parts = self._keyed_parts(rows, occurrences)
+            conn.executemany("INSERT OR REPLACE INTO source_key_occurrences (source_key, occurrences) VALUES (?, ?)",
+                             occurrences.items())
+            process_seconds = time.perf_counter() - start
+            
+            start = time.perf_counter()
+            yield parts
+            write_seconds = time.perf_counter() - start
             
+            rows_read += len(price_chunk)
+            self.chunk_timings.append({
+                "category": category,
+                "chunk": chunk_number,
+                "rows": len(price_chunk),
+                "parts": len(parts),
+                "read_seconds": read_seconds,
+                "process_seconds": process_seconds,
+                "write_seconds": write_seconds
+            })
+            print(f"{category} chunk {chunk_number}: {len(price_chunk)} rows, {len(parts)} parts "
+                  f"(read {read_seconds:.2f}s, processed {process_seconds:.2f}s, written {write_seconds:.2f}s)")
+        print(f"Streamed {rows_read} {category} rows from {filepath.name}")
+    
+    def _price_csv_dtypes(self, filepath: Path, chunk_size: int) -> Dict[str, np.dtype]:
+        """Column types pd.read_csv infers for a whole CSV file, found reading it chunk_size rows at a time"""
+        dtypes = {}
+        for chunk in pd.read_csv(filepath, chunksize=chunk_size):
+            for column, dtype in chunk.dtypes.items():
+                seen = dtypes.get(column, dtype)
+                if seen != dtype:
+                    # Integers with missing values become floats, anything else mixed stays as read
+                    numeric = {seen.kind, dtype.kind} <= {'i', 'f'}
+                    dtype = np.dtype('float64') if numeric else np.dtype(object)
+                dtypes[column] = dtype
+        return dtypes
+    
+    def _stored_occurrences(self, conn: sqlite3.Connection, source_keys: List[str]) -> Dict[str, int]:
+        """Rows streamed so far of each of the source keys that has had any"""
+        occurrences = {}
+        for batch_start in range(0, len(source_keys), INSERT_BATCH_SIZE):
+            batch = source_keys[batch_start:batch_start + INSERT_BATCH_SIZE]
+            occurrences.update(conn.execute(
+                "SELECT source_key, occurrences FROM source_key_occurrences "
+                f"WHERE source_key IN ({', '.join('?' * len(batch))})", batch
+            ).fetchall())
+        return occurrences
+    
+    def _stage_catalog(self, build, incremental: bool):
+        """Build a catalog in a staging database, validate it and swap it in, see populate_database.
+        
+        build(staging, catalog_version) writes the catalog and returns the number
+        of parts it stored of each category it loaded.
+        """
+        staging_path = f"{self.db_path}.staging"
+        self._remove_database_file(staging_path)
+        
+        live = sqlite3.connect(self.db_path)
+        try:
+            live_version, live_counts = self._catalog_state(live)
+            staging = sqlite3.connect(staging_path)
+            try:
+                if incremental:
+                    live.backup(staging)
+                counts = build(staging, live_version + 1)
+                self.validate_catalog(staging, counts, live_counts)
+                
+                start = time.perf_counter()
+                staging.backup(live)
+                print(f"Swapped in catalog version {live_version + 1} in {time.perf_counter() - start:.2f}s")
+            finally:
+                staging.close()
+        finally:
+            live.close()
+            self._remove_database_file(staging_path)
+    
+    def _build_catalog(self, conn: sqlite3.Connection, batches: Dict[str, Iterable[List[Dict]]], catalog_version: int,
+                       manifest: Optional[Dict[str, str]] = None, incremental: bool = False,
+                       streaming: bool = False) -> Dict[str, int]:
+        """Write the merged parts, their indexes and the catalog version into the staging database.
+        
+        batches holds the parts of each category in one or more lists. Returns
+        the number of parts written of each category.
+        """
+        # The staging file is thrown away if anything goes wrong, so it needs no journal or syncs
+        conn.execute("PRAGMA journal_mode=OFF")
+        conn.execute("PRAGMA synchronous=OFF")
+        # Streaming keeps its bookkeeping in temporary tables, which must not grow in memory
+        conn.execute("PRAGMA temp_store=FILE" if streaming else "PRAGMA temp_store=MEMORY")
+        conn.execute("PRAGMA cache_size=-65536")
+        cursor = conn.cursor()
+        
+        start = time.perf_counter()
+        cursor.execute("BEGIN")
+        if not incremental:
+            self._create_schema(cursor)
+        cursor.execute(CREATE_CATALOG_META_SQL)
+        cursor.execute(CREATE_INGEST_MANIFEST_SQL)
+        
+        counts = {}
+        for category, category_batches in batches.items():
+            if incremental:
+                counts[category] = self._upsert_category(cursor, category, category_batches)
+            else:
+                counts[category] = 0
+                for parts in category_batches:
+                    for batch_start in range(0, len(parts), INSERT_BATCH_SIZE):
+                        batch = parts[batch_start:batch_start + INSERT_BATCH_SIZE]
+                        cursor.executemany(INSERT_PART_SQL, [self._part_values(part) for part in batch])
+                    counts[category] += len(parts)
+                print(f"Inserted {counts[category]} {category} parts")
+        total_parts = sum(counts.values())
+        insert_seconds = time.perf_counter() - start
+        
+        # Indexes are built once the rows are in
+        apply_migrations(conn, commit=False)
+        set_catalog_version(cursor, catalog_version)
+        if manifest is not None:
+            cursor.execute("DELETE FROM ingest_manifest")
+            cursor.executemany("INSERT INTO ingest_manifest (path, sha256) VALUES (?, ?)", manifest.items())
         conn.commit()
-        conn.close()
+        total_seconds = time.perf_counter() - start
+        
+        print(f"Successfully {'upserted' if incremental else 'inserted'} {total_parts} parts into database!")
+        if streaming:
+            # Reading and matching the chunks happened while inserting
+            insert_seconds = sum(timing["write_seconds"] for timing in self.chunk_timings)
+        print(f"Wrote {total_parts / max(insert_seconds, 1e-9):,.0f} rows/s; "
+              f"{total_seconds:.2f}s including indexes ({total_parts / max(total_seconds, 1e-9):,.0f} rows/s)")
+        return counts
+    
+    def _upsert_category(self, cursor: sqlite3.Cursor, category: str, batches: Iterable[List[Dict]]) -> int:
+        """Update a category's parts in place by source key, adding new ones and removing unlisted ones.
         
-        print(f"Successfully inserted {total_parts} parts into database!")
+        Returns the number of parts listed. The listed source keys are collected
+        in a temporary table, so the parts can arrive in any number of batches.
+        """
+        cursor.execute("CREATE TEMP TABLE IF NOT EXISTS listed_source_keys (source_key TEXT PRIMARY KEY)")
+        cursor.execute("DELETE FROM listed_source_keys")
+        
+        listed = updated = added = 0
+        for parts in batches:
+            for batch_start in range(0, len(parts), INSERT_BATCH_SIZE):
+                batch = parts[batch_start:batch_start + INSERT_BATCH_SIZE]
+                source_keys = [part['source_key'] for part in batch]
+                existing = dict(cursor.execute(
+                    f"SELECT source_key, id FROM parts WHERE category = ? AND source_key IN ({', '.join('?' * len(batch))})",
+                    [category] + source_keys
+                ).fetchall())
+                cursor.executemany("INSERT INTO listed_source_keys (source_key) VALUES (?)",
+                                   [(source_key,) for source_key in source_keys])
+                cursor.executemany(UPDATE_PART_SQL, [
+                    self._part_values(part)[1:] + (existing[part['source_key']],)
+                    for part in batch if part['source_key'] in existing
+                ])
+                cursor.executemany(INSERT_PART_SQL, [
+                    self._part_values(part) for part in batch if part['source_key'] not in existing
+                ])
+                listed += len(batch)
+                updated += len(existing)
+                added += len(batch) - len(existing)
+        
+        removed = cursor.execute(
+            "DELETE FROM parts WHERE category = ? AND (source_key IS NULL OR "
+            "source_key NOT IN (SELECT source_key FROM listed_source_keys))", (category,)
+        ).rowcount
+        print(f"Upserted {listed} {category} parts: {updated} updated, {added} added, {removed} removed")
+        return listed
+    
+    def _catalog_state(self, conn: sqlite3.Connection) -> Tuple[int, Dict[str, int]]:
+        """Catalog version and parts per category of a database, which may not have a catalog yet"""
+        try:
+            row = conn.execute(CATALOG_VERSION_SQL).fetchone()
+            version = int(row[0]) if row else 0
+        except sqlite3.OperationalError:
+            version = 0
+        try:
+            counts = dict(conn.execute("SELECT category, COUNT(*) FROM parts GROUP BY category").fetchall())
+        except sqlite3.OperationalError:
+            counts = {}
+        return version, counts
+    
+    def validate_catalog(self, conn: sqlite3.Connection, loaded_counts: Dict[str, int],
+                         live_counts: Dict[str, int]):
+        """Check a staged catalog before it replaces the live one.
+        
+        Every category must have all of the parts loaded for it stored
+        (loaded_counts; categories not reloaded keep their live parts), and none may shrink below
+        MIN_RELOAD_RATIO of its live size, which would mean a truncated or
+        malformed CSV rather than a real catalog change.
+        """
+        _, counts = self._catalog_state(conn)
+        problems = []
+        for category in CATALOG_CATEGORIES:
+            count = counts.get(category, 0)
+            live_count = live_counts.get(category, 0)
+            expected = loaded_counts.get(category, live_count)
+            if count == 0:
+                problems.append(f"no {category} parts")
+            elif count != expected:
+                problems.append(f"{count} of {expected} {category} parts stored")
+            elif count < live_count * MIN_RELOAD_RATIO:
+                problems.append(f"{category} parts would drop from {live_count} to {count}")
+        
+        if problems:
+            raise CatalogValidationError("Catalog not loaded: " + "; ".join(problems))
+        print("Validated part counts: " + ", ".join(f"{category} {counts[category]}" for category in CATALOG_CATEGORIES))
+    
+    def _remove_database_file(self, path: str):
+        """Delete a database file and any journal files next to it"""
+        for suffix in ("", "-journal", "-wal", "-shm"):
+            if os.path.exists(path + suffix):
+                os.remove(path + suffix)
+    
+    def _part_values(self, part: Dict) -> Tuple:
+        """Parameters of INSERT_PART_SQL for a merged part"""
+        columns = part['compatibility_columns']
+        return (
+            part['source_key'],
+            part['name'],
+            part['category'],
+            part['price'],
+            part['performance_score'],
+            part['compatibility_tags'],
+            part['brand'],
+            part['hardware_brand'],
+            part['specifications'],
+            part['benchmark_rank'],
+            part['benchmark_samples'],
+            part['benchmark_url'],
+            columns['socket'],
+            columns['tdp'],
+            columns['power'],
+            columns['length'],
+            columns['wattage'],
+            columns['form_factor'],
+            columns['max_gpu_length'],
+            columns['max_memory'],
+            columns['ram_type'],
+            columns['ram_capacity_gb'],
+            columns['storage_type']
+        )
 
 if __name__ == "__main__":
+    import argparse
+    
+    parser = argparse.ArgumentParser(description="Load the price and benchmark CSVs into the parts database")
+    parser.add_argument("--full", action="store_true", help="reload every category, not just changed ones")
+    parser.add_argument("--workers", type=int, default=1, help="processes to merge the CSVs with (default: 1)")
+    parser.add_argument("--chunk-size", type=int, help="stream the price CSVs this many rows at a time")
+    args = parser.parse_args()
+    if args.chunk_size is not None and args.workers > 1:
+        parser.error("--chunk-size merges in this process and cannot be combined with --workers")
+    
     loader = CSVDataLoader()
-    loader.load_all_data()
+    loader.load_all_data(full=args.full, workers=args.workers, chunk_size=args.chunk_size)
@@ -1,48 +1,183 @@
 import sqlite3
 import logging
 import json
+import threading
 from typing import List, Dict, Optional, Tuple
 from pathlib import Path
 
+from connection_pool import ConnectionPool
+from catalog import CatalogSnapshot, SNAPSHOT_COLUMNS
+from migrations import apply_migrations, backfill_compatibility_columns
+
+CREATE_CATALOG_META_SQL = '''
+    CREATE TABLE IF NOT EXISTS catalog_meta (
+        key TEXT PRIMARY KEY,
+        value TEXT NOT NULL
+    )
+'''
+
+CREATE_BUILD_FRONTIER_SQL = '''
+    CREATE TABLE IF NOT EXISTS build_frontier (
+        use_case TEXT NOT NULL,
+        catalog_version INTEGER NOT NULL,
+        total_price REAL NOT NULL,
+        performance_score INTEGER NOT NULL,
+        part_ids TEXT NOT NULL
+    )
+'''
+
+def bump_catalog_version(cursor: sqlite3.Cursor):
+    """Record that the parts catalog has been reloaded"""
+    cursor.execute(CREATE_CATALOG_META_SQL)
+    cursor.execute('''
+        INSERT INTO catalog_meta (key, value) VALUES ('catalog_version', '1')
+        ON CONFLICT(key) DO UPDATE SET value = CAST(value AS INTEGER) + 1
+    ''')
+
+def set_catalog_version(cursor: sqlite3.Cursor, version: int):
+    """Record the version of a catalog built to replace another"""
+    cursor.execute(CREATE_CATALOG_META_SQL)
+    cursor.execute('''
+        INSERT INTO catalog_meta (key, value) VALUES ('catalog_version', ?)
+        ON CONFLICT(key) DO UPDATE SET value = excluded.value
+    ''', (str(version),))
+
+# Columns making up a part dict, in the order _part_from_row expects
+PART_COLUMNS = "id, name, category, price, performance_score, compatibility_tags, brand, hardware_brand, specifications"
+
+def _part_from_row(row: Tuple, decode_specifications: bool = True) -> Dict:
+    """Part dict from a row of PART_COLUMNS"""
+    return {
+        "id": row[0],
+        "name": row[1],
+        "category": row[2],
+        "price": row[3],
+        "performance_score": row[4],
+        "compatibility_tags": json.loads(row[5]),
+        "brand": row[6],
+        "hardware_brand": row[7],
+        "specifications": json.loads(row[8]) if decode_specifications else row[8]
+    }
+
+def load_specifications(part: Dict) -> Dict:
+    """Decode a part's specifications if it was fetched with decode_specifications=False"""
+    if isinstance(part["specifications"], str):
+        part["specifications"] = json.loads(part["specifications"])
+    return part["specifications"]
+
+CATALOG_VERSION_SQL = "SELECT value FROM catalog_meta WHERE key = 'catalog_version'"
+
 class Database:
-    def __init__(self, db_path: str = "buildmyrig.db"):
+    def __init__(self, db_path: str = "buildmyrig.db", use_catalog_snapshot: bool = True):
         self.db_path = db_path
+        # Connections are reused across calls: one writer, and read-only connections for queries
+        self._write_pool = ConnectionPool(db_path, max_connections=1)
+        self._read_pool = ConnectionPool(db_path, max_connections=8, read_only=True)
+        # Parts queries are answered from an in-memory snapshot of the catalog, see catalog.py
+        self.use_catalog_snapshot = use_catalog_snapshot
+        self._catalog = None
+        self._catalog_lock = threading.Lock()
         self.init_database()
         self.populate_real_data()
+        if use_catalog_snapshot:
+            self.catalog()
     
     def init_database(self):
         """Initialize the database schema"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        # Create parts table
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS parts (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                name TEXT NOT NULL,
-                category TEXT NOT NULL,
-                price REAL NOT NULL,
-                performance_score INTEGER NOT NULL,
-                compatibility_tags TEXT NOT NULL,
-                brand TEXT NOT NULL,
-                hardware_brand TEXT,
-                specifications TEXT
-            )
-        ''')
-        
-        conn.commit()
-        conn.close()
+        with self._write_pool.connection() as conn:
+            cursor = conn.cursor()
+            
+            # Create parts table
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS parts (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    name TEXT NOT NULL,
+                    category TEXT NOT NULL,
+                    price REAL NOT NULL,
+                    performance_score INTEGER NOT NULL,
+                    compatibility_tags TEXT NOT NULL,
+                    brand TEXT NOT NULL,
+                    hardware_brand TEXT,
+                    specifications TEXT
+                )
+            ''')
+            
+            # Catalog metadata, e.g. the version that is bumped every time the parts are reloaded
+            cursor.execute(CREATE_CATALOG_META_SQL)
+            
+            # Precomputed frontier builds per use case, see frontier.py
+            cursor.execute(CREATE_BUILD_FRONTIER_SQL)
+            
+            conn.commit()
+            apply_migrations(conn)
+    
+    def get_catalog_version(self) -> int:
+        """Get the version of the parts catalog, which changes whenever it is reloaded"""
+        with self._read_pool.connection() as conn:
+            row = conn.execute(CATALOG_VERSION_SQL).fetchone()
+        return int(row[0]) if row else 0
+    
+    def catalog(self) -> CatalogSnapshot:
+        """Snapshot of the current catalog, reloaded when the catalog version changes"""
+        catalog_version = self.get_catalog_version()
+        snapshot = self._catalog
+        if snapshot is None or snapshot.version != catalog_version:
+            with self._catalog_lock:
+                snapshot = self._catalog
+                if snapshot is None or snapshot.version != catalog_version:
+                    snapshot = self._load_catalog()
+                    # Requests already holding the old snapshot keep using it
+                    self._catalog = snapshot
+        return snapshot
+    
+    def _load_catalog(self) -> CatalogSnapshot:
+        """Read the whole catalog and its version in one transaction"""
+        with self._read_pool.connection() as conn:
+            conn.execute("BEGIN")
+            row = conn.execute(CATALOG_VERSION_SQL).fetchone()
+            results = conn.execute(f"SELECT {SNAPSHOT_COLUMNS} FROM parts").fetchall()
+            conn.rollback()
+        return CatalogSnapshot(int(row[0]) if row else 0, results)
+    
+    async def get_catalog_version_async(self) -> int:
+        """Get the catalog version without blocking the event loop on a busy connection pool"""
+        async with self._read_pool.connection_async() as conn:
+            row = conn.execute(CATALOG_VERSION_SQL).fetchone()
+        return int(row[0]) if row else 0
+    
+    def save_build_frontier(self, use_case: str, catalog_version: int, builds: List[Tuple]):
+        """Replace the stored frontier of a use case. Builds are (total price, performance, part ids) tuples."""
+        rows = [(use_case, catalog_version, total_price, performance, json.dumps(part_ids))
+                for total_price, performance, part_ids in builds]
+        
+        with self._write_pool.connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(CREATE_BUILD_FRONTIER_SQL)
+            cursor.execute("DELETE FROM build_frontier WHERE use_case = ?", (use_case,))
+            cursor.executemany('''
+                INSERT INTO build_frontier (use_case, catalog_version, total_price, performance_score, part_ids)
+                VALUES (?, ?, ?, ?, ?)
+            ''', rows)
+            conn.commit()
+    
+    def get_build_frontier(self, use_case: str) -> Tuple[Optional[int], List[Tuple]]:
+        """Get the catalog version and builds, cheapest first, of a use case's stored frontier"""
+        with self._read_pool.connection() as conn:
+            results = conn.execute('''
+                SELECT catalog_version, total_price, performance_score, part_ids FROM build_frontier
+                WHERE use_case = ? ORDER BY total_price
+            ''', (use_case,)).fetchall()
+        
+        if not results:
+            return None, []
+        return results[0][0], [(row[1], row[2], json.loads(row[3])) for row in results]
     
     def populate_sample_data(self):
         """Populate database with sample PC parts data"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
         # Check if data already exists
-        cursor.execute("SELECT COUNT(*) FROM parts")
-        if cursor.fetchone()[0] > 0:
-            conn.close()
-            return
+        with self._write_pool.connection() as conn:
+            if conn.execute("SELECT COUNT(*) FROM parts").fetchone()[0] > 0:
+                return
         
         sample_parts = [
             # CPUs
@@ -90,29 +225,26 @@ class Database:
             ("Cooler Master MasterBox Q300L", "case", 44.99, 65, json.dumps({"form_factor": "mATX", "max_gpu_length": "360mm"}), "Cooler Master", json.dumps({"type": "Mini Tower", "color": "Black"})),
         ]
         
-        cursor.executemany('''
-            INSERT INTO parts (name, category, price, performance_score, compatibility_tags, brand, specifications)
-            VALUES (?, ?, ?, ?, ?, ?, ?)
-        ''', sample_parts)
-        
-        conn.commit()
-        conn.close()
+        with self._write_pool.connection() as conn:
+            cursor = conn.cursor()
+            cursor.executemany('''
+                INSERT INTO parts (name, category, price, performance_score, compatibility_tags, brand, specifications)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            ''', sample_parts)
+            backfill_compatibility_columns(conn)
+            bump_catalog_version(cursor)
+            conn.commit()
     
     def populate_real_data(self):
         """Populate database with real PC parts data from CSV files"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
         # Check if data already exists
-        cursor.execute("SELECT COUNT(*) FROM parts")
-        if cursor.fetchone()[0] > 0:
-            conn.close()
-            return
+        with self._write_pool.connection() as conn:
+            if conn.execute("SELECT COUNT(*) FROM parts").fetchone()[0] > 0:
+                return
         
         # Check if CSV files exist
         if not (Path("price_data").exists() and Path("performance_data").exists()):
             print("CSV data directories not found. Loading sample data instead.")
-            conn.close()
             self.populate_sample_data()
             return
         
@@ -125,66 +257,34 @@ class Database:
         except Exception as e:
             print(f"Error loading real data: {e}")
             print("Falling back to sample data...")
-            conn.close()
             self.populate_sample_data()
     
-    def get_parts_by_category(self, category: str, brand_preference: Optional[Tuple[str, str]] = None) -> List[Dict]:
-        """Get parts by category with optional brand filtering. Tuple indicates (brand, hardware_brand)."""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        query = "SELECT * FROM parts WHERE category = ?"
+    def _parts_query(self, category: str, brand_preference: Optional[Tuple[str, str]] = None) -> Tuple[str, List]:
+        """Query and parameters selecting a category's parts, filtered by a (brand, hardware_brand) preference"""
+        query = f"SELECT {PART_COLUMNS} FROM parts WHERE category = ?"
         params = [category]
         
         if brand_preference:
             brand, hardware_brand = brand_preference
-            brand_condition = "brand = ?"
-            hardware_brand_condition = "hardware_brand = ?"
             if brand != "any":
-                query += f" AND {brand_condition}"
+                query += " AND brand = ?"
                 params.append(brand)
             if hardware_brand != "any":
-                query += f" AND {hardware_brand_condition}"
+                query += " AND hardware_brand = ?"
                 params.append(hardware_brand)
         
-        cursor.execute(query, params)
-        results = cursor.fetchall()
-        
-        parts = []
-        for row in results:
-            parts.append({
-                "id": row[0],
-                "name": row[1],
-                "category": row[2],
-                "price": row[3],
-                "performance_score": row[4],
-                "compatibility_tags": json.loads(row[5]),
-                "brand": row[6],
-                "hardware_brand": row[7],
-                "specifications": json.loads(row[8])
-            })
-        
-        conn.close()
-        return parts
+        return query, params
     
-    def get_parts_by_category_paginated(self, category: str, brand_preference: Optional[Tuple[str, str]] = None, 
-                                       limit: int = 50, offset: int = 0, 
-                                       sort_by: str = "performance_score", sort_order: str = "desc") -> List[Dict]:
-        """Get parts by category with pagination and sorting"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+    def _paginated_parts_query(self, category: str, brand_preference: Optional[Tuple[str, str]] = None,
+                               limit: int = 50, offset: int = 0,
+                               sort_by: str = "performance_score", sort_order: str = "desc",
+                               min_wattage: Optional[int] = None) -> Tuple[str, List]:
+        """Query and parameters for one sorted page of a category's parts"""
+        query, params = self._parts_query(category, brand_preference)
         
-        query = "SELECT * FROM parts WHERE category = ?"
-        params = [category]
-        
-        if brand_preference:
-            brand, hardware_brand = brand_preference
-            if brand != "any":
-                query += " AND brand = ?"
-                params.append(brand)
-            if hardware_brand != "any":
-                query += " AND hardware_brand = ?"
-                params.append(hardware_brand)
+        if min_wattage is not None:
+            query += " AND wattage >= ?"
+            params.append(min_wattage)
         
         # Add sorting
         if sort_by in ["performance_score", "price", "name"]:
@@ -198,47 +298,71 @@ class Database:
         query += " LIMIT ? OFFSET ?"
         params.extend([limit, offset])
         
-        cursor.execute(query, params)
-        results = cursor.fetchall()
-        
-        parts = []
-        for row in results:
-            parts.append({
-                "id": row[0],
-                "name": row[1],
-                "category": row[2],
-                "price": row[3],
-                "performance_score": row[4],
-                "compatibility_tags": json.loads(row[5]),
-                "brand": row[6],
-                "hardware_brand": row[7],
-                "specifications": json.loads(row[8])
-            })
-        
-        conn.close()
-        return parts
+        return query, params
+    
+    def get_parts_by_category(self, category: str, brand_preference: Optional[Tuple[str, str]] = None,
+                              decode_specifications: bool = True) -> List[Dict]:
+        """Get parts by category with optional brand filtering. Tuple indicates (brand, hardware_brand).
+        
+        Without decode_specifications, specifications are left as JSON text until load_specifications.
+        """
+        if self.use_catalog_snapshot:
+            return self.catalog().get_parts_by_category(category, brand_preference, decode_specifications)
+        
+        query, params = self._parts_query(category, brand_preference)
+        # Keep catalog order whichever index answers the query
+        query += " ORDER BY id"
+        
+        with self._read_pool.connection() as conn:
+            results = conn.execute(query, params).fetchall()
+        
+        return [_part_from_row(row, decode_specifications) for row in results]
+    
+    def get_parts_by_category_paginated(self, category: str, brand_preference: Optional[Tuple[str, str]] = None, 
+                                       limit: int = 50, offset: int = 0, 
+                                       sort_by: str = "performance_score", sort_order: str = "desc",
+                                       min_wattage: Optional[int] = None) -> List[Dict]:
+        """Get parts by category with pagination and sorting, optionally only PSUs of at least min_wattage"""
+        if self.use_catalog_snapshot:
+            return self.catalog().get_parts_by_category_paginated(category, brand_preference, limit, offset,
+                                                                  sort_by, sort_order, min_wattage)
+        
+        query, params = self._paginated_parts_query(category, brand_preference, limit, offset, sort_by, sort_order,
+                                                    min_wattage)
+        
+        with self._read_pool.connection() as conn:
+            results = conn.execute(query, params).fetchall()
+        
+        return [_part_from_row(row) for row in results]
 
-    def get_all_parts(self) -> List[Dict]:
+    def get_parts_by_ids(self, part_ids) -> List[Dict]:
+        """Get the parts with the given ids"""
+        if self.use_catalog_snapshot:
+            return self.catalog().get_parts_by_ids(part_ids)
+        
+        part_ids = list(part_ids)
+        
+        results = []
+        with self._read_pool.connection() as conn:
+            # Stay below SQLite's limit on query parameters
+            for start in range(0, len(part_ids), 500):
+                chunk = part_ids[start:start + 500]
+                placeholders = ", ".join("?" for _ in chunk)
+                results.extend(conn.execute(f"SELECT {PART_COLUMNS} FROM parts WHERE id IN ({placeholders})", chunk).fetchall())
+        
+        return [_part_from_row(row) for row in results]
+
+    def get_all_parts(self, decode_specifications: bool = True) -> List[Dict]:
         """Get all parts from database"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute("SELECT id, name, category, price, performance_score, compatibility_tags, brand, hardware_brand, specifications FROM parts")
-        results = cursor.fetchall()
-        
-        parts = []
-        for row in results:
-            parts.append({
-                "id": row[0],
-                "name": row[1],
-                "category": row[2],
-                "price": row[3],
-                "performance_score": row[4],
-                "compatibility_tags": json.loads(row[5]),
-                "brand": row[6],
-                "hardware_brand": row[7],
-                "specifications": json.loads(row[8])
-            })
-        
-        conn.close()
-        return parts
+        if self.use_catalog_snapshot:
+            return self.catalog().get_all_parts(decode_specifications)
+        
+        with self._read_pool.connection() as conn:
+            results = conn.execute(f"SELECT {PART_COLUMNS} FROM parts").fetchall()
+        
+        return [_part_from_row(row, decode_specifications) for row in results]
+    
+    def close(self):
+        """Close the pooled connections"""
+        self._read_pool.close()
+        self._write_pool.close()
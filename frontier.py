@@ -0,0 +1,159 @@
+from typing import List, Dict, Optional, Tuple
+from bisect import bisect_right
+
+# Use cases and budgets the frontier is precomputed for
+FRONTIER_USE_CASES = ("gaming", "workstation", "general")
+FRONTIER_BUDGETS = tuple(range(400, 5001, 50))
+# CPU/GPU pairs kept per budget, so brand preferences still leave enough builds
+FRONTIER_PAIRS_PER_BUDGET = 9
+
+def dominates(build: Tuple, other: Tuple) -> bool:
+    """Check if build scores at least as well as other at every budget other fits in.
+
+    Builds are (total price, performance score) tuples. The score is linear in
+    1 / budget, so it is enough to compare at budget = other's price and as the
+    budget grows without limit.
+    """
+    price, performance = build
+    other_price, other_performance = other
+    if price > other_price or performance < other_performance:
+        return False
+    # 0.6 * performance / 1000 against 0.4 * price / budget, see RecommendationEngine._build_score
+    return (performance - other_performance) * 0.6 / 1000 >= (other_price - price) * 0.4 / other_price
+
+def pareto_frontier(builds: List[Tuple]) -> List[Tuple]:
+    """Drop builds dominated by a build of the same CPU/GPU pair.
+
+    Builds are (total price, performance score, part ids by category) tuples.
+    """
+    by_pair = {}
+    for build in sorted(builds, key=lambda build: (build[0], -build[1])):
+        pair = (build[2]["cpu"], build[2]["gpu"])
+        kept = by_pair.setdefault(pair, [])
+        if not any(dominates(existing[:2], build[:2]) for existing in kept):
+            kept.append(build)
+
+    frontier = [build for kept in by_pair.values() for build in kept]
+    frontier.sort(key=lambda build: build[0])
+    return frontier
+
+class BuildFrontier:
+    """Precomputed price/performance frontier of builds for each use case.
+
+    The frontier is built offline by running the build search over a grid of
+    budgets and is stored in the build_frontier table. A recommendation is then a
+    binary search for the builds within budget plus the brand preference filter.
+    """
+
+    def __init__(self, database):
+        self.db = database
+        # use case -> (catalog version, sorted prices, frontier builds)
+        self._frontiers = {}
+
+    def rebuild(self, engine):
+        """Recompute the frontier of every use case for the current catalog"""
+        catalog = self.db.catalog()
+
+        for use_case in FRONTIER_USE_CASES:
+            parts_by_category = {
+                category: catalog.get_parts_by_category(category, decode_specifications=False)
+                for category in engine.required_categories
+            }
+            parts_by_category = engine._apply_use_case_filtering(parts_by_category, use_case)
+
+            builds = []
+            for budget in FRONTIER_BUDGETS:
+                # Offline work, kept out of the request metrics
+                for candidate in engine._generate_valid_builds(parts_by_category, float(budget), use_case,
+                                                               max_results=FRONTIER_PAIRS_PER_BUDGET,
+                                                               record_metrics=False):
+                    part_ids = {category: part["id"] for category, part in candidate.parts.items()}
+                    builds.append((candidate.total_price, candidate.performance_score, part_ids))
+
+            frontier = pareto_frontier(builds)
+            self.db.save_build_frontier(use_case, catalog.version, frontier)
+            print(f"Stored {len(frontier)} {use_case} frontier builds")
+
+        self._frontiers = {}
+
+    def lookup(self, engine, budget: float, brand_preferences: Dict[str, str], use_case: str) -> Optional[List]:
+        """Best frontier build of each of the top CPU/GPU pairs within budget.
+
+        Returns (score, total price, performance score, parts by category) tuples,
+        best first, or None when the frontier cannot answer and the live search
+        has to run instead.
+        """
+        use_case = use_case.lower()
+        if use_case not in FRONTIER_USE_CASES or budget > FRONTIER_BUDGETS[-1]:
+            return None
+
+        frontier = self._load(engine, use_case)
+        if frontier is None:
+            return None
+        prices, builds = frontier
+
+        best_by_pair = {}
+        for total_price, performance, parts in builds[:bisect_right(prices, budget)]:
+            score = engine._build_score(performance, total_price, budget)
+            pair = (parts["cpu"]["id"], parts["gpu"]["id"])
+            if pair not in best_by_pair or score > best_by_pair[pair][0]:
+                best_by_pair[pair] = (score, total_price, performance, parts)
+
+        # Only the pairs the precompute ranked at the top were searched exhaustively, so
+        # the recommendations have to come from those
+        top_pairs = sorted(best_by_pair.values(), key=lambda result: result[0], reverse=True)[:FRONTIER_PAIRS_PER_BUDGET]
+        results = [result for result in top_pairs if self._matches_brand_preferences(result[3], brand_preferences)]
+        if len(results) < engine.max_recommendations:
+            # Brand preferences cut the frontier too far
+            return None
+        return results[:engine.max_recommendations]
+
+    def _load(self, engine, use_case: str) -> Optional[Tuple[List[float], List[Tuple]]]:
+        """Frontier builds for the current catalog, or None if none are stored for it"""
+        catalog = self.db.catalog()
+        cached = self._frontiers.get(use_case)
+        if cached is not None and cached[0] == catalog.version:
+            return cached[1]
+
+        frontier_version, rows = self.db.get_build_frontier(use_case)
+        if frontier_version != catalog.version or not rows:
+            return None
+
+        part_ids = {part_id for _, _, ids in rows for part_id in ids.values()}
+        parts = catalog.get_parts_by_ids(part_ids)
+        # Parts carry the same use case adjusted scores as in the live search
+        parts_by_category = {}
+        for part in parts:
+            parts_by_category.setdefault(part["category"], []).append(part)
+        engine._apply_use_case_filtering(parts_by_category, use_case)
+        parts_by_id = {part["id"]: part for part in parts}
+
+        builds = [
+            (total_price, performance, {category: parts_by_id[part_id] for category, part_id in ids.items()})
+            for total_price, performance, ids in rows
+        ]
+        frontier = ([build[0] for build in builds], builds)
+        self._frontiers[use_case] = (catalog.version, frontier)
+        return frontier
+
+    def _matches_brand_preferences(self, parts: Dict[str, Dict], brand_preferences: Dict[str, str]) -> bool:
+        """Check a build against brand preferences the same way the parts query filters them"""
+        for category, brand_pref in brand_preferences.items():
+            if not brand_pref or category not in parts:
+                continue
+            # CPU and GPU preferences refer to the hardware brand
+            key = "hardware_brand" if category in ["cpu", "gpu"] else "brand"
+            if parts[category][key] != brand_pref:
+                return False
+        return True
+
+def rebuild_frontier(db_path: str = "buildmyrig.db"):
+    """Rebuild the stored frontier after the parts catalog has been reloaded"""
+    from database import Database
+    from recommendation_engine import RecommendationEngine
+
+    db = Database(db_path)
+    try:
+        BuildFrontier(db).rebuild(RecommendationEngine(db))
+    finally:
+        db.close()
@@ -1,14 +1,22 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Body, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
-from typing import List
+from fastapi.responses import FileResponse, StreamingResponse, Response
+from pydantic import ValidationError
+from typing import List, Dict, Any
 import uvicorn
 import os
+import time
 
 from database import Database
 from recommendation_engine import RecommendationEngine
-from models import BuildRequest, RecommendationResponse, PartResponse
+from recommendation_cache import RecommendationCache
+from search_executor import SearchExecutor, SearchRejected, SearchTimeout
+from metrics import REGISTRY, STAGE_SECONDS, HTTP_REQUEST_SECONDS, HTTP_REQUESTS_IN_FLIGHT
+from models import (
+    BuildRequest, RecommendationResponse, PartResponse, BatchRecommendationItem,
+    CurveRequest, CurvePoint, CurveResponse, UpgradeRequest, UpgradeResponse
+)
 
 # Initialize FastAPI app
 app = FastAPI(
@@ -34,7 +42,36 @@ if os.path.exists(frontend_path):
 
 # Initialize database and recommendation engine
 db = Database()
-recommendation_engine = RecommendationEngine(db)
+recommendation_engine = RecommendationEngine(db, use_frontier=True)
+# Repeat requests (round budgets, common brand combinations) are served from memory
+recommendation_cache = RecommendationCache(max_entries=1024, ttl_seconds=600.0)
+# Searches run in a worker pool so they never block the event loop (and /health)
+search_executor = SearchExecutor.from_environment(recommendation_engine)
+# Most build requests a single POST /recommend/batch may contain
+MAX_BATCH_REQUESTS = 500
+# Most budgets a single POST /recommend/curve may sweep
+MAX_CURVE_POINTS = 1000
+
+@app.on_event("shutdown")
+async def shutdown_search_executor():
+    search_executor.shutdown()
+
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    """Count in-flight requests and time each one by route (for streamed responses, until the headers are sent)"""
+    HTTP_REQUESTS_IN_FLIGHT.inc()
+    start = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        HTTP_REQUESTS_IN_FLIGHT.dec()
+        # The route template, so /parts/{category} is one series however many categories are requested
+        route = request.scope.get("route")
+        HTTP_REQUEST_SECONDS.observe(time.perf_counter() - start, method=request.method,
+                                     route=route.path if route is not None else "unmatched", status=status)
 
 @app.get("/")
 async def serve_frontend():
@@ -49,8 +86,14 @@ async def api_info():
         "version": "1.0.0",
         "endpoints": {
             "POST /recommend": "Get PC build recommendations",
+            "POST /recommend/batch": "Get recommendations for many build requests, streamed as NDJSON",
+            "POST /recommend/curve": "Get the best build at every budget step of a range",
+            "POST /recommend/upgrade": "Get the best one or two part upgrades of an existing build",
             "GET /parts": "Get all available parts",
             "GET /parts/{category}": "Get parts by category",
+            "GET /cache/stats": "Recommendation cache statistics",
+            "GET /search/stats": "Recommendation search load and timeouts",
+            "GET /metrics": "Stage timings, search counts and request latency in the Prometheus text format",
             "GET /health": "Health check endpoint"
         }
     }
@@ -71,36 +114,270 @@ async def get_recommendations(request: BuildRequest):
         "brand_preferences": {"cpu": "AMD", "gpu": "NVIDIA"},
         "use_case": "gaming"
     }
+    
+    With "max_latency_ms" the search stops once that much time has passed since
+    the request arrived, returning the best builds found so far; "exhaustive" in
+    the response is false if it was cut short.
     """
+    # The latency budget runs from the request's arrival, including any wait for a search slot
+    deadline = time.monotonic() + request.max_latency_ms / 1000 if request.max_latency_ms else None
     try:
-        # Get recommendations from the engine
-        builds = recommendation_engine.get_recommendations(
-            budget=request.budget,
-            brand_preferences=request.brand_preferences,
-            use_case=request.use_case
+        cache_key = recommendation_cache.make_key(
+            request.budget, request.brand_preferences, request.use_case, await db.get_catalog_version_async()
         )
+        builds = recommendation_cache.get(cache_key)
+        exhaustive = True
+        if builds is None:
+            # Get recommendations from the engine for the budget's cache bucket
+            if deadline is None:
+                builds = await search_executor.recommend(
+                    budget=recommendation_cache.budget_bucket(request.budget),
+                    brand_preferences=request.brand_preferences or {},
+                    use_case=request.use_case
+                )
+            else:
+                builds, exhaustive = await search_executor.recommend_anytime(
+                    budget=recommendation_cache.budget_bucket(request.budget),
+                    brand_preferences=request.brand_preferences or {},
+                    use_case=request.use_case,
+                    deadline=deadline
+                )
+            # Builds from a search cut short are not cached, so a later request can get the complete answer
+            if exhaustive:
+                recommendation_cache.put(cache_key, builds)
         
-        if not builds:
-            raise HTTPException(
-                status_code=404,
-                detail="No valid builds found within the specified budget and preferences"
-            )
+        if not builds and not exhaustive:
+            raise HTTPException(status_code=504, detail="No build found within max_latency_ms, please allow more time")
+        response = _recommendation_response(request, builds, exhaustive)
+        # Serialised here rather than by FastAPI, so its time is recorded with the other stages
+        with STAGE_SECONDS.time(stage="serialization"):
+            content = response.model_dump_json()
+        return Response(content=content, media_type="application/json")
+        
+    except SearchRejected:
+        raise HTTPException(status_code=503, detail="Too many recommendation requests, please try again shortly")
+    except SearchTimeout:
+        raise HTTPException(status_code=504, detail="Generating recommendations took too long, please try again")
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error generating recommendations: {str(e)}")
+
+@app.post("/recommend/batch")
+async def get_batch_recommendations(build_requests: List[Dict[str, Any]] = Body(...)):
+    """
+    Get PC build recommendations for many build requests at once.
+    
+    Expects a JSON list of /recommend request bodies. Requests with the same
+    brand preferences and use case share one candidate fetch and are searched
+    together. Results are streamed back as newline-delimited JSON, one line per
+    request in input order, each with the status the request would have had on
+    its own:
+    {"index": 0, "status": 200, "result": {...}}
+    {"index": 1, "status": 404, "error": "No valid builds found ..."}
+    Batched searches always run to completion; max_latency_ms is ignored.
+    """
+    if len(build_requests) > MAX_BATCH_REQUESTS:
+        raise HTTPException(
+            status_code=413,
+            detail=f"A batch may contain at most {MAX_BATCH_REQUESTS} requests, got {len(build_requests)}"
+        )
+    return StreamingResponse(_batch_recommendation_lines(build_requests), media_type="application/x-ndjson")
+
+async def _batch_recommendation_lines(build_requests: List[Dict[str, Any]]):
+    """NDJSON lines of the BatchRecommendationItem of every request, in input order"""
+    items = [None] * len(build_requests)
+    catalog_version = await db.get_catalog_version_async()
+    # (brand preferences, use case) -> [(index, request, cache key)] of requests not in the cache
+    groups = {}
+    for index, body in enumerate(build_requests):
+        try:
+            request = BuildRequest.model_validate(body)
+        except ValidationError as e:
+            errors = "; ".join(f"{'.'.join(str(part) for part in error['loc'])}: {error['msg']}" for error in e.errors())
+            items[index] = BatchRecommendationItem(index=index, status=422, error=errors)
+            continue
         
-        # Create response
-        response = RecommendationResponse(
-            builds=builds,
-            message=f"Found {len(builds)} optimized build(s) for your {request.use_case} setup",
-            request_summary={
-                "budget": request.budget,
-                "brand_preferences": request.brand_preferences,
-                "use_case": request.use_case
-            }
+        cache_key = recommendation_cache.make_key(
+            request.budget, request.brand_preferences, request.use_case, catalog_version
         )
+        builds = recommendation_cache.get(cache_key)
+        if builds is not None:
+            items[index] = _batch_item(index, request, builds)
+        else:
+            # The key without its budget and catalog version
+            groups.setdefault(cache_key[1:3], []).append((index, request, cache_key))
+    
+    next_index = 0
+    for entries in list(groups.values()) + [None]:
+        # Everything finished up to the first request still waiting can be sent
+        while next_index < len(items) and items[next_index] is not None:
+            yield items[next_index].model_dump_json(exclude_none=True) + "\n"
+            next_index += 1
+        if entries is None:
+            break
         
-        return response
+        _, first_request, _ = entries[0]
+        try:
+            group_builds = await search_executor.recommend_budgets(
+                [recommendation_cache.budget_bucket(request.budget) for _, request, _ in entries],
+                first_request.brand_preferences or {},
+                first_request.use_case
+            )
+        except Exception as e:
+            # Every request of the group fails the way it would have on its own
+            if isinstance(e, SearchRejected):
+                status, error = 503, "Too many recommendation requests, please try again shortly"
+            elif isinstance(e, SearchTimeout):
+                status, error = 504, "Generating recommendations took too long, please try again"
+            else:
+                status, error = 500, f"Error generating recommendations: {str(e)}"
+            for index, _, _ in entries:
+                items[index] = BatchRecommendationItem(index=index, status=status, error=error)
+            continue
         
+        for (index, request, cache_key), builds in zip(entries, group_builds):
+            recommendation_cache.put(cache_key, builds)
+            items[index] = _batch_item(index, request, builds)
+
+@app.post("/recommend/curve", response_model=CurveResponse)
+async def get_recommendation_curve(request: CurveRequest):
+    """
+    Get the best build at every budget from min_budget to max_budget in steps of step.
+    
+    The whole curve is computed in one sweep up through the budgets. Expected JSON input:
+    {
+        "use_case": "gaming",
+        "brand_preferences": {"gpu": "NVIDIA"},
+        "min_budget": 500,
+        "max_budget": 5000,
+        "step": 50
+    }
+    """
+    if request.max_budget < request.min_budget:
+        raise HTTPException(status_code=422, detail="max_budget must not be below min_budget")
+    point_count = int((request.max_budget - request.min_budget) / request.step + 1e-9) + 1
+    if point_count > MAX_CURVE_POINTS:
+        raise HTTPException(
+            status_code=413,
+            detail=f"A curve may have at most {MAX_CURVE_POINTS} points, got {point_count}"
+        )
+    budgets = [round(request.min_budget + i * request.step, 2) for i in range(point_count)]
+    
+    try:
+        builds = await search_executor.recommend_curve(budgets, request.brand_preferences or {}, request.use_case)
+    except SearchRejected:
+        raise HTTPException(status_code=503, detail="Too many recommendation requests, please try again shortly")
+    except SearchTimeout:
+        raise HTTPException(status_code=504, detail="Generating recommendations took too long, please try again")
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error generating recommendations: {str(e)}")
+    
+    distinct_builds = len({tuple(part.id for part in build.parts) for build in builds if build is not None})
+    return CurveResponse(
+        points=[CurvePoint(budget=budget, build=build) for budget, build in zip(budgets, builds)],
+        distinct_builds=distinct_builds,
+        message=f"Found {distinct_builds} distinct build(s) over {point_count} budget(s) for your {request.use_case} setup",
+        request_summary={
+            "min_budget": request.min_budget,
+            "max_budget": request.max_budget,
+            "step": request.step,
+            "brand_preferences": request.brand_preferences,
+            "use_case": request.use_case
+        }
+    )
+
+@app.post("/recommend/upgrade", response_model=UpgradeResponse)
+async def get_upgrade_recommendations(request: UpgradeRequest):
+    """
+    Get the best upgrades of an existing build, replacing one or two of its parts.
+    
+    Expected JSON input:
+    {
+        "part_ids": [12, 340, 1022, 2051, 4410, 6120, 7001],
+        "upgrade_budget": 300,
+        "brand_preferences": {"gpu": "AMD"},
+        "use_case": "gaming"
+    }
+    """
+    try:
+        current_build, upgrades = await search_executor.recommend_upgrades(
+            request.part_ids, request.upgrade_budget, request.brand_preferences or {}, request.use_case
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    except SearchRejected:
+        raise HTTPException(status_code=503, detail="Too many recommendation requests, please try again shortly")
+    except SearchTimeout:
+        raise HTTPException(status_code=504, detail="Generating recommendations took too long, please try again")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error generating recommendations: {str(e)}")
+    
+    if not upgrades:
+        raise HTTPException(
+            status_code=404,
+            detail="No upgrades found within the upgrade budget and preferences"
+        )
+    
+    return UpgradeResponse(
+        upgrades=upgrades,
+        current_build=current_build,
+        message=f"Found {len(upgrades)} upgrade(s) for your {request.use_case} setup",
+        request_summary={
+            "part_ids": request.part_ids,
+            "upgrade_budget": request.upgrade_budget,
+            "brand_preferences": request.brand_preferences,
+            "use_case": request.use_case
+        }
+    )
+
+def _batch_item(index: int, request: BuildRequest, builds: List) -> BatchRecommendationItem:
+    """Batch result line of a request the engine found builds (or none) for"""
+    if not builds:
+        return BatchRecommendationItem(
+            index=index, status=404, error="No valid builds found within the specified budget and preferences"
+        )
+    return BatchRecommendationItem(index=index, status=200, result=_recommendation_response(request, builds))
+
+def _recommendation_response(request: BuildRequest, builds: List, exhaustive: bool = True) -> RecommendationResponse:
+    """Response to a build request, raising a 404 if no builds were found"""
+    if not builds:
+        raise HTTPException(
+            status_code=404,
+            detail="No valid builds found within the specified budget and preferences"
+        )
+    
+    # Create response
+    return RecommendationResponse(
+        builds=builds,
+        message=f"Found {len(builds)} optimized build(s) for your {request.use_case} setup",
+        request_summary={
+            "budget": request.budget,
+            "brand_preferences": request.brand_preferences,
+            "use_case": request.use_case
+        },
+        exhaustive=exhaustive
+    )
+
+@app.get("/metrics")
+async def get_metrics():
+    """Metrics in the Prometheus text format.
+    
+    Stage timings and search counts are recorded by the engine of this process,
+    so with BUILDMYRIG_SEARCH_EXECUTOR=process they only cover searches not run
+    in worker processes (frontier answers and cache hits).
+    """
+    return Response(content=REGISTRY.render(), media_type=REGISTRY.CONTENT_TYPE)
+
+@app.get("/cache/stats")
+async def get_cache_stats():
+    """Get recommendation cache hit/miss counters"""
+    return recommendation_cache.stats()
+
+@app.get("/search/stats")
+async def get_search_stats():
+    """Get recommendation search executor load and counters"""
+    return search_executor.stats()
 
 @app.get("/parts", response_model=List[PartResponse])
 async def get_all_parts():
@@ -118,7 +395,8 @@ async def get_parts_by_category(
     limit: int = 50, 
     offset: int = 0, 
     sort_by: str = "performance_score",
-    sort_order: str = "desc"
+    sort_order: str = "desc",
+    min_wattage: int = None
 ):
     """
     Get parts by category with optional brand filtering, pagination, and sorting.
@@ -126,6 +404,7 @@ async def get_parts_by_category(
     Categories: cpu, gpu, motherboard, ram, storage, psu, case
     Sort by: performance_score, price, name
     Sort order: asc, desc
+    min_wattage: only PSUs of at least this many watts
     """
     try:
         valid_categories = ["cpu", "gpu", "motherboard", "ram", "storage", "psu", "case"]
@@ -154,7 +433,7 @@ async def get_parts_by_category(
                 brand_tuple = (brand, "any")
         
         parts = db.get_parts_by_category_paginated(
-            category, brand_tuple, limit, offset, sort_by, sort_order
+            category, brand_tuple, limit, offset, sort_by, sort_order, min_wattage
         )
         
         if not parts:
@@ -174,28 +453,8 @@ async def get_parts_by_category(
 async def get_database_stats():
     """Get database statistics"""
     try:
-        all_parts = db.get_all_parts()
-        
-        # Count by category
-        category_counts = {}
-        brand_counts = {}
-        
-        for part in all_parts:
-            category = part["category"]
-            brand = part["brand"]
-            
-            category_counts[category] = category_counts.get(category, 0) + 1
-            brand_counts[brand] = brand_counts.get(brand, 0) + 1
-        
-        return {
-            "total_parts": len(all_parts),
-            "categories": category_counts,
-            "brands": brand_counts,
-            "price_range": {
-                "min": min(part["price"] for part in all_parts),
-                "max": max(part["price"] for part in all_parts)
-            }
-        }
+        # Computed from the catalog snapshot's columns, without building part dicts
+        return db.catalog().stats()
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error fetching stats: {str(e)}")
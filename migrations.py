@@ -0,0 +1,90 @@
+import sqlite3
+import json
+
+from compatibility import COMPATIBILITY_COLUMNS, compatibility_column_values
+
+def add_compatibility_columns(conn: sqlite3.Connection):
+    """Add the typed compatibility columns the parts table does not have yet"""
+    existing = {row[1] for row in conn.execute("PRAGMA table_info(parts)")}
+    for column, column_type in COMPATIBILITY_COLUMNS.items():
+        if column not in existing:
+            conn.execute(f"ALTER TABLE parts ADD COLUMN {column} {column_type}")
+
+def backfill_compatibility_columns(conn: sqlite3.Connection):
+    """Fill the typed compatibility columns of parts inserted without them from their compatibility_tags"""
+    # Such rows have none of the columns set
+    query = "SELECT id, category, compatibility_tags FROM parts WHERE " + " AND ".join(
+        f"{column} IS NULL" for column in COMPATIBILITY_COLUMNS
+    )
+
+    columns = list(COMPATIBILITY_COLUMNS)
+    updates = []
+    for part_id, category, tags in conn.execute(query).fetchall():
+        values = compatibility_column_values(category, json.loads(tags))
+        updates.append([values[column] for column in columns] + [part_id])
+
+    assignments = ", ".join(f"{column} = ?" for column in columns)
+    conn.executemany(f"UPDATE parts SET {assignments} WHERE id = ?", updates)
+
+def add_source_key_column(conn: sqlite3.Connection):
+    """Add the parts column holding the key of each part's CSV row, if it does not have it yet"""
+    existing = {row[1] for row in conn.execute("PRAGMA table_info(parts)")}
+    if "source_key" not in existing:
+        conn.execute("ALTER TABLE parts ADD COLUMN source_key TEXT")
+
+# Schema migrations, applied in order. The database's PRAGMA user_version is the
+# version of the last migration applied to it, so each one runs exactly once.
+# Steps are SQL statements or functions taking the connection.
+SCHEMA_MIGRATIONS = [
+    (1, "Indexes for the parts and frontier queries", [
+        # /parts/{category} sorting and the per-category parts lookup
+        "CREATE INDEX IF NOT EXISTS idx_parts_category_performance ON parts (category, performance_score)",
+        "CREATE INDEX IF NOT EXISTS idx_parts_category_price ON parts (category, price)",
+        "CREATE INDEX IF NOT EXISTS idx_parts_category_name ON parts (category, name)",
+        # Brand preferences: hardware_brand for CPUs and GPUs, brand for everything else
+        "CREATE INDEX IF NOT EXISTS idx_parts_category_hardware_brand ON parts (category, hardware_brand, performance_score)",
+        "CREATE INDEX IF NOT EXISTS idx_parts_category_brand ON parts (category, brand, performance_score)",
+        "CREATE INDEX IF NOT EXISTS idx_build_frontier_use_case ON build_frontier (use_case, total_price)",
+    ]),
+    (2, "Typed compatibility columns", [
+        add_compatibility_columns,
+        backfill_compatibility_columns,
+        "CREATE INDEX IF NOT EXISTS idx_parts_category_wattage ON parts (category, wattage)",
+        "CREATE INDEX IF NOT EXISTS idx_parts_category_socket ON parts (category, socket)",
+    ]),
+    (3, "Source keys for upserting reloaded parts", [
+        add_source_key_column,
+        "CREATE UNIQUE INDEX IF NOT EXISTS idx_parts_category_source_key ON parts (category, source_key)",
+    ]),
+]
+
+def get_schema_version(conn: sqlite3.Connection) -> int:
+    """Get the version of the last migration applied to the database"""
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+def reset_schema_version(conn: sqlite3.Connection):
+    """Mark the schema as unmigrated, e.g. after the parts table has been recreated"""
+    conn.execute("PRAGMA user_version = 0")
+
+def apply_migrations(conn: sqlite3.Connection, commit: bool = True) -> int:
+    """Apply the migrations the database has not had yet and return its new version.
+    
+    With commit=False they become part of the caller's transaction instead of each
+    being committed.
+    """
+    version = get_schema_version(conn)
+    for migration_version, description, statements in SCHEMA_MIGRATIONS:
+        if migration_version <= version:
+            continue
+        print(f"Applying schema migration {migration_version}: {description}")
+        for statement in statements:
+            if callable(statement):
+                statement(conn)
+            else:
+                conn.execute(statement)
+        # PRAGMA does not take parameters; the version is always one of the integers above
+        conn.execute(f"PRAGMA user_version = {int(migration_version)}")
+        if commit:
+            conn.commit()
+        version = migration_version
+    return version
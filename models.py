@@ -5,6 +5,7 @@ class BuildRequest(BaseModel):
     budget: float = Field(..., gt=0, description="Budget in USD")
     brand_preferences: Optional[Dict[str, str]] = Field(default={}, description="Brand preferences by component type")
     use_case: str = Field(..., description="Use case: gaming, workstation, etc.")
+    max_latency_ms: Optional[float] = Field(default=None, gt=0, description="Return the best builds found within this many milliseconds")
 
 class PartResponse(BaseModel):
     id: int
@@ -29,3 +30,46 @@ class RecommendationResponse(BaseModel):
     builds: List[BuildResponse]
     message: str
     request_summary: Dict
+    exhaustive: bool = Field(default=True, description="False if the search was cut short by max_latency_ms")
+
+class BatchRecommendationItem(BaseModel):
+    index: int = Field(..., description="Position of the request in the batch")
+    status: int = Field(..., description="HTTP status the request would have had on its own")
+    result: Optional[RecommendationResponse] = None
+    error: Optional[str] = None
+
+class CurveRequest(BaseModel):
+    brand_preferences: Optional[Dict[str, str]] = Field(default={}, description="Brand preferences by component type")
+    use_case: str = Field(..., description="Use case: gaming, workstation, etc.")
+    min_budget: float = Field(default=500, gt=0, description="Lowest budget of the curve in USD")
+    max_budget: float = Field(default=5000, gt=0, description="Highest budget of the curve in USD")
+    step: float = Field(default=50, gt=0, description="Budget increment between points in USD")
+
+class CurvePoint(BaseModel):
+    budget: float
+    build: Optional[BuildResponse] = Field(default=None, description="Best build at this budget, if any fits")
+
+class CurveResponse(BaseModel):
+    points: List[CurvePoint]
+    distinct_builds: int
+    message: str
+    request_summary: Dict
+
+class UpgradeRequest(BaseModel):
+    part_ids: List[int] = Field(..., description="Ids of the parts of the existing build, one per component type")
+    upgrade_budget: float = Field(..., gt=0, description="Most to spend on new parts in USD")
+    brand_preferences: Optional[Dict[str, str]] = Field(default={}, description="Brand preferences for new parts by component type")
+    use_case: str = Field(..., description="Use case: gaming, workstation, etc.")
+
+class UpgradeOption(BaseModel):
+    replaced: List[PartResponse]
+    added: List[PartResponse]
+    cost: float
+    performance_gain: float
+    build: BuildResponse
+
+class UpgradeResponse(BaseModel):
+    upgrades: List[UpgradeOption]
+    current_build: BuildResponse
+    message: str
+    request_summary: Dict
@@ -0,0 +1,107 @@
+import math
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple, Callable, Any
+
+class RecommendationCache:
+    """In-process LRU cache of recommendations with a size limit and time to live.
+
+    Entries are keyed on (budget bucket, brand preferences, use case, catalog
+    version), and every entry is dropped as soon as a newer catalog version is
+    seen, so a reloaded catalog never serves stale builds. Requests still on an
+    older version than the newest seen neither read nor write the cache.
+    """
+
+    def __init__(self, max_entries: int = 1024, ttl_seconds: float = 300.0, budget_bucket_size: float = 1.0,
+                 clock: Callable[[], float] = time.monotonic):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.budget_bucket_size = budget_bucket_size
+        self.clock = clock
+        self._entries = OrderedDict()
+        self._catalog_version = None
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def budget_bucket(self, budget: float) -> float:
+        """Round a budget down to its bucket.
+
+        Recommendations are computed for the bucket's budget, so they always fit
+        every budget in the bucket.
+        """
+        bucket = math.floor(budget / self.budget_bucket_size) * self.budget_bucket_size
+        # Budgets below the first bucket are their own bucket
+        return bucket if bucket > 0 else budget
+
+    def make_key(self, budget: float, brand_preferences: Optional[Dict[str, str]], use_case: str,
+                 catalog_version: int) -> Tuple:
+        """Cache key for a request; preferences the engine ignores (empty values) are left out"""
+        preferences = tuple(sorted(
+            (category, brand) for category, brand in (brand_preferences or {}).items() if brand
+        ))
+        return (self.budget_bucket(budget), preferences, use_case.lower(), catalog_version)
+
+    def get(self, key: Tuple) -> Optional[Any]:
+        """Cached value for key, or None if missing or expired"""
+        with self._lock:
+            entry = self._entries.get(key) if self._check_catalog_version(key[-1]) else None
+            if entry is None:
+                self.misses += 1
+                return None
+
+            stored_at, value = entry
+            if self.clock() - stored_at > self.ttl_seconds:
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: Tuple, value: Any):
+        """Store a value, evicting the least recently used entries over the size limit"""
+        with self._lock:
+            # A slow request computed on an older catalog must not replace the newer entries
+            if not self._check_catalog_version(key[-1]):
+                return
+            self._entries[key] = (self.clock(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        """Drop every cached entry"""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Counters describing how well the cache is doing"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "size": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "catalog_version": self._catalog_version
+            }
+
+    def _check_catalog_version(self, catalog_version: int) -> bool:
+        """Invalidate everything once the catalog has been reloaded; False for an older catalog version"""
+        if self._catalog_version is not None and catalog_version < self._catalog_version:
+            return False
+        if catalog_version != self._catalog_version:
+            self._entries.clear()
+            self._catalog_version = catalog_version
+        return True
@@ -1,55 +1,377 @@
 from typing import List, Dict, Optional, Tuple
-from itertools import product
+from collections import namedtuple
+from contextlib import nullcontext
+import heapq
 import json
-from database import Database
-from models import BuildResponse, PartResponse
+import time
+from database import Database, load_specifications
+from models import BuildResponse, PartResponse, UpgradeOption
+from compatibility import CompatibilityIndex, DDR4_ONLY_SOCKETS, CASE_FORM_FACTOR_COMPATIBILITY
+from frontier import BuildFrontier
+from metrics import STAGE_SECONDS, SEARCH_CANDIDATES, SEARCH_NODES_VISITED, SEARCH_BUILDS_FOUND, SEARCHES_CUT_SHORT
+
+# A build found by the search, kept as references to the part dicts until it is
+# known to be one of the recommendations returned
+CandidateBuild = namedtuple("CandidateBuild", ["score", "total_price", "performance_score", "parts"])
+
+# Nodes a deadline-bound search visits between checks of the clock
+DEADLINE_CHECK_INTERVAL = 64
+
+class SearchStats:
+    """Counters describing the work done by a single build search"""
+    def __init__(self):
+        self.nodes_visited = 0
+        self.nodes_pruned = 0
+        self.incompatible = 0
+        self.builds_found = 0
+        # False if the search was stopped at its deadline before it was complete
+        self.exhaustive = True
+
+    def to_dict(self) -> Dict[str, int]:
+        return {
+            "nodes_visited": self.nodes_visited,
+            "nodes_pruned": self.nodes_pruned,
+            "incompatible": self.incompatible,
+            "builds_found": self.builds_found,
+            "exhaustive": self.exhaustive
+        }
+
+class DeadlineReached(Exception):
+    """Raised inside a build search to unwind it once its deadline has passed"""
 
 class RecommendationEngine:
-    def __init__(self, database: Database):
+    SEARCH_MODES = ("branch_and_bound", "vectorized")
+    
+    def __init__(self, database: Database, search_mode: str = "branch_and_bound", use_frontier: bool = False):
+        if search_mode not in self.SEARCH_MODES:
+            raise ValueError(f"Unknown search mode '{search_mode}'. Must be one of: {', '.join(self.SEARCH_MODES)}")
         self.db = database
+        self.search_mode = search_mode
         self.required_categories = ["cpu", "gpu", "motherboard", "ram", "storage", "psu", "case"]
+        # Categories are searched in order of how tightly they are constrained by
+        # the parts already chosen (socket, then RAM type, then PSU and case fit)
+        self.search_order = ["cpu", "motherboard", "ram", "gpu", "psu", "case", "storage"]
+        # Rules making up _check_compatibility and the categories each one involves
+        self.compatibility_rules = [
+            (("cpu", "motherboard"), self._check_socket_compatibility),
+            (("motherboard", "ram"), self._check_ram_compatibility),
+            (("cpu", "gpu", "psu"), self._check_power_compatibility),
+            (("motherboard", "gpu", "case"), self._check_case_compatibility),
+        ]
+        self.max_combinations_per_category = 20
+        self.max_recommendations = 3
+        self.max_upgrades = 5
+        self.last_search_stats = SearchStats()
+        # (catalog version, index) for the catalog the index was built from
+        self._compatibility_index = (None, None)
+        self._vectorized_search = None
+        if search_mode == "vectorized":
+            # NumPy is only needed for the vectorized backend
+            from vectorized_search import VectorizedBuildSearch
+            self._vectorized_search = VectorizedBuildSearch(self.search_order, self.max_recommendations)
+        # Precomputed builds answer requests without searching, when they can
+        self.frontier = BuildFrontier(database) if use_frontier else None
         
     def get_recommendations(self, budget: float, brand_preferences: Dict[str, str], use_case: str) -> List[BuildResponse]:
         """Generate optimized PC build recommendations"""
+        return self.get_recommendations_for_budgets([budget], brand_preferences, use_case)[0]
+    
+    def get_recommendations_for_budgets(self, budgets: List[float], brand_preferences: Dict[str, str],
+                                        use_case: str) -> List[List[BuildResponse]]:
+        """Recommendations for each of several budgets with the same brand preferences and use case.
+        
+        The candidate parts are fetched, filtered by brand and scored for the use
+        case once, then searched for every budget the frontier cannot answer.
+        Repeated budgets are only searched once.
+        """
+        recommendations = {}
+        parts_by_category = None
+        for budget in budgets:
+            if budget in recommendations:
+                continue
+            
+            recommendations[budget] = self._frontier_recommendations(budget, brand_preferences, use_case)
+            if recommendations[budget] is not None:
+                continue
+            
+            if parts_by_category is None:
+                parts_by_category = self._candidate_parts(brand_preferences, use_case)
+            
+            # Search for the best valid combinations within budget
+            candidates = self._generate_valid_builds(parts_by_category, budget, use_case)
+            recommendations[budget] = self._recommendations_from(candidates)
+        
+        return [recommendations[budget] for budget in budgets]
+    
+    def get_recommendations_anytime(self, budget: float, brand_preferences: Dict[str, str], use_case: str,
+                                    deadline: float) -> Tuple[List[BuildResponse], bool]:
+        """Recommendations found by the deadline (a time.monotonic() value), and whether the search was exhaustive.
+        
+        A search still running at the deadline is cut short and its best builds
+        so far are returned. Frontier answers and the vectorized backend are
+        always exhaustive.
+        """
+        recommendations = self._frontier_recommendations(budget, brand_preferences, use_case)
+        if recommendations is not None:
+            return recommendations, True
+        
+        parts_by_category = self._candidate_parts(brand_preferences, use_case)
+        stats = SearchStats()
+        candidates = self._generate_valid_builds(parts_by_category, budget, use_case, deadline=deadline, stats=stats)
+        return self._recommendations_from(candidates), stats.exhaustive
+    
+    def _frontier_recommendations(self, budget: float, brand_preferences: Dict[str, str],
+                                  use_case: str) -> Optional[List[BuildResponse]]:
+        """Recommendations from the frontier, or None if there is none or it cannot answer"""
+        if self.frontier is None:
+            return None
+        with STAGE_SECONDS.time(stage="frontier_lookup"):
+            frontier_builds = self.frontier.lookup(self, budget, brand_preferences, use_case)
+        if frontier_builds is None:
+            return None
+        with STAGE_SECONDS.time(stage="build_responses"):
+            return [self._create_build_response(parts) for _, _, _, parts in frontier_builds]
+    
+    def _recommendations_from(self, candidates: List[CandidateBuild]) -> List[BuildResponse]:
+        """Response models of the top diverse builds of a search"""
+        # Ensure we have diverse builds by filtering out very similar ones
+        with STAGE_SECONDS.time(stage="diversity"):
+            diverse_builds = self._ensure_build_diversity(candidates)
+        
+        # Only the final recommendations are turned into response models
+        with STAGE_SECONDS.time(stage="build_responses"):
+            return [
+                self._create_build_response(candidate.parts) for candidate in diverse_builds[:self.max_recommendations]
+            ]
+    
+    def get_recommendation_curve(self, budgets: List[float], brand_preferences: Dict[str, str],
+                                 use_case: str) -> List[Optional[BuildResponse]]:
+        """Best build at each budget (None where nothing fits), from one sweep up through the budgets.
+        
+        Candidates are fetched and scored once. Each budget the frontier cannot
+        answer is searched starting from the best build found for a lower
+        budget, when its parts are still candidates, so the search only has to
+        look for builds beating it. Steps where the best build stays the same
+        are mostly pruned straight away, and each distinct build is only turned
+        into a response once.
+        """
+        curve = {}
+        responses = {}
+        parts_by_category = None
+        incumbent = None
+        for budget in sorted(set(budgets)):
+            parts = None
+            if self.frontier is not None:
+                frontier_builds = self.frontier.lookup(self, budget, brand_preferences, use_case)
+                if frontier_builds is not None:
+                    parts = frontier_builds[0][3]
+            
+            if parts is None:
+                if parts_by_category is None:
+                    parts_by_category = self._candidate_parts(brand_preferences, use_case)
+                candidates = self._generate_valid_builds(parts_by_category, budget, use_case,
+                                                         max_results=1, incumbent=incumbent)
+                if candidates:
+                    incumbent = candidates[0]
+                    parts = incumbent.parts
+            
+            if parts is None:
+                curve[budget] = None
+                continue
+            key = tuple(part["id"] for part in parts.values())
+            if key not in responses:
+                responses[key] = self._create_build_response(parts)
+            curve[budget] = responses[key]
+        
+        return [curve[budget] for budget in budgets]
+    
+    def get_upgrade_recommendations(self, part_ids: List[int], upgrade_budget: float, brand_preferences: Dict[str, str],
+                                    use_case: str) -> Tuple[BuildResponse, List[UpgradeOption]]:
+        """Best upgrades of an existing build replacing one or two parts, costing at most upgrade_budget.
+        
+        part_ids must be a compatible build with one part of each required
+        category. Upgrades are ranked by the performance they add, then by what
+        they cost. Only the change in price and performance of the swapped parts
+        is scored, and only the compatibility rules involving them are checked,
+        so nothing else of the build is searched again. Raises ValueError for
+        an invalid existing build.
+        """
+        current = self._current_build(part_ids, use_case)
+        index = self._get_compatibility_index()
+        for categories, _ in self.compatibility_rules:
+            if not index.rule_fits(categories, current):
+                raise ValueError(f"The existing build's {' / '.join(categories)} parts are not compatible")
+        
+        # Candidates per category as (performance gain, price, part), biggest gain first and cheapest among equals
+        parts_by_category = self._candidate_parts(brand_preferences, use_case)
+        candidates = {}
+        for category in self.required_categories:
+            current_part = current[category]
+            candidates[category] = sorted(
+                (
+                    (part["performance_score"] - current_part["performance_score"], part["price"], part)
+                    for part in parts_by_category[category]
+                    if part["id"] != current_part["id"] and 0 < part["price"] <= upgrade_budget
+                ),
+                key=lambda candidate: (-candidate[0], candidate[1])
+            )
+        
+        # Rules checked per swap: those involving a swapped part; the rest of the build is unchanged.
+        # Candidates are only checked once the search reaches them, each at most once per set of rules
+        rules_by_category = {
+            category: tuple(categories for categories, _ in self.compatibility_rules if category in categories)
+            for category in self.required_categories
+        }
+        build = dict(current)
+        fits_cache = {}
+        
+        def fits(category: str, part: Dict, rules: Tuple) -> bool:
+            """Whether a part passes rules in place of the current part, with build otherwise as it is"""
+            cache = fits_cache.setdefault((category, rules), {})
+            result = cache.get(part["id"])
+            if result is None:
+                replaced = build[category]
+                build[category] = part
+                result = (self._check_part_minimum_requirements(category, part) and
+                          all(index.rule_fits(categories, build) for categories in rules))
+                build[category] = replaced
+                cache[part["id"]] = result
+            return result
+        
+        # Bounded min-heap of ((gain, -cost, -parts swapped), -sequence, swapped parts) of the best
+        # upgrades so far; ties go to fewer swapped parts, then to the upgrade found first
+        top_upgrades = []
+        found = [0]
+        
+        def offer(gain: float, cost: float, swapped: Dict[str, Dict]):
+            found[0] += 1
+            entry = ((gain, -cost, -len(swapped)), -found[0], swapped)
+            if len(top_upgrades) < self.max_upgrades:
+                heapq.heappush(top_upgrades, entry)
+            elif entry > top_upgrades[0]:
+                heapq.heapreplace(top_upgrades, entry)
+        
+        def threshold() -> float:
+            """Gain an upgrade has to reach to still make the list"""
+            return top_upgrades[0][0][0] if len(top_upgrades) >= self.max_upgrades else float("-inf")
+        
+        def beaten(gain: float, cost: float, parts: int) -> bool:
+            """Whether an upgrade is no better than the worst one on a full list"""
+            return len(top_upgrades) >= self.max_upgrades and (gain, -cost, -parts) <= top_upgrades[0][0]
+        
+        # Every single swap that can make the list; candidates come biggest gain first and
+        # cheapest among equals, so the first one beaten by the list ends the category
+        for category in self.required_categories:
+            for gain, price, part in candidates[category]:
+                if gain <= 0 or beaten(gain, price, 1):
+                    break
+                if fits(category, part, rules_by_category[category]):
+                    offer(gain, price, {category: part})
+        
+        # Every pairing of a part with a part of a later category that can make the list
+        for first_position, first in enumerate(self.required_categories):
+            for second in self.required_categories[first_position + 1:]:
+                if not candidates[first] or not candidates[second]:
+                    continue
+                shared = tuple(rule for rule in rules_by_category[first] if second in rule)
+                first_rules = tuple(rule for rule in rules_by_category[first] if rule not in shared)
+                second_rules = tuple(rule for rule in rules_by_category[second] if rule not in shared)
+                best_second_gain = candidates[second][0][0]
+                
+                for first_gain, first_price, first_part in candidates[first]:
+                    if first_gain + best_second_gain <= 0 or first_gain + best_second_gain < threshold():
+                        break
+                    if not fits(first, first_part, first_rules):
+                        continue
+                    build[first] = first_part
+                    # Whether the first part fits without the second one, i.e. the second is optional
+                    first_alone = all(index.rule_fits(categories, build) for categories in shared)
+                    
+                    for second_gain, second_price, second_part in candidates[second]:
+                        gain = first_gain + second_gain
+                        if gain <= 0 or beaten(gain, first_price + second_price, 2) or (first_alone and second_gain <= 0):
+                            break
+                        if first_price + second_price > upgrade_budget or not fits(second, second_part, second_rules):
+                            continue
+                        build[second] = second_part
+                        compatible = all(index.rule_fits(categories, build) for categories in shared)
+                        if compatible and first_gain <= 0:
+                            # A part that loses performance is only worth it if the other needs it
+                            build[first] = current[first]
+                            compatible = not all(index.rule_fits(categories, build) for categories in shared)
+                            build[first] = first_part
+                        build[second] = current[second]
+                        if compatible:
+                            offer(gain, first_price + second_price, {first: first_part, second: second_part})
+                    build[first] = current[first]
+        
+        upgrades = []
+        for (gain, cost, _), _, swapped in sorted(top_upgrades, reverse=True):
+            upgraded = {category: swapped.get(category, part) for category, part in current.items()}
+            upgrades.append(UpgradeOption(
+                replaced=[self._create_part_response(current[category]) for category in swapped],
+                added=[self._create_part_response(part) for part in swapped.values()],
+                cost=round(-cost, 2),
+                performance_gain=gain,
+                build=self._create_build_response(upgraded)
+            ))
+        return self._create_build_response(current), upgrades
+    
+    def _current_build(self, part_ids: List[int], use_case: str) -> Dict[str, Dict]:
+        """Parts of an existing build by category, scored for the use case like candidates are"""
+        parts = self.db.catalog().get_parts_by_ids(part_ids)
+        missing = sorted(set(part_ids) - {part["id"] for part in parts})
+        if missing:
+            raise ValueError(f"Unknown part ids: {', '.join(str(part_id) for part_id in missing)}")
         
-        # Get filtered parts for each category
         parts_by_category = {}
+        for part in parts:
+            parts_by_category.setdefault(part["category"], []).append(part)
         for category in self.required_categories:
-            brand_pref = brand_preferences.get(category)
-            # Convert brand preference to tuple format (brand, hardware_brand)
-            if brand_pref:
-                if category in ["cpu", "gpu"]:
-                    # For CPU and GPU, use hardware_brand for filtering
-                    brand_tuple = ("any", brand_pref)
-                else:
-                    # For other categories, use brand for filtering
-                    brand_tuple = (brand_pref, "any")
-            else:
-                brand_tuple = None
-            parts_by_category[category] = self.db.get_parts_by_category(category, brand_tuple)
+            if len(parts_by_category.get(category, [])) != 1:
+                raise ValueError(f"The existing build needs exactly one {category}, "
+                                 f"got {len(parts_by_category.get(category, []))}")
+        if len(parts) != len(self.required_categories):
+            raise ValueError(f"The existing build may only contain {', '.join(self.required_categories)} parts")
         
-        # Apply use case filtering and scoring adjustments
         parts_by_category = self._apply_use_case_filtering(parts_by_category, use_case)
+        return {category: parts_by_category[category][0] for category in self.required_categories}
+    
+    def _candidate_parts(self, brand_preferences: Dict[str, str], use_case: str) -> Dict[str, List[Dict]]:
+        """Parts of each category matching the brand preferences, scored for the use case"""
+        # Get filtered parts for each category, all from the same catalog snapshot
+        with STAGE_SECONDS.time(stage="fetch_parts"):
+            catalog = self.db.catalog()
+            parts_by_category = {}
+            for category in self.required_categories:
+                brand_pref = brand_preferences.get(category)
+                # Convert brand preference to tuple format (brand, hardware_brand)
+                if brand_pref:
+                    if category in ["cpu", "gpu"]:
+                        # For CPU and GPU, use hardware_brand for filtering
+                        brand_tuple = ("any", brand_pref)
+                    else:
+                        # For other categories, use brand for filtering
+                        brand_tuple = (brand_pref, "any")
+                else:
+                    brand_tuple = None
+                # Specifications are only decoded for the parts that end up in a response
+                parts_by_category[category] = catalog.get_parts_by_category(category, brand_tuple,
+                                                                            decode_specifications=False)
         
-        # Generate all possible combinations within budget
-        valid_builds = self._generate_valid_builds(parts_by_category, budget, use_case)
-        
-        # Sort by performance with emphasis on using more of the budget
-        def build_score(build):
-            performance_weight = 0.6
-            budget_utilization_weight = 0.4
-            
-            normalized_performance = build.performance_score / 1000
-            budget_utilization = build.total_price / budget
-            
-            return (normalized_performance * performance_weight) + (budget_utilization * budget_utilization_weight)
-
-        valid_builds.sort(key=build_score, reverse=True)
+        # Apply use case filtering and scoring adjustments
+        with STAGE_SECONDS.time(stage="use_case_filtering"):
+            return self._apply_use_case_filtering(parts_by_category, use_case)
+    
+    def _build_score(self, performance_score: float, total_price: float, budget: float) -> float:
+        """Score a build by performance with emphasis on using more of the budget"""
+        performance_weight = 0.6
+        budget_utilization_weight = 0.4
         
-        # Ensure we have diverse builds by filtering out very similar ones
-        diverse_builds = self._ensure_build_diversity(valid_builds)
+        normalized_performance = performance_score / 1000
+        budget_utilization = total_price / budget
         
-        return diverse_builds[:3]
+        return (normalized_performance * performance_weight) + (budget_utilization * budget_utilization_weight)
     
     def _apply_use_case_filtering(self, parts_by_category: Dict, use_case: str) -> Dict:
         """Apply use case specific filtering and scoring adjustments"""
@@ -80,16 +402,39 @@ class RecommendationEngine:
         
         return parts_by_category
     
-    def _generate_valid_builds(self, parts_by_category: Dict, budget: float, use_case: str) -> List[BuildResponse]:
-        """Generate all valid build combinations within budget"""
-        valid_builds = []
+    def _generate_valid_builds(self, parts_by_category: Dict, budget: float, use_case: str,
+                               max_results: Optional[int] = None,
+                               incumbent: Optional[CandidateBuild] = None,
+                               deadline: Optional[float] = None,
+                               stats: Optional[SearchStats] = None,
+                               record_metrics: bool = True) -> List[CandidateBuild]:
+        """Search for the best valid build combinations within budget using branch and bound.
+        
+        Returns the best build for each of the top max_results (default
+        max_recommendations) CPU/GPU pairs, best first. An incumbent, a build
+        found for another budget, seeds the search if it fits this budget and
+        its parts are among this budget's candidates, so only builds beating it
+        are searched for.
         
+        With a deadline (a time.monotonic() value) the search is anytime. It
+        already tries the parts with the highest bound, best performance,
+        first, so at the deadline the best builds found so far are returned,
+        with exhaustive set to False in the stats (last_search_stats, unless
+        stats to fill in are passed).
+        
+        Searches not made for a request, like frontier rebuilds, pass
+        record_metrics=False to stay out of the stage and search metrics.
+        """
+        if max_results is None:
+            max_results = self.max_recommendations
+        if stats is None:
+            stats = SearchStats()
+        self.last_search_stats = stats
+        
+        start = time.perf_counter()
         # Filter parts by budget constraints (rough filtering)
         filtered_parts = self._filter_by_budget_constraints(parts_by_category, budget, use_case)
         
-        # Generate combinations (limited to prevent explosion)
-        max_combinations_per_category = 6  # Reduced for better performance
-        
         for category in filtered_parts:
             # Sort by a weighted combination of performance and value
             def calculate_weighted_score(part):
@@ -106,44 +451,242 @@ class RecommendationEngine:
                 return weighted_score
             
             filtered_parts[category].sort(key=calculate_weighted_score, reverse=True)
-            filtered_parts[category] = filtered_parts[category][:max_combinations_per_category]
+            filtered_parts[category] = filtered_parts[category][:self.max_combinations_per_category]
+        if record_metrics:
+            STAGE_SECONDS.observe(time.perf_counter() - start, stage="budget_filtering")
+            for category in self.required_categories:
+                SEARCH_CANDIDATES.observe(len(filtered_parts.get(category, [])), category=category)
+        
+        with STAGE_SECONDS.time(stage="search") if record_metrics else nullcontext():
+            candidates = self._search_builds(filtered_parts, budget, max_results, incumbent, deadline, stats)
+        if record_metrics:
+            SEARCH_NODES_VISITED.observe(stats.nodes_visited)
+            SEARCH_BUILDS_FOUND.observe(stats.builds_found)
+            if not stats.exhaustive:
+                SEARCHES_CUT_SHORT.inc()
+        return candidates
+    
+    def _search_builds(self, filtered_parts: Dict, budget: float, max_results: int,
+                       incumbent: Optional[CandidateBuild], deadline: Optional[float],
+                       stats: SearchStats) -> List[CandidateBuild]:
+        """Branch and bound over the budget-filtered candidates, see _generate_valid_builds"""
+        if any(category not in filtered_parts for category in self.required_categories):
+            return []
+        
+        # _build_score splits into a performance term and a budget utilisation term,
+        # so the score of a build is the sum of its parts' contributions
+        performance_weight = 0.6 / 1000
+        price_weight = 0.4 / budget
+        
+        # Candidates per search level as (performance, price, part), best performance first,
+        # with parts that can never satisfy the minimum requirements removed up front
+        levels = []
+        for category in self.search_order:
+            candidates = [
+                (part["performance_score"], part["price"], part)
+                for part in filtered_parts[category]
+                if self._check_part_minimum_requirements(category, part)
+            ]
+            if not candidates:
+                return []
+            candidates.sort(key=lambda candidate: candidate[0], reverse=True)
+            levels.append(candidates)
+        
+        index = self._get_compatibility_index()
+        if self._vectorized_search is not None:
+            return self._generate_valid_builds_vectorized(levels, index, budget, stats, max_results)
+        
+        # Suffix bounds for completing a build from each level: cheapest total price,
+        # highest total performance and highest total price
+        depth_count = len(self.search_order)
+        min_price_after = [0.0] * (depth_count + 1)
+        max_performance_after = [0.0] * (depth_count + 1)
+        max_price_after = [0.0] * (depth_count + 1)
+        for depth in range(depth_count - 1, -1, -1):
+            min_price_after[depth] = min_price_after[depth + 1] + min(c[1] for c in levels[depth])
+            max_performance_after[depth] = max_performance_after[depth + 1] + levels[depth][0][0]
+            max_price_after[depth] = max_price_after[depth + 1] + max(c[1] for c in levels[depth])
+        
+        # Compatible candidates for a level depend only on a few attributes of the parts
+        # chosen before it, so each distinct key is resolved once and then reused
+        compatible_cache = [{} for _ in self.search_order]
+        
+        def compatible_candidates(depth: int) -> List:
+            category = self.search_order[depth]
+            if category == "motherboard":
+                key = index.motherboard_key(build["cpu"])
+            elif category == "ram":
+                key = index.ram_key(build["motherboard"])
+            elif category == "psu":
+                key = index.required_psu_wattage(build["cpu"], build["gpu"])
+            elif category == "case":
+                key = index.case_key(build["motherboard"], build["gpu"])
+            else:
+                return levels[depth]
+            
+            compatible = compatible_cache[depth].get(key)
+            if compatible is None:
+                if category == "ram":
+                    compatible = [c for c in levels[depth] if index.ram_fits(c[2], key)]
+                else:
+                    # The index lists the compatible parts of the whole catalog; candidates keep their performance order
+                    if category == "motherboard":
+                        allowed = set(index.motherboards_by_socket.get(key, ()))
+                    elif category == "psu":
+                        allowed = index.adequate_psus(key)
+                    else:
+                        allowed = index.fitting_cases(key)
+                    compatible = [c for c in levels[depth] if c[2]["id"] in allowed]
+                compatible_cache[depth][key] = compatible
+            stats.incompatible += len(levels[depth]) - len(compatible)
+            return compatible
+        
+        build = {}
+        # Best score found for each (cpu, gpu) pair; only the best distinct pairs survive diversity
+        best_by_pair = {}
+        # Bounded min-heap of (score, -sequence, pair, candidate) holding the best build of
+        # the top pairs, so its smallest score is the bar every branch has to beat
+        top_builds = []
+        threshold = [float("-inf")]
+        
+        if incumbent is not None and incumbent.total_price <= budget:
+            candidate_parts = {
+                category: {candidate[2]["id"]: candidate[2] for candidate in levels[depth]}
+                for depth, category in enumerate(self.search_order)
+            }
+            parts = {category: candidate_parts[category].get(part["id"]) for category, part in incumbent.parts.items()}
+            if all(parts.values()):
+                score = self._build_score(incumbent.performance_score, incumbent.total_price, budget)
+                pair = (parts["cpu"]["id"], parts["gpu"]["id"])
+                best_by_pair[pair] = score
+                top_builds.append((score, 0, pair, CandidateBuild(score, incumbent.total_price,
+                                                                  incumbent.performance_score, parts)))
+                if len(top_builds) >= max_results:
+                    threshold[0] = score
         
-        # Generate build combinations
-        categories = list(filtered_parts.keys())
-        if len(categories) == len(self.required_categories):
-            for combination in product(*[filtered_parts[cat] for cat in categories]):
-                build_dict = {cat: part for cat, part in zip(categories, combination)}
+        def search(depth: int, price: float, performance: float):
+            stats.nodes_visited += 1
+            if (deadline is not None and stats.nodes_visited % DEADLINE_CHECK_INTERVAL == 0
+                    and time.monotonic() >= deadline):
+                raise DeadlineReached()
+            if depth == depth_count:
+                score = self._build_score(performance, price, budget)
+                pair = (build["cpu"]["id"], build["gpu"]["id"])
+                if score <= best_by_pair.get(pair, float("-inf")):
+                    return
+                best_by_pair[pair] = score
+                stats.builds_found += 1
+                
+                candidate = CandidateBuild(
+                    score, price, performance,
+                    {category: build[category] for category in self.required_categories}
+                )
+                entry = (score, -stats.builds_found, pair, candidate)
+                # An improved build for a pair already in the heap replaces it
+                for position, existing in enumerate(top_builds):
+                    if existing[2] == pair:
+                        top_builds[position] = entry
+                        heapq.heapify(top_builds)
+                        break
+                else:
+                    if len(top_builds) < max_results:
+                        heapq.heappush(top_builds, entry)
+                    elif entry > top_builds[0]:
+                        heapq.heapreplace(top_builds, entry)
+                if len(top_builds) >= max_results:
+                    threshold[0] = top_builds[0][0]
+                return
+            
+            category = self.search_order[depth]
+            for part_performance, part_price, part in compatible_candidates(depth):
+                # Remaining budget must still cover the cheapest parts of the remaining levels
+                if price + part_price + min_price_after[depth + 1] > budget:
+                    stats.nodes_pruned += 1
+                    continue
+                
+                # Best reachable score: every remaining level at its top performance while
+                # spending as much as the budget (or the priciest remaining parts) allows
+                best_performance = performance + part_performance + max_performance_after[depth + 1]
+                if best_performance * performance_weight + budget * price_weight <= threshold[0]:
+                    # Candidates are sorted by performance, so this bound fails for the rest too
+                    stats.nodes_pruned += 1
+                    break
+                best_price = price + part_price + max_price_after[depth + 1]
+                if best_price > budget:
+                    best_price = budget
+                upper_bound = best_performance * performance_weight + best_price * price_weight
+                if upper_bound <= threshold[0]:
+                    stats.nodes_pruned += 1
+                    continue
+                
+                # Once the CPU and GPU are fixed, only an improvement on that pair's best build matters
+                if "gpu" in build or category == "gpu":
+                    cpu_id = part["id"] if category == "cpu" else build["cpu"]["id"]
+                    gpu_id = part["id"] if category == "gpu" else build["gpu"]["id"]
+                    if upper_bound <= best_by_pair.get((cpu_id, gpu_id), float("-inf")):
+                        stats.nodes_pruned += 1
+                        continue
                 
-                # Check compatibility, budget, and minimum requirements
-                if (self._check_compatibility(build_dict) and 
-                    self._check_budget(build_dict, budget) and 
-                    self._check_minimum_requirements(build_dict)):
-                    build_response = self._create_build_response(build_dict)
-                    valid_builds.append(build_response)
-        
-        return valid_builds
+                build[category] = part
+                search(depth + 1, price + part_price, performance + part_performance)
+                del build[category]
+        
+        try:
+            search(0, 0.0, 0.0)
+        except DeadlineReached:
+            stats.exhaustive = False
+        return [entry[3] for entry in sorted(top_builds, reverse=True)]
+    
+    def _generate_valid_builds_vectorized(self, levels: List[List[Tuple]], index: CompatibilityIndex,
+                                          budget: float, stats: SearchStats, max_results: int) -> List[CandidateBuild]:
+        """Run the NumPy search backend over the prepared candidate levels"""
+        results = self._vectorized_search.search(levels, index, budget, self._build_score, stats, max_results)
+        
+        candidates = []
+        for score, total_price, performance, positions in results:
+            build = {category: levels[depth][position][2] for depth, (category, position) in enumerate(zip(self.search_order, positions))}
+            parts = {category: build[category] for category in self.required_categories}
+            candidates.append(CandidateBuild(score, total_price, performance, parts))
+        return candidates
+    
+    def _get_compatibility_index(self) -> CompatibilityIndex:
+        """Compatibility index for the current catalog, rebuilt when the catalog is reloaded"""
+        catalog = self.db.catalog()
+        index_version, index = self._compatibility_index
+        if index is None or index_version != catalog.version:
+            parts_by_category = {
+                category: catalog.get_parts_by_category(category, decode_specifications=False)
+                for category in self.required_categories
+            }
+            index = CompatibilityIndex(parts_by_category)
+            self._compatibility_index = (catalog.version, index)
+        return index
     
     def _check_minimum_requirements(self, build: Dict) -> bool:
         """Check if build meets minimum requirements"""
         try:
-            ram = build["ram"]
-            ram_capacity = self._get_ram_capacity(ram)
-            
-            # Minimum 8GB RAM requirement
-            if ram_capacity < 8:
-                return False
-            
-            # Check minimum storage size
-            storage = build["storage"]
-            storage_name = storage.get("name", "").lower()
+            return (self._check_part_minimum_requirements("ram", build["ram"]) and
+                    self._check_part_minimum_requirements("storage", build["storage"]))
+        except (KeyError, ValueError, TypeError):
+            return False
+    
+    def _check_part_minimum_requirements(self, category: str, part: Dict) -> bool:
+        """Check the minimum requirements that apply to a single part"""
+        try:
+            if category == "ram":
+                # Minimum 8GB RAM requirement
+                return self._get_ram_capacity(part) >= 8
             
-            # Ensure reasonable storage capacity (at least 240GB)
-            if "32gb" in storage_name or "64gb" in storage_name or "128gb" in storage_name:
-                return False
+            if category == "storage":
+                storage_name = part.get("name", "").lower()
+                
+                # Ensure reasonable storage capacity (at least 240GB)
+                if "32gb" in storage_name or "64gb" in storage_name or "128gb" in storage_name:
+                    return False
             
             return True
             
-        except (KeyError, ValueError, TypeError):
+        except (KeyError, ValueError, TypeError, AttributeError):
             return False
     
     def _get_ram_capacity(self, part: Dict) -> int:
@@ -279,82 +822,73 @@ class RecommendationEngine:
     def _check_compatibility(self, build: Dict) -> bool:
         """Check comprehensive compatibility between components"""
         try:
-            cpu = build["cpu"]
-            motherboard = build["motherboard"]
-            ram = build["ram"]
-            gpu = build["gpu"]
-            psu = build["psu"]
-            case = build["case"]
-            
-            # Check CPU-Motherboard socket compatibility
-            cpu_socket = cpu["compatibility_tags"].get("socket", "Unknown")
-            mb_socket = motherboard["compatibility_tags"].get("socket", "Unknown")
-            
-            if cpu_socket != mb_socket:
-                return False
-            
-            # Check RAM type compatibility (DDR4 vs DDR5)
-            ram_type = ram["compatibility_tags"].get("type", "DDR4")
-            
-            # AM5 and LGA1700 motherboards support DDR5, older sockets support DDR4
-            if mb_socket in ["AM5", "LGA1700"]:
-                # These can support both DDR4 and DDR5, but prefer DDR5
-                pass
-            elif mb_socket in ["AM4", "LGA1200", "LGA1151"]:
-                # These primarily support DDR4
-                if ram_type == "DDR5":
-                    return False
-            
-            # Check power supply wattage with safety margin
-            cpu_tdp = cpu["compatibility_tags"].get("tdp", 65)
-            gpu_power = gpu["compatibility_tags"].get("power", 150)
-            psu_wattage = psu["compatibility_tags"].get("wattage", 650)
-            
-            # Add overhead for other components (motherboard, RAM, storage, fans)
-            total_power_needed = cpu_tdp + gpu_power + 100  # 100W overhead
-            
-            # Require 20% headroom for PSU efficiency and aging
-            if psu_wattage < total_power_needed * 1.2:
-                return False
-            
-            # Check case form factor compatibility
-            mb_form_factor = motherboard["compatibility_tags"].get("form_factor", "ATX")
-            case_form_factor = case["compatibility_tags"].get("form_factor", "ATX")
-            
-            # Form factor compatibility matrix
-            compatible_combinations = {
-                "ATX": ["ATX", "Full Tower", "Mid Tower"],
-                "mATX": ["ATX", "mATX", "Full Tower", "Mid Tower", "Mini Tower"],
-                "Mini-ITX": ["ATX", "mATX", "Mini-ITX", "Full Tower", "Mid Tower", "Mini Tower", "Desktop"]
-            }
-            
-            if mb_form_factor not in compatible_combinations:
-                mb_form_factor = "ATX"  # Default fallback
-            
-            if case_form_factor not in compatible_combinations[mb_form_factor]:
-                return False
-            
-            # Check GPU length compatibility
-            gpu_length = gpu["compatibility_tags"].get("length", 280)
-            case_max_gpu_length = case["compatibility_tags"].get("max_gpu_length", 350)
-            
-            if gpu_length > case_max_gpu_length:
-                return False
-            
-            # Check RAM capacity compatibility
-            ram_capacity_str = ram["compatibility_tags"].get("capacity", "16GB")
-            ram_capacity = int(ram_capacity_str.replace("GB", ""))
-            mb_max_memory = motherboard["compatibility_tags"].get("max_memory", 128)
-            
-            if ram_capacity > mb_max_memory:
-                return False
-            
-            return True
+            return all(rule(build) for _, rule in self.compatibility_rules)
             
         except (KeyError, ValueError, TypeError) as e:
             print(f"Compatibility check error: {e}")
             return False
     
+    def _check_socket_compatibility(self, build: Dict) -> bool:
+        """Check CPU-Motherboard socket compatibility"""
+        cpu_socket = build["cpu"]["compatibility_tags"].get("socket", "Unknown")
+        mb_socket = build["motherboard"]["compatibility_tags"].get("socket", "Unknown")
+        
+        return cpu_socket == mb_socket
+    
+    def _check_ram_compatibility(self, build: Dict) -> bool:
+        """Check RAM type and capacity against the motherboard"""
+        motherboard = build["motherboard"]
+        ram = build["ram"]
+        mb_socket = motherboard["compatibility_tags"].get("socket", "Unknown")
+        
+        # Check RAM type compatibility (DDR4 vs DDR5)
+        ram_type = ram["compatibility_tags"].get("type", "DDR4")
+        
+        # AM5 and LGA1700 motherboards support DDR5, older sockets primarily support DDR4
+        if mb_socket in DDR4_ONLY_SOCKETS and ram_type == "DDR5":
+            return False
+        
+        # Check RAM capacity compatibility
+        ram_capacity_str = ram["compatibility_tags"].get("capacity", "16GB")
+        ram_capacity = int(ram_capacity_str.replace("GB", ""))
+        mb_max_memory = motherboard["compatibility_tags"].get("max_memory", 128)
+        
+        return ram_capacity <= mb_max_memory
+    
+    def _check_power_compatibility(self, build: Dict) -> bool:
+        """Check power supply wattage with safety margin"""
+        cpu_tdp = build["cpu"]["compatibility_tags"].get("tdp", 65)
+        gpu_power = build["gpu"]["compatibility_tags"].get("power", 150)
+        psu_wattage = build["psu"]["compatibility_tags"].get("wattage", 650)
+        
+        # Add overhead for other components (motherboard, RAM, storage, fans)
+        total_power_needed = cpu_tdp + gpu_power + 100  # 100W overhead
+        
+        # Require 20% headroom for PSU efficiency and aging
+        return psu_wattage >= total_power_needed * 1.2
+    
+    def _check_case_compatibility(self, build: Dict) -> bool:
+        """Check case form factor and GPU clearance"""
+        motherboard = build["motherboard"]
+        gpu = build["gpu"]
+        case = build["case"]
+        
+        # Check case form factor compatibility
+        mb_form_factor = motherboard["compatibility_tags"].get("form_factor", "ATX")
+        case_form_factor = case["compatibility_tags"].get("form_factor", "ATX")
+        
+        if mb_form_factor not in CASE_FORM_FACTOR_COMPATIBILITY:
+            mb_form_factor = "ATX"  # Default fallback
+        
+        if case_form_factor not in CASE_FORM_FACTOR_COMPATIBILITY[mb_form_factor]:
+            return False
+        
+        # Check GPU length compatibility
+        gpu_length = gpu["compatibility_tags"].get("length", 280)
+        case_max_gpu_length = case["compatibility_tags"].get("max_gpu_length", 350)
+        
+        return gpu_length <= case_max_gpu_length
+    
     def _check_budget(self, build: Dict, budget: float) -> bool:
         """Check if build is within budget"""
         total_cost = sum(part["price"] for part in build.values())
@@ -368,7 +902,7 @@ class RecommendationEngine:
         budget_allocation = {}
         
         for category, part in build.items():
-            part_response = PartResponse(**part)
+            part_response = self._create_part_response(part)
             parts.append(part_response)
             total_price += part["price"]
             total_performance += part["performance_score"]
@@ -385,7 +919,12 @@ class RecommendationEngine:
             bang_for_buck_score=round(bang_for_buck_score, 4)
         )
     
-    def _ensure_build_diversity(self, builds: List) -> List:
+    def _create_part_response(self, part: Dict) -> PartResponse:
+        """Create a PartResponse from a part dictionary"""
+        load_specifications(part)
+        return PartResponse(**part)
+    
+    def _ensure_build_diversity(self, builds: List[CandidateBuild]) -> List[CandidateBuild]:
         """Ensure builds are diverse by filtering out very similar ones"""
         if not builds:
             return builds
@@ -396,13 +935,13 @@ class RecommendationEngine:
             is_diverse = True
             for existing_build in diverse_builds:
                 # Check if builds are too similar (same CPU and GPU)
-                build_cpu = next((p for p in build.parts if p.category == "cpu"), None)
-                build_gpu = next((p for p in build.parts if p.category == "gpu"), None)
-                existing_cpu = next((p for p in existing_build.parts if p.category == "cpu"), None)
-                existing_gpu = next((p for p in existing_build.parts if p.category == "gpu"), None)
+                build_cpu = build.parts.get("cpu")
+                build_gpu = build.parts.get("gpu")
+                existing_cpu = existing_build.parts.get("cpu")
+                existing_gpu = existing_build.parts.get("gpu")
                 
-                if (build_cpu and existing_cpu and build_cpu.id == existing_cpu.id and
-                    build_gpu and existing_gpu and build_gpu.id == existing_gpu.id):
+                if (build_cpu and existing_cpu and build_cpu["id"] == existing_cpu["id"] and
+                    build_gpu and existing_gpu and build_gpu["id"] == existing_gpu["id"]):
                     is_diverse = False
                     break
             
@@ -0,0 +1,191 @@
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+from models import BuildResponse, UpgradeOption
+
+class SearchRejected(Exception):
+    """Raised when too many searches are already waiting to run"""
+
+class SearchTimeout(Exception):
+    """Raised when a search does not finish before its deadline"""
+
+# Engine used by each worker process, created once by _init_worker
+_worker_engine = None
+
+def _init_worker(db_path: str, search_mode: str, use_frontier: bool):
+    """Create the recommendation engine of a worker process"""
+    global _worker_engine
+    from database import Database
+    from recommendation_engine import RecommendationEngine
+    _worker_engine = RecommendationEngine(Database(db_path), search_mode=search_mode, use_frontier=use_frontier)
+
+def _recommend_in_worker(budget: float, brand_preferences: Dict[str, str], use_case: str) -> List[BuildResponse]:
+    """Run a search in a worker process"""
+    return _worker_engine.get_recommendations(budget, brand_preferences, use_case)
+
+def _recommend_anytime_in_worker(budget: float, brand_preferences: Dict[str, str], use_case: str,
+                                 deadline: float) -> Tuple[List[BuildResponse], bool]:
+    """Run a deadline-bound search in a worker process"""
+    return _worker_engine.get_recommendations_anytime(budget, brand_preferences, use_case, deadline)
+
+def _recommend_budgets_in_worker(budgets: List[float], brand_preferences: Dict[str, str],
+                                 use_case: str) -> List[List[BuildResponse]]:
+    """Run the searches of a group of budgets in a worker process"""
+    return _worker_engine.get_recommendations_for_budgets(budgets, brand_preferences, use_case)
+
+def _recommend_curve_in_worker(budgets: List[float], brand_preferences: Dict[str, str],
+                               use_case: str) -> List[Optional[BuildResponse]]:
+    """Run a budget sweep in a worker process"""
+    return _worker_engine.get_recommendation_curve(budgets, brand_preferences, use_case)
+
+def _recommend_upgrades_in_worker(part_ids: List[int], upgrade_budget: float, brand_preferences: Dict[str, str],
+                                  use_case: str) -> Tuple[BuildResponse, List[UpgradeOption]]:
+    """Run an upgrade search in a worker process"""
+    return _worker_engine.get_upgrade_recommendations(part_ids, upgrade_budget, brand_preferences, use_case)
+
+class SearchExecutor:
+    """Runs recommendation searches off the event loop.
+
+    At most max_concurrent searches run at once, in a thread or process pool. Up to
+    max_queued more wait for a free slot and anything beyond that is rejected
+    straight away. A search that has not finished timeout_seconds after it was
+    submitted raises SearchTimeout; the worker still finishes it in the background,
+    holding its slot until it does.
+    """
+
+    MODES = ("thread", "process")
+
+    def __init__(self, engine, mode: str = "thread", max_concurrent: int = 4, max_queued: int = 32,
+                 timeout_seconds: float = 10.0):
+        if mode not in self.MODES:
+            raise ValueError(f"Unknown executor mode '{mode}'. Must be one of: {', '.join(self.MODES)}")
+        self.engine = engine
+        self.mode = mode
+        self.max_concurrent = max_concurrent
+        self.max_queued = max_queued
+        self.timeout_seconds = timeout_seconds
+
+        if mode == "process":
+            # Every worker process loads its own engine from the same database
+            self._pool = ProcessPoolExecutor(
+                max_workers=max_concurrent,
+                initializer=_init_worker,
+                initargs=(engine.db.db_path, engine.search_mode, engine.frontier is not None)
+            )
+        else:
+            self._pool = ThreadPoolExecutor(max_workers=max_concurrent, thread_name_prefix="search")
+
+        self._slots = None
+        self._waiting = 0
+        self._running = 0
+        self.completed = 0
+        self.rejected = 0
+        self.timeouts = 0
+
+    @classmethod
+    def from_environment(cls, engine) -> "SearchExecutor":
+        """Executor configured from BUILDMYRIG_SEARCH_* environment variables"""
+        return cls(
+            engine,
+            mode=os.environ.get("BUILDMYRIG_SEARCH_EXECUTOR", "thread"),
+            max_concurrent=int(os.environ.get("BUILDMYRIG_SEARCH_WORKERS", os.cpu_count() or 4)),
+            max_queued=int(os.environ.get("BUILDMYRIG_SEARCH_QUEUE", 32)),
+            timeout_seconds=float(os.environ.get("BUILDMYRIG_SEARCH_TIMEOUT", 10.0))
+        )
+
+    async def recommend(self, budget: float, brand_preferences: Dict[str, str], use_case: str) -> List[BuildResponse]:
+        """Get recommendations from the engine without blocking the event loop"""
+        if self.mode == "process":
+            return await self._run(_recommend_in_worker, budget, brand_preferences, use_case)
+        return await self._run(self.engine.get_recommendations, budget, brand_preferences, use_case)
+
+    async def recommend_anytime(self, budget: float, brand_preferences: Dict[str, str], use_case: str,
+                                deadline: float) -> Tuple[List[BuildResponse], bool]:
+        """Get the recommendations found by a time.monotonic() deadline and whether the search was exhaustive"""
+        if self.mode == "process":
+            return await self._run(_recommend_anytime_in_worker, budget, brand_preferences, use_case, deadline)
+        return await self._run(self.engine.get_recommendations_anytime, budget, brand_preferences, use_case, deadline)
+
+    async def recommend_budgets(self, budgets: List[float], brand_preferences: Dict[str, str],
+                                use_case: str) -> List[List[BuildResponse]]:
+        """Get recommendations for several budgets sharing brand preferences and use case, as one search slot"""
+        if self.mode == "process":
+            return await self._run(_recommend_budgets_in_worker, budgets, brand_preferences, use_case)
+        return await self._run(self.engine.get_recommendations_for_budgets, budgets, brand_preferences, use_case)
+
+    async def recommend_curve(self, budgets: List[float], brand_preferences: Dict[str, str],
+                              use_case: str) -> List[Optional[BuildResponse]]:
+        """Get the best build at each budget from one sweep, as one search slot"""
+        if self.mode == "process":
+            return await self._run(_recommend_curve_in_worker, budgets, brand_preferences, use_case)
+        return await self._run(self.engine.get_recommendation_curve, budgets, brand_preferences, use_case)
+
+    async def recommend_upgrades(self, part_ids: List[int], upgrade_budget: float, brand_preferences: Dict[str, str],
+                                 use_case: str) -> Tuple[BuildResponse, List[UpgradeOption]]:
+        """Get the best upgrades of an existing build without blocking the event loop"""
+        if self.mode == "process":
+            return await self._run(_recommend_upgrades_in_worker, part_ids, upgrade_budget, brand_preferences, use_case)
+        return await self._run(self.engine.get_upgrade_recommendations, part_ids, upgrade_budget,
+                               brand_preferences, use_case)
+
+    async def _run(self, function, *args):
+        """Run function in the pool once a slot is free, within the deadline"""
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.max_concurrent)
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.timeout_seconds
+
+        if self._slots.locked():
+            if self._waiting >= self.max_queued:
+                self.rejected += 1
+                raise SearchRejected(f"{self._waiting} searches already waiting")
+            self._waiting += 1
+            try:
+                await asyncio.wait_for(self._slots.acquire(), timeout=self.timeout_seconds)
+            except asyncio.TimeoutError:
+                self.timeouts += 1
+                raise SearchTimeout(f"No search slot free within {self.timeout_seconds}s")
+            finally:
+                self._waiting -= 1
+        else:
+            await self._slots.acquire()
+
+        self._running += 1
+        future = loop.run_in_executor(self._pool, function, *args)
+        # The slot is only free again once the worker is done, even if the caller gave up
+        future.add_done_callback(self._release_slot)
+
+        try:
+            return await asyncio.wait_for(asyncio.shield(future), timeout=max(0.0, deadline - loop.time()))
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            raise SearchTimeout(f"Search did not finish within {self.timeout_seconds}s")
+
+    def _release_slot(self, future):
+        """Free the slot of a finished search"""
+        if not future.cancelled():
+            # Mark the result as seen, in case the caller timed out and never awaits it
+            future.exception()
+        self._running -= 1
+        self.completed += 1
+        self._slots.release()
+
+    def stats(self) -> Dict[str, object]:
+        """Current load and counters of the executor"""
+        return {
+            "mode": self.mode,
+            "max_concurrent": self.max_concurrent,
+            "max_queued": self.max_queued,
+            "timeout_seconds": self.timeout_seconds,
+            "running": self._running,
+            "waiting": self._waiting,
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "timeouts": self.timeouts
+        }
+
+    def shutdown(self):
+        """Stop the worker pool without waiting for running searches"""
+        self._pool.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,30 @@
+"""
+Shared helpers for the test scripts: scratch directories and copies of the bundled database
+"""
+
+import atexit
+import shutil
+import tempfile
+from pathlib import Path
+from database import Database
+from recommendation_engine import RecommendationEngine
+
+def temp_dir() -> Path:
+    """A new temporary directory, removed when the test process exits"""
+    path = Path(tempfile.mkdtemp(prefix="buildmyrig-test-"))
+    atexit.register(shutil.rmtree, path, ignore_errors=True)
+    return path
+
+def copy_database(directory: Path = None) -> str:
+    """Path of a copy of the bundled database, so tests leave it as it is"""
+    db_path = (directory if directory is not None else temp_dir()) / "buildmyrig.db"
+    shutil.copy("buildmyrig.db", db_path)
+    return str(db_path)
+
+def make_database() -> Database:
+    """Database on a copy of the bundled catalog"""
+    return Database(copy_database())
+
+def make_engine(**options) -> RecommendationEngine:
+    """Engine on a copy of the bundled catalog, created with options"""
+    return RecommendationEngine(make_database(), **options)
@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+Test script to verify searches with a deadline return the best builds found in time and say if they were cut short
+"""
+
+import time
+from helpers import make_engine
+from recommendation_engine import SearchStats, DEADLINE_CHECK_INTERVAL
+
+BUDGETS = [600.0, 1000.0, 1500.0, 2500.0, 4000.0]
+LATENCIES_MS = [5.0, 20.0, 50.0]
+
+def part_ids(builds):
+    """Part ids and prices of a list of recommended builds"""
+    return [([part.id for part in build.parts], build.total_price) for build in builds]
+
+def test_generous_deadline():
+    """Test that a search finishing before its deadline gives the same builds as one without"""
+    print("=== Testing Searches Finishing Before the Deadline ===")
+    engine = make_engine()
+    for use_case in ("gaming", "workstation"):
+        for budget in BUDGETS:
+            expected = engine.get_recommendations(budget, {}, use_case)
+            builds, exhaustive = engine.get_recommendations_anytime(budget, {}, use_case, time.monotonic() + 60.0)
+            assert exhaustive
+            assert part_ids(builds) == part_ids(expected)
+        print(f"✓ SUCCESS: {use_case}: {len(BUDGETS)} budgets, same builds as searching without a deadline")
+
+def test_cut_short():
+    """Test that a search past its deadline stops with valid builds and reports it"""
+    print("\n=== Testing Searches Cut Short ===")
+    engine = make_engine()
+    parts_by_category = engine._candidate_parts({}, "general")
+    for budget in BUDGETS:
+        best = engine._generate_valid_builds(parts_by_category, budget, "general")[0].score
+        complete_nodes = engine.last_search_stats.nodes_visited
+
+        stats = SearchStats()
+        builds = engine._generate_valid_builds(parts_by_category, budget, "general", deadline=0.0, stats=stats)
+        assert not stats.exhaustive and engine.last_search_stats is stats
+        assert stats.nodes_visited == DEADLINE_CHECK_INTERVAL < complete_nodes
+
+        line = f"${budget:.0f}: complete search visits {complete_nodes} nodes"
+        for latency_ms in LATENCIES_MS:
+            stats = SearchStats()
+            start = time.monotonic()
+            builds = engine._generate_valid_builds(parts_by_category, budget, "general",
+                                                   deadline=start + latency_ms / 1000, stats=stats)
+            elapsed_ms = (time.monotonic() - start) * 1000
+            assert stats.exhaustive or elapsed_ms < latency_ms + 20, f"{elapsed_ms:.1f}ms"
+            assert len(builds) <= engine.max_recommendations
+            for candidate in builds:
+                assert candidate.total_price <= budget and engine._check_compatibility(candidate.parts)
+                assert candidate.score <= best + 1e-9
+            score = builds[0].score / best if builds else 0.0
+            line += f", {latency_ms:.0f}ms: {'exhaustive' if stats.exhaustive else 'cut short'} at {score:.1%} of the best"
+        print(f"✓ SUCCESS: {line}")
+
+    builds, exhaustive = engine.get_recommendations_anytime(2500.0, {}, "general", time.monotonic())
+    assert not exhaustive and len(builds) <= engine.max_recommendations
+    print(f"✓ SUCCESS: Expired deadline returns {len(builds)} build(s), marked as cut short")
+
+if __name__ == "__main__":
+    test_generous_deadline()
+    test_cut_short()
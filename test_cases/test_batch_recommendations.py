@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Test script to verify batched recommendations match one request at a time while sharing the candidate fetch
+"""
+
+import asyncio
+import time
+from helpers import make_database
+from recommendation_engine import RecommendationEngine
+from search_executor import SearchExecutor
+
+BUDGETS = [650.0, 1000.0, 1375.5, 1000.0, 2400.0, 5600.0, 300.0]
+GROUPS = [
+    ({}, "gaming"),
+    ({"cpu": "AMD", "gpu": "NVIDIA"}, "gaming"),
+    ({"cpu": "Intel", "case": "NZXT"}, "workstation"),
+]
+
+def part_ids(recommendations):
+    """Part ids and prices of a list of recommended builds"""
+    return [([part.id for part in build.parts], build.total_price) for build in recommendations]
+
+def test_batch_matches_single_requests():
+    """Test that each budget of a batch gets the builds it would get on its own"""
+    print("=== Testing Batched Recommendations ===")
+    db = make_database()
+    for use_frontier in (False, True):
+        engine = RecommendationEngine(db, use_frontier=use_frontier)
+        if use_frontier:
+            engine.frontier.rebuild(engine)
+
+        fetches = []
+        candidate_parts = engine._candidate_parts
+        engine._candidate_parts = lambda *args: fetches.append(args) or candidate_parts(*args)
+        for brand_preferences, use_case in GROUPS:
+            fetches.clear()
+            start = time.perf_counter()
+            batch = engine.get_recommendations_for_budgets(BUDGETS, brand_preferences, use_case)
+            batch_seconds = time.perf_counter() - start
+            batch_fetches = len(fetches)
+            assert batch_fetches <= 1, "Candidates should be fetched once per group"
+
+            start = time.perf_counter()
+            single = [RecommendationEngine(db).get_recommendations(budget, brand_preferences, use_case)
+                      if not use_frontier else engine.get_recommendations(budget, brand_preferences, use_case)
+                      for budget in BUDGETS]
+            single_seconds = time.perf_counter() - start
+            assert [part_ids(builds) for builds in batch] == [part_ids(builds) for builds in single]
+            print(f"✓ SUCCESS: {use_case} {brand_preferences or 'any brand'}"
+                  f"{' with frontier' if use_frontier else ''}: {len(BUDGETS)} budgets, {batch_fetches} candidate "
+                  f"fetch(es), batch {batch_seconds:.2f}s vs one at a time {single_seconds:.2f}s")
+
+async def check_executor_groups():
+    db = make_database()
+    engine = RecommendationEngine(db)
+    executor = SearchExecutor(engine, max_concurrent=1, max_queued=1, timeout_seconds=30.0)
+    try:
+        results = await executor.recommend_budgets(BUDGETS, {}, "general")
+    finally:
+        executor.shutdown()
+    expected = [engine.get_recommendations(budget, {}, "general") for budget in BUDGETS]
+    assert [part_ids(builds) for builds in results] == [part_ids(builds) for builds in expected]
+    assert executor.completed == 1
+    print(f"✓ SUCCESS: {len(BUDGETS)} budgets searched in one executor slot")
+
+def test_executor_groups():
+    """Test that a group of budgets runs as a single executor search"""
+    print("\n=== Testing Batched Searches in the Executor ===")
+    asyncio.run(check_executor_groups())
+
+if __name__ == "__main__":
+    test_batch_matches_single_requests()
+    test_executor_groups()
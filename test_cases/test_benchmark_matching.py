@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Test script to verify the indexed benchmark matching finds the same entries as comparing every benchmark row
+"""
+
+import time
+from typing import Optional
+import pandas as pd
+import csv_loader
+from csv_loader import BenchmarkMatcher, CSVDataLoader, MATCH_THRESHOLD
+from helpers import temp_dir
+
+def scan_best_match(loader: CSVDataLoader, name: str, perf_df: pd.DataFrame) -> Optional[int]:
+    """Position of the best match found by scoring every benchmark row"""
+    name_clean = loader._clean_name_for_matching(name)
+    best_score = 0
+    best_position = None
+    for position, model in enumerate(perf_df['Model']):
+        score = loader._calculate_similarity_score(name_clean, loader._clean_name_for_matching(str(model)))
+        if score > best_score and score > MATCH_THRESHOLD:
+            best_score = score
+            best_position = position
+    return best_position
+
+def test_benchmark_matching():
+    """Test that indexed matching agrees with the full scan"""
+    print("=== Testing Benchmark Matching ===")
+    loader = CSVDataLoader()
+    price_data = loader.load_price_data()
+    performance_data = loader.load_performance_data()
+
+    for category, perf_df in performance_data.items():
+        names = [str(name) for name in price_data[category]['name'].dropna().unique()[:150]]
+        # Benchmark models themselves must match their own row
+        names += [str(model) for model in perf_df['Model'].head(50)]
+
+        start = time.perf_counter()
+        matched = 0
+        for name in names:
+            match = loader._find_best_match(name, perf_df)
+            expected = scan_best_match(loader, name, perf_df)
+            if expected is None:
+                assert match is None, f"{name} matched {match['Model']}, expected no match"
+            else:
+                assert match is not None and match.equals(perf_df.iloc[expected]), f"{name} matched the wrong model"
+                matched += 1
+        print(f"✓ SUCCESS: {category}: {len(names)} names, {matched} matched, same as a full scan "
+              f"({time.perf_counter() - start:.1f}s including the scans)")
+
+def test_saved_matches():
+    """Test that matches are saved per benchmark CSV and reused without matching again"""
+    print("\n=== Testing Saved Benchmark Matches ===")
+    cache_dir = temp_dir()
+
+    loader = CSVDataLoader()
+    loader.benchmark_cache_dir = cache_dir
+    price_data = loader.load_price_data()
+    perf_df = loader.load_performance_data()["gpu"]
+    names = [str(name) for name in price_data["gpu"]['name'].dropna().head(300)]
+    expected = [loader._find_best_match(name, perf_df, "gpu") for name in names]
+    loader._benchmark_matchers["gpu"].save()
+    cache_files = list(cache_dir.glob("gpu-*.json"))
+    assert len(cache_files) == 1
+    print(f"✓ SUCCESS: Matches saved to {cache_files[0].name}")
+
+    reloaded = CSVDataLoader()
+    reloaded.benchmark_cache_dir = cache_dir
+    perf_df = reloaded.load_performance_data()["gpu"]
+    actual = [reloaded._find_best_match(name, perf_df, "gpu") for name in names]
+    matcher = reloaded._benchmark_matchers["gpu"]
+    assert matcher.postings is None and matcher.new_matches == 0, "Saved matches should make matching unnecessary"
+    for expected_match, actual_match in zip(expected, actual):
+        assert (expected_match is None and actual_match is None) or expected_match.equals(actual_match)
+    print("✓ SUCCESS: Saved matches reused without building the index")
+
+    # A changed benchmark CSV gets its own cache file
+    reloaded.performance_data_hashes["gpu"] = "0" * 64
+    assert reloaded._benchmark_cache_path("gpu") != cache_files[0]
+    print("✓ SUCCESS: Cache file depends on the benchmark CSV")
+
+def test_bounded_memo():
+    """Test that a matcher memoises at most MAX_MEMOISED_MATCHES names, keeping the most recently used"""
+    print("\n=== Testing Bounded Match Memo ===")
+    loader = CSVDataLoader()
+    perf_df = loader.load_performance_data(["cpu"])["cpu"]
+    names = [loader._clean_name_for_matching(str(model)) for model in perf_df['Model'].head(8)]
+    limit = csv_loader.MAX_MEMOISED_MATCHES
+    csv_loader.MAX_MEMOISED_MATCHES = 5
+    try:
+        matcher = BenchmarkMatcher(perf_df, loader._clean_name_for_matching)
+        positions = [matcher.best_match_position(name) for name in names[:5]]
+        # Using the first name again makes the second the least recently used
+        assert matcher.best_match_position(names[0]) == positions[0]
+        for name in names[5:]:
+            matcher.best_match_position(name)
+        assert list(matcher.matches) == [names[4], names[0]] + names[5:]
+        assert matcher.best_match_position(names[1]) == positions[1] and len(matcher.matches) == 5
+    finally:
+        csv_loader.MAX_MEMOISED_MATCHES = limit
+    print("✓ SUCCESS: Least recently used matches dropped over the limit, and matched again when needed")
+
+if __name__ == "__main__":
+    test_benchmark_matching()
+    test_saved_matches()
+    test_bounded_memo()
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Test script to verify brand detection with the brand patterns file
+"""
+
+import json
+import time
+import pandas as pd
+from typing import Dict, List, Optional
+from csv_loader import CSVDataLoader, BrandMatcher, BRAND_PATTERNS_FILE
+from helpers import temp_dir
+
+def scan_brand(name: str, brands: Dict[str, List[str]]) -> Optional[str]:
+    """First brand in table order with a pattern in the name, checking every pattern"""
+    name_upper = name.upper()
+    for brand, patterns in brands.items():
+        if any(pattern.upper() in name_upper for pattern in patterns):
+            return brand
+    return None
+
+def test_matches_scan():
+    """Test that the matchers find the same brands as checking every pattern in turn"""
+    print("=== Testing Brand Matchers ===")
+    with open(BRAND_PATTERNS_FILE) as f:
+        config = json.load(f)
+    loader = CSVDataLoader()
+    manufacturer_matcher, hardware_brand_matchers = loader.brand_matchers()
+    price_data = loader.load_price_data()
+
+    names = []
+    for category, price_df in price_data.items():
+        names += [(category, str(name).strip()) for name in price_df['name']]
+    # Later brands mentioned before earlier ones, and overlapping patterns
+    names += [("gpu", "AMD Radeon by ASUS"), ("gpu", "Intel Arc ... GeForce"), ("cpu", "amd ryzen intel"),
+              ("motherboard", "WD Western Digital"), ("case", ""), ("psu", "be quiet! Straight Power")]
+
+    scan_seconds = 0.0
+    match_seconds = 0.0
+    for category, name in names:
+        hardware_brands = config["hardware_brands"].get(category, {})
+        start = time.perf_counter()
+        expected = (scan_brand(name, config["manufacturers"]), scan_brand(name, hardware_brands))
+        scan_seconds += time.perf_counter() - start
+        start = time.perf_counter()
+        hardware_brand_matcher = hardware_brand_matchers.get(category)
+        actual = (manufacturer_matcher.match(name),
+                  hardware_brand_matcher.match(name) if hardware_brand_matcher else None)
+        match_seconds += time.perf_counter() - start
+        assert actual == expected, f"{category} {name!r}: {actual} != {expected}"
+    print(f"✓ SUCCESS: {len(names)} names, same brands as checking each pattern "
+          f"(scan {scan_seconds:.2f}s, matchers {match_seconds:.2f}s)")
+
+    for category in price_data:
+        category_names = pd.Series([name for name_category, name in names if name_category == category])
+        expected = [manufacturer_matcher.match(name) for name in category_names]
+        assert manufacturer_matcher.match_series(category_names).tolist() == expected, category
+        hardware_brand_matcher = hardware_brand_matchers.get(category)
+        if hardware_brand_matcher is not None:
+            expected = [hardware_brand_matcher.match(name) for name in category_names]
+            assert hardware_brand_matcher.match_series(category_names).tolist() == expected, category
+    print("✓ SUCCESS: Same brands matching a whole column at once")
+
+    assert loader._extract_manufacturer("Foo Bar 9000") == "Foo"
+    assert loader._extract_manufacturer("") == "Unknown"
+    assert loader._extract_hardware_brand("MSI MAG B550 Tomahawk", "motherboard") == "AMD"
+    assert loader._extract_hardware_brand("Corsair RM850x", "psu") == "Corsair"
+    print("✓ SUCCESS: Unmatched names fall back to the first word and manufacturer")
+
+def test_patterns_file():
+    """Test that brands come from the brand patterns file"""
+    print("\n=== Testing Brand Patterns File ===")
+    patterns_file = temp_dir() / "brand_patterns.json"
+    with open(patterns_file, "w") as f:
+        json.dump({
+            "manufacturers": {"Noctua": ["noctua"], "ASUS": ["ASUS"]},
+            "hardware_brands": {"gpu": {"Moore Threads": ["MTT "]}}
+        }, f)
+
+    loader = CSVDataLoader()
+    loader.brand_patterns_file = patterns_file
+    assert loader._extract_manufacturer("NOCTUA NH-D15 ASUS edition") == "Noctua"
+    assert loader._extract_hardware_brand("ASUS MTT S80", "gpu") == "Moore Threads"
+    assert loader._extract_hardware_brand("ASUS GeForce RTX 4070", "gpu") == "ASUS"
+    print("✓ SUCCESS: Brands added in the file are detected without code changes")
+
+    # A longer pattern of a later brand does not hide an earlier brand's prefix of it
+    matcher = BrandMatcher([("First", ["AM"]), ("Second", ["AMD", "X"]), ("Third", ["XFX"])])
+    assert matcher.match("amd xfx") == "First" and matcher.match("XFX") == "Second"
+    assert matcher.match("nothing") is None
+    assert matcher.match_series(pd.Series(["amd xfx", "XFX", "nothing", "XFX"])).tolist() == ["First", "Second", None, "Second"]
+    print("✓ SUCCESS: Overlapping patterns resolved by brand order")
+
+    try:
+        BrandMatcher([("Empty", [""])])
+        assert False, "An empty pattern should be rejected"
+    except ValueError:
+        print("✓ SUCCESS: Empty patterns rejected")
+
+if __name__ == "__main__":
+    test_matches_scan()
+    test_patterns_file()
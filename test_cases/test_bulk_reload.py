@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Test script to verify a full catalog reload writes every part in batches, in one transaction
+"""
+
+import os
+import sqlite3
+import csv_loader
+from csv_loader import CSVDataLoader
+from database import Database
+from helpers import copy_database, temp_dir
+from migrations import SCHEMA_MIGRATIONS, get_schema_version
+
+def make_loader():
+    """Loader writing to a copy of the bundled database, and the parts merged from the CSVs"""
+    loader = CSVDataLoader(copy_database())
+    loader.benchmark_cache_dir = temp_dir()
+    merged_data = loader.merge_price_performance_data(loader.load_price_data(), loader.load_performance_data())
+    return loader, merged_data
+
+def stored_parts(db_path: str):
+    """Every row of the parts table, in id order"""
+    conn = sqlite3.connect(db_path)
+    try:
+        return conn.execute("SELECT * FROM parts ORDER BY id").fetchall()
+    finally:
+        conn.close()
+
+def test_batched_load():
+    """Test that the rows, indexes and catalog version do not depend on the batch size"""
+    print("=== Testing Batched Bulk Load ===")
+    loader, merged_data = make_loader()
+    version = Database(loader.db_path).get_catalog_version()
+    loader.populate_database(merged_data)
+    expected = stored_parts(loader.db_path)
+    assert len(expected) == sum(len(parts) for parts in merged_data.values())
+
+    small_batches, _ = make_loader()
+    batch_size = csv_loader.INSERT_BATCH_SIZE
+    # Odd-sized batches, so every category ends on a partial one
+    csv_loader.INSERT_BATCH_SIZE = 7
+    try:
+        small_batches.populate_database(merged_data)
+    finally:
+        csv_loader.INSERT_BATCH_SIZE = batch_size
+    assert stored_parts(small_batches.db_path) == expected
+    print(f"✓ SUCCESS: {len(expected)} parts identical in batches of {batch_size} and of 7")
+
+    conn = sqlite3.connect(loader.db_path)
+    try:
+        assert get_schema_version(conn) == SCHEMA_MIGRATIONS[-1][0]
+        indexes = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+    finally:
+        conn.close()
+    assert {"idx_parts_category_performance", "idx_parts_category_socket"} <= indexes
+    assert Database(loader.db_path).get_catalog_version() == version + 1
+    print(f"✓ SUCCESS: Indexes rebuilt, catalog version bumped once to {version + 1}")
+
+def test_failed_load():
+    """Test that a load failing part way through its batches leaves the live catalog as it was"""
+    print("\n=== Testing Failed Bulk Load ===")
+    loader, merged_data = make_loader()
+    db = Database(loader.db_path)
+    version = db.get_catalog_version()
+    before = stored_parts(loader.db_path)
+
+    # A part past the first batch that violates the schema
+    broken = {category: list(parts) for category, parts in merged_data.items()}
+    position = csv_loader.INSERT_BATCH_SIZE + 5
+    broken["ram"][position] = {**broken["ram"][position], "name": None}
+    try:
+        loader.populate_database(broken)
+        assert False, "A part without a name should fail the load"
+    except sqlite3.IntegrityError as e:
+        print(f"✓ SUCCESS: Load failed in its second ram batch: {e}")
+
+    assert stored_parts(loader.db_path) == before
+    assert db.get_catalog_version() == version
+    assert not os.path.exists(loader.db_path + ".staging")
+    print(f"✓ SUCCESS: Live catalog still version {version} with its {len(before)} parts")
+
+if __name__ == "__main__":
+    test_batched_load()
+    test_failed_load()
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Test script to verify the in-memory catalog snapshot answers queries the same way the database does
+"""
+
+from collections import Counter
+from database import Database, bump_catalog_version
+from helpers import copy_database
+
+def test_snapshot_matches_database():
+    """Test that snapshot reads return the same parts as the SQL queries"""
+    print("=== Testing Catalog Snapshot Against SQL ===")
+    db_path = copy_database()
+    snapshot_db = Database(db_path)
+    sql_db = Database(db_path, use_catalog_snapshot=False)
+
+    for category, brand_preference in [("cpu", None), ("gpu", ("any", "NVIDIA")), ("case", ("NZXT", "any")),
+                                       ("ram", ("Corsair", "any")), ("gpu", ("any", "NoSuchBrand"))]:
+        expected = sql_db.get_parts_by_category(category, brand_preference)
+        actual = snapshot_db.get_parts_by_category(category, brand_preference)
+        assert actual == expected, f"{category} {brand_preference} differs"
+        print(f"✓ SUCCESS: {category} {brand_preference}: {len(actual)} parts match")
+
+    for sort_by in ["performance_score", "price", "name"]:
+        for sort_order in ["asc", "desc"]:
+            for brand_preference, offset in [(None, 0), (None, 40), (("any", "AMD"), 0), (("any", "AMD"), 25)]:
+                expected = sql_db.get_parts_by_category_paginated("gpu", brand_preference, 20, offset, sort_by, sort_order)
+                actual = snapshot_db.get_parts_by_category_paginated("gpu", brand_preference, 20, offset, sort_by, sort_order)
+                # Parts with equal sort keys may come in either order
+                assert [part[sort_by] for part in actual] == [part[sort_by] for part in expected]
+    print("✓ SUCCESS: Sorted pages match")
+
+    expected = sql_db.get_parts_by_category_paginated("psu", None, 50, 10, "price", "asc", min_wattage=850)
+    actual = snapshot_db.get_parts_by_category_paginated("psu", None, 50, 10, "price", "asc", min_wattage=850)
+    assert [part["price"] for part in actual] == [part["price"] for part in expected]
+    print("✓ SUCCESS: Minimum wattage filter matches")
+
+    ids = [5, 1, 3000, 99999]
+    assert snapshot_db.get_parts_by_ids(ids) == sorted(sql_db.get_parts_by_ids(ids), key=lambda part: ids.index(part["id"]))
+    assert snapshot_db.get_all_parts() == sql_db.get_all_parts()
+    print("✓ SUCCESS: Lookups by id and the full catalog match")
+
+    parts = sql_db.get_all_parts()
+    stats = snapshot_db.catalog().stats()
+    assert stats["total_parts"] == len(parts)
+    assert stats["categories"] == dict(Counter(part["category"] for part in parts))
+    assert stats["brands"] == dict(Counter(part["brand"] for part in parts))
+    assert stats["price_range"] == {"min": min(part["price"] for part in parts),
+                                    "max": max(part["price"] for part in parts)}
+    print(f"✓ SUCCESS: Stats of {stats['total_parts']} parts match")
+
+def test_snapshot_swap():
+    """Test that a reloaded catalog gets a new snapshot and old snapshots stay unchanged"""
+    print("\n=== Testing Catalog Snapshot Swap ===")
+    db = Database(copy_database())
+    old_snapshot = db.catalog()
+    assert db.catalog() is old_snapshot
+    old_count = len(old_snapshot)
+
+    with db._write_pool.connection() as conn:
+        conn.execute("DELETE FROM parts WHERE category = 'case'")
+        bump_catalog_version(conn.cursor())
+        conn.commit()
+
+    new_snapshot = db.catalog()
+    assert new_snapshot is not old_snapshot
+    assert new_snapshot.version == old_snapshot.version + 1
+    assert db.get_parts_by_category("case") == []
+    assert len(old_snapshot) == old_count and old_snapshot.get_parts_by_category("case")
+    print(f"✓ SUCCESS: Snapshot {new_snapshot.version} replaced snapshot {old_snapshot.version}")
+
+    # Callers may modify the parts they get without affecting the snapshot
+    part = db.get_parts_by_category("cpu")[0]
+    part["performance_score"] += 1000
+    assert db.get_parts_by_category("cpu")[0]["performance_score"] == part["performance_score"] - 1000
+    print("✓ SUCCESS: Parts are copies")
+
+if __name__ == "__main__":
+    test_snapshot_matches_database()
+    test_snapshot_swap()
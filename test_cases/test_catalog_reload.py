@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Test script to verify catalog reloads are staged, validated and swapped in while a server keeps reading
+"""
+
+import json
+import os
+import shutil
+import pandas as pd
+from csv_loader import CSVDataLoader, CatalogValidationError, BRAND_PATTERNS_FILE
+from database import Database
+from helpers import copy_database, temp_dir
+
+def make_loader():
+    """Loader writing to a copy of the bundled database, and the parts merged from the CSVs"""
+    loader = CSVDataLoader(copy_database())
+    loader.benchmark_cache_dir = temp_dir()
+    merged_data = loader.merge_price_performance_data(loader.load_price_data(), loader.load_performance_data())
+    return loader, merged_data
+
+def test_reload_swap():
+    """Test that a running Database picks up a reloaded catalog"""
+    print("=== Testing Catalog Swap ===")
+    loader, merged_data = make_loader()
+    db = Database(loader.db_path)
+    old_snapshot = db.catalog()
+
+    # Drop a few parts so the new catalog is distinguishable
+    merged_data["gpu"] = merged_data["gpu"][:-10]
+    loader.populate_database(merged_data)
+
+    new_snapshot = db.catalog()
+    assert new_snapshot.version == old_snapshot.version + 1
+    assert len(db.get_parts_by_category("gpu")) == len(merged_data["gpu"])
+    assert len(old_snapshot.get_parts_by_category("gpu")) == len(merged_data["gpu"]) + 10
+    assert not os.path.exists(loader.db_path + ".staging")
+    with db._read_pool.connection() as conn:
+        assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+    print(f"✓ SUCCESS: Running database switched from catalog {old_snapshot.version} to {new_snapshot.version}")
+
+def test_rejected_reload():
+    """Test that a catalog failing validation leaves the live one untouched"""
+    print("\n=== Testing Rejected Reloads ===")
+    loader, merged_data = make_loader()
+    db = Database(loader.db_path)
+    version = db.get_catalog_version()
+
+    for description, broken in [
+        ("missing category", {category: parts for category, parts in merged_data.items() if category != "case"}),
+        ("truncated category", {**merged_data, "ram": merged_data["ram"][:100]}),
+    ]:
+        try:
+            loader.populate_database(broken)
+            assert False, f"Reload with a {description} should be rejected"
+        except CatalogValidationError as e:
+            print(f"✓ SUCCESS: {description} rejected: {e}")
+        assert db.get_catalog_version() == version
+        assert len(db.get_parts_by_category("ram")) == len(merged_data["ram"])
+        assert not os.path.exists(loader.db_path + ".staging")
+    print("✓ SUCCESS: Live catalog unchanged")
+
+def test_incremental_reload():
+    """Test that only changed categories are reloaded and listed parts keep their ids"""
+    print("\n=== Testing Incremental Reloads ===")
+    data_dir = temp_dir()
+    shutil.copytree("price_data", data_dir / "price_data")
+    shutil.copytree("performance_data", data_dir / "performance_data")
+    loader = CSVDataLoader(str(data_dir / "buildmyrig.db"))
+    loader.price_data_dir = data_dir / "price_data"
+    loader.performance_data_dir = data_dir / "performance_data"
+    loader.benchmark_cache_dir = data_dir / "benchmark_cache"
+    loader.brand_patterns_file = data_dir / "brand_patterns.json"
+    shutil.copy(BRAND_PATTERNS_FILE, loader.brand_patterns_file)
+
+    manifest = loader.file_manifest()
+    merged_data = loader.merge_price_performance_data(loader.load_price_data(), loader.load_performance_data())
+    loader.populate_database(merged_data, manifest)
+    db = Database(loader.db_path)
+    ids_before = {part["id"]: part for part in db.get_all_parts()}
+    assert loader.changed_categories(loader._stored_manifest(), loader.file_manifest()) == []
+    print("✓ SUCCESS: Nothing to reload right after a load")
+
+    # A price feed update: one price changes, one listing is dropped
+    gpu_path = loader.price_data_dir / loader.price_files["gpu"]
+    gpus = pd.read_csv(gpu_path)
+    changed_name = gpus.loc[0, "name"]
+    gpus.loc[0, "price"] = gpus.loc[0, "price"] + 10
+    gpus.drop(index=1).to_csv(gpu_path, index=False)
+
+    manifest = loader.file_manifest()
+    categories = loader.changed_categories(loader._stored_manifest(), manifest)
+    assert categories == ["gpu"], categories
+    merged_data = loader.merge_price_performance_data(loader.load_price_data(categories),
+                                                      loader.load_performance_data(categories))
+    loader.populate_database(merged_data, manifest, incremental=True)
+
+    ids_after = {part["id"]: part for part in db.get_all_parts()}
+    removed = ids_before.keys() - ids_after.keys()
+    assert len(removed) <= 1 and not ids_after.keys() - ids_before.keys()
+    assert all(ids_after[part_id]["name"] == part["name"] for part_id, part in ids_before.items() if part_id in ids_after)
+    repriced = [part for part in ids_after.values() if part["name"] == changed_name and part["category"] == "gpu"
+                and part["price"] != ids_before[part["id"]]["price"]]
+    assert len(repriced) == 1
+    assert loader.changed_categories(loader._stored_manifest(), loader.file_manifest()) == []
+    print(f"✓ SUCCESS: Only gpu reloaded; {len(ids_after)} parts kept their ids, {len(removed)} removed, 1 repriced")
+
+    # Brands of every category come from the brand patterns file
+    with open(loader.brand_patterns_file) as f:
+        brand_patterns = json.load(f)
+    brand_patterns["manufacturers"]["Montech"] = ["Montech"]
+    with open(loader.brand_patterns_file, "w") as f:
+        json.dump(brand_patterns, f)
+    categories = loader.changed_categories(loader._stored_manifest(), loader.file_manifest())
+    assert categories == list(loader.price_files), categories
+    print("✓ SUCCESS: Editing the brand patterns file reloads every category")
+
+if __name__ == "__main__":
+    test_reload_swap()
+    test_rejected_reload()
+    test_incremental_reload()
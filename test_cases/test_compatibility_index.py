@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Test script to verify the compatibility index lookups against filtering every part with the engine's rules
+"""
+
+from database import Database
+from recommendation_engine import RecommendationEngine
+
+def brute_force(engine: RecommendationEngine, categories, build, parts):
+    """Ids of the parts the engine's tag-based rule accepts in the last category of build"""
+    rule = dict(engine.compatibility_rules)[categories]
+    category = categories[-1]
+    fitting = set()
+    for part in parts:
+        try:
+            if rule({**build, category: part}):
+                fitting.add(part["id"])
+        except (KeyError, ValueError, TypeError):
+            pass
+    return fitting
+
+def test_index_lookups():
+    """Test that the socket, PSU wattage and case lookups list exactly the compatible parts"""
+    print("=== Testing Compatibility Index Lookups ===")
+    db = Database()
+    engine = RecommendationEngine(db)
+    index = engine._get_compatibility_index()
+    parts = {category: db.get_parts_by_category(category) for category in engine.required_categories}
+
+    cpus_by_socket = {}
+    for cpu in parts["cpu"]:
+        cpus_by_socket.setdefault(index.motherboard_key(cpu), cpu)
+    for socket, cpu in cpus_by_socket.items():
+        expected = brute_force(engine, ("cpu", "motherboard"), {"cpu": cpu}, parts["motherboard"])
+        assert set(index.motherboards_by_socket.get(socket, ())) == expected, socket
+    print(f"✓ SUCCESS: Motherboards of {len(cpus_by_socket)} CPU sockets")
+
+    pairs_by_wattage = {}
+    for cpu in parts["cpu"][::7]:
+        for gpu in parts["gpu"][::7]:
+            pairs_by_wattage.setdefault(index.required_psu_wattage(cpu, gpu), {"cpu": cpu, "gpu": gpu})
+    psu_wattages = {psu["id"]: index.get("psu", psu)["wattage"] for psu in parts["psu"]}
+    for required_wattage, build in pairs_by_wattage.items():
+        expected = brute_force(engine, ("cpu", "gpu", "psu"), build, parts["psu"])
+        adequate = index.adequate_psus(required_wattage)
+        assert adequate == expected, required_wattage
+        # Everything from the smallest adequate wattage upwards, and nothing below it
+        if adequate:
+            smallest = min(psu_wattages[psu_id] for psu_id in adequate)
+            assert all(psu_wattages[psu_id] < smallest for psu_id in psu_wattages.keys() - adequate
+                       if psu_wattages[psu_id] is not None)
+    print(f"✓ SUCCESS: Adequate PSUs for {len(pairs_by_wattage)} required wattages")
+
+    builds_by_key = {}
+    for motherboard in parts["motherboard"][::5]:
+        for gpu in parts["gpu"][::5]:
+            builds_by_key.setdefault(index.case_key(motherboard, gpu), {"motherboard": motherboard, "gpu": gpu})
+    for key, build in builds_by_key.items():
+        expected = brute_force(engine, ("motherboard", "gpu", "case"), build, parts["case"])
+        assert index.fitting_cases(key) == expected, key
+    print(f"✓ SUCCESS: Fitting cases for {len(builds_by_key)} motherboard form factor and GPU length keys")
+
+    motherboards = {motherboard["id"]: motherboard for motherboard in parts["motherboard"]}
+    for socket, motherboard_ids in index.motherboards_by_socket.items():
+        motherboard = motherboards[motherboard_ids[0]]
+        for ram in parts["ram"][::25]:
+            expected = bool(brute_force(engine, ("motherboard", "ram"), {"motherboard": motherboard}, [ram]))
+            assert index.ram_fits(ram, index.ram_key(motherboard)) == expected, (socket, ram["id"])
+    print(f"✓ SUCCESS: RAM types and capacities for {len(index.motherboards_by_socket)} motherboard sockets")
+
+if __name__ == "__main__":
+    test_index_lookups()
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Test script to verify pooled SQLite connections are reused, bounded and read-only where asked
+"""
+
+import asyncio
+import sqlite3
+from connection_pool import ConnectionPool
+from helpers import temp_dir
+
+def test_connection_pool():
+    """Test connection reuse, WAL mode, read-only connections and the pool limit"""
+    print("=== Testing Connection Pool ===")
+
+    db_path = str(temp_dir() / "pool_test.db")
+    writer = ConnectionPool(db_path, max_connections=1)
+    reader = ConnectionPool(db_path, max_connections=2, read_only=True)
+
+    with writer.connection() as conn:
+        assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+        conn.execute("CREATE TABLE parts (id INTEGER PRIMARY KEY, name TEXT)")
+        conn.execute("INSERT INTO parts (name) VALUES ('NVIDIA RTX 4070')")
+        conn.commit()
+    print("✓ SUCCESS: Writer uses WAL journal mode")
+
+    with reader.connection() as first:
+        pass
+    with reader.connection() as again:
+        assert again is first
+        assert again.execute("SELECT COUNT(*) FROM parts").fetchone()[0] == 1
+    print("✓ SUCCESS: Connections are reused")
+
+    try:
+        with reader.connection() as conn:
+            conn.execute("INSERT INTO parts (name) VALUES ('AMD RX 7800 XT')")
+        assert False, "expected a read-only error"
+    except sqlite3.OperationalError:
+        print("✓ SUCCESS: Query connections are read-only")
+
+    held = [reader.acquire(), reader.acquire()]
+    try:
+        reader.acquire(timeout=0.1)
+        assert False, "expected the pool to be exhausted"
+    except sqlite3.OperationalError:
+        print("✓ SUCCESS: Pool never opens more than max_connections")
+    for conn in held:
+        reader.release(conn)
+
+    reader.close()
+    writer.close()
+
+async def check_cancelled_acquire(pool: ConnectionPool):
+    held = pool.acquire()
+    waiting = asyncio.get_running_loop().create_future()
+
+    async def borrow():
+        waiting.set_result(None)
+        async with pool.connection_async():
+            assert False, "the pool is exhausted until the task is cancelled"
+
+    task = asyncio.create_task(borrow())
+    await waiting
+    await asyncio.sleep(0.05)
+    task.cancel()
+    try:
+        await task
+        assert False, "expected the task to be cancelled"
+    except asyncio.CancelledError:
+        pass
+
+    # The acquire still waiting in its thread gets this connection and hands it back
+    pool.release(held)
+    await asyncio.sleep(0.2)
+    async with pool.connection_async() as conn:
+        assert conn is held
+
+def test_cancelled_async_acquire():
+    """Test that cancelling a task waiting for a connection does not leak the connection"""
+    print("\n=== Testing Cancelled Async Acquire ===")
+    pool = ConnectionPool(str(temp_dir() / "pool_test.db"), max_connections=1)
+    asyncio.run(check_cancelled_acquire(pool))
+    pool.acquire(timeout=0.1)
+    print("✓ SUCCESS: Connection returned to the pool after its waiter was cancelled")
+    pool.close()
+
+if __name__ == "__main__":
+    test_connection_pool()
+    test_cancelled_async_acquire()
@@ -0,0 +1,38 @@
+#!/usr/bin/env python3
+"""
+Test script to verify the precomputed build frontier keeps the best build of every CPU/GPU pair
+"""
+
+import random
+from frontier import pareto_frontier
+
+def build_score(performance_score, total_price, budget):
+    """Same score as RecommendationEngine._build_score"""
+    return (performance_score / 1000) * 0.6 + (total_price / budget) * 0.4
+
+def test_frontier_keeps_best_builds():
+    """Test that dropping dominated builds never changes the best build of a pair at any budget"""
+    print("=== Testing Build Frontier ===")
+
+    rng = random.Random(7)
+    builds = []
+    for _ in range(2000):
+        part_ids = {"cpu": rng.randint(1, 4), "gpu": rng.randint(1, 4)}
+        builds.append((round(rng.uniform(400, 3000), 2), rng.randint(200, 900), part_ids))
+
+    frontier = pareto_frontier(builds)
+    print(f"Kept {len(frontier)} of {len(builds)} builds")
+    assert [build[0] for build in frontier] == sorted(build[0] for build in frontier)
+
+    for budget in range(400, 3001, 25):
+        for pair in {(build[2]["cpu"], build[2]["gpu"]) for build in builds}:
+            def best(candidates):
+                scores = [build_score(b[1], b[0], budget) for b in candidates
+                          if b[0] <= budget and (b[2]["cpu"], b[2]["gpu"]) == pair]
+                return max(scores) if scores else None
+
+            assert best(frontier) == best(builds)
+    print("✓ SUCCESS: Frontier gives the same best builds as the full list")
+
+if __name__ == "__main__":
+    test_frontier_keeps_best_builds()
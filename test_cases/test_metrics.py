@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Test script to verify the metrics registry and the stage timings and counts the recommendation engine records
+"""
+
+import threading
+import time
+from helpers import make_engine
+from metrics import (
+    MetricsRegistry, STAGE_SECONDS, SEARCH_CANDIDATES, SEARCH_NODES_VISITED, SEARCH_BUILDS_FOUND, SEARCHES_CUT_SHORT
+)
+
+SEARCH_STAGES = ["fetch_parts", "use_case_filtering", "budget_filtering", "search", "diversity", "build_responses"]
+
+def test_text_format():
+    """Test the Prometheus text rendering of counters, gauges and histograms"""
+    print("=== Testing Metrics Text Format ===")
+    registry = MetricsRegistry()
+    requests = registry.counter("test_requests_total", "Requests", ["route"])
+    in_flight = registry.gauge("test_in_flight", "In flight")
+    latency = registry.histogram("test_latency_seconds", "Latency", ["route"], buckets=[0.1, 1.0])
+
+    requests.inc(route="/recommend")
+    requests.inc(2, route='/say "hi"\n')
+    in_flight.inc()
+    in_flight.inc()
+    in_flight.dec()
+    for seconds in (0.05, 0.1, 0.5, 3.0):
+        latency.observe(seconds, route="/recommend")
+
+    lines = registry.render().splitlines()
+    assert lines[:2] == ["# HELP test_requests_total Requests", "# TYPE test_requests_total counter"]
+    assert 'test_requests_total{route="/recommend"} 1' in lines
+    assert 'test_requests_total{route="/say \\"hi\\"\\n"} 2' in lines
+    assert "test_in_flight 1" in lines and "# TYPE test_in_flight gauge" in lines
+    assert lines[-5:] == [
+        'test_latency_seconds_bucket{route="/recommend",le="0.1"} 2',
+        'test_latency_seconds_bucket{route="/recommend",le="1.0"} 3',
+        'test_latency_seconds_bucket{route="/recommend",le="+Inf"} 4',
+        'test_latency_seconds_sum{route="/recommend"} 3.65',
+        'test_latency_seconds_count{route="/recommend"} 4',
+    ]
+    print("✓ SUCCESS: Counters, gauges and cumulative histogram buckets rendered")
+
+    for action in (lambda: requests.inc(), lambda: latency.observe(1.0, route="/", method="GET"),
+                   lambda: registry.gauge("test_in_flight", "Again")):
+        try:
+            action()
+            assert False, "Wrong labels and duplicate names should be rejected"
+        except ValueError:
+            pass
+    print("✓ SUCCESS: Wrong labels and duplicate metric names rejected")
+
+    threads = [threading.Thread(target=lambda: [latency.observe(0.01, route="/threads") for _ in range(1000)])
+               for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert latency.count(route="/threads") == 8000
+    print("✓ SUCCESS: Observations from 8 threads all counted")
+
+def test_engine_stages():
+    """Test that a recommendation records every stage and the search counts"""
+    print("\n=== Testing Engine Instrumentation ===")
+    engine = make_engine()
+    stage_counts = {stage: STAGE_SECONDS.count(stage=stage) for stage in SEARCH_STAGES}
+    candidate_counts = {category: SEARCH_CANDIDATES.count(category=category) for category in engine.required_categories}
+    searches = SEARCH_NODES_VISITED.count()
+
+    engine.get_recommendations(1200.0, {}, "gaming")
+    for stage in SEARCH_STAGES:
+        assert STAGE_SECONDS.count(stage=stage) == stage_counts[stage] + 1, stage
+    for category in engine.required_categories:
+        assert SEARCH_CANDIDATES.count(category=category) == candidate_counts[category] + 1, category
+    assert SEARCH_NODES_VISITED.count() == SEARCH_BUILDS_FOUND.count() == searches + 1
+    print(f"✓ SUCCESS: Stages {', '.join(SEARCH_STAGES)} timed, search counts recorded")
+
+    cut_short = SEARCHES_CUT_SHORT.value()
+    engine.get_recommendations_anytime(2500.0, {}, "general", time.monotonic())
+    assert SEARCHES_CUT_SHORT.value() == cut_short + 1
+    print("✓ SUCCESS: Search cut short at its deadline counted")
+
+    engine = make_engine(use_frontier=True)
+    searches = SEARCH_NODES_VISITED.count()
+    stage_counts = {stage: STAGE_SECONDS.count(stage=stage) for stage in SEARCH_STAGES}
+    engine.frontier.rebuild(engine)
+    assert SEARCH_NODES_VISITED.count() == searches
+    assert {stage: STAGE_SECONDS.count(stage=stage) for stage in SEARCH_STAGES} == stage_counts
+    print("✓ SUCCESS: Frontier rebuild searches left out of the metrics")
+
+    lookups = STAGE_SECONDS.count(stage="frontier_lookup")
+    searches = STAGE_SECONDS.count(stage="search")
+    engine.get_recommendations(1200.0, {}, "gaming")
+    assert STAGE_SECONDS.count(stage="frontier_lookup") == lookups + 1
+    assert STAGE_SECONDS.count(stage="search") == searches
+    print("✓ SUCCESS: Frontier answer timed without a search")
+
+if __name__ == "__main__":
+    test_text_format()
+    test_engine_stages()
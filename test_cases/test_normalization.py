@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Test script to verify the column-wise normalisation of price rows gives the same parts as processing each row
+"""
+
+import time
+import numpy as np
+import pandas as pd
+from csv_loader import CSVDataLoader
+from helpers import temp_dir
+
+def process_both_ways(loader: CSVDataLoader, category: str, price_df: pd.DataFrame, perf_df=None):
+    """_process_rows of a price frame row by row and column-wise, with the seconds each took"""
+    results = []
+    for vectorized in (False, True):
+        loader.vectorized_normalization = vectorized
+        start = time.perf_counter()
+        results.append((loader._process_rows(category, price_df, perf_df), time.perf_counter() - start))
+    return results
+
+def test_bundled_csvs():
+    """Test that every category of the bundled CSVs normalises the same either way"""
+    print("=== Testing Normalisation of the Bundled CSVs ===")
+    loader = CSVDataLoader()
+    loader.benchmark_cache_dir = temp_dir()
+    price_data = loader.load_price_data()
+    performance_data = loader.load_performance_data()
+
+    for category, price_df in price_data.items():
+        (expected, row_seconds), (actual, column_seconds) = process_both_ways(
+            loader, category, price_df, performance_data.get(category))
+        assert len(actual) == len(expected)
+        for position, (expected_row, actual_row) in enumerate(zip(expected, actual)):
+            assert actual_row == expected_row, f"{category} row {position}: {actual_row} != {expected_row}"
+        parts = sum(1 for _, part in actual if part)
+        print(f"✓ SUCCESS: {category}: {parts} of {len(actual)} rows identical "
+              f"(rows {row_seconds:.2f}s, columns {column_seconds:.2f}s)")
+
+def test_unusual_values():
+    """Test missing columns, missing and infinite values and prices read as text"""
+    print("\n=== Testing Normalisation of Unusual Values ===")
+    loader = CSVDataLoader()
+    frames = {
+        "cpu": pd.DataFrame({
+            "name": ["Intel Core i5-13600K", " AMD Ryzen 5 7600X ", "", "Xeon 10", "Foo"],
+            "price": [300, np.nan, 0, 5.5, np.inf],
+            "tdp": [125, np.nan, np.inf, 65.7, -3.2],
+            "core_count": [14, 6, 4, np.nan, 2]
+        }),
+        "gpu": pd.DataFrame({"name": ["MSI GeForce RTX 4090", "Sapphire RX 7800 XT", "Arc A770"], "price": ["1", "abc", ""]}),
+        "ram": pd.DataFrame({"name": ["Corsair 32 gb DDR5", "G.Skill 16GB", "X"], "price": [1, 2, 3],
+                             "speed": ["5,6000", "DDR4-3200", np.nan]}),
+        "storage": pd.DataFrame({"name": ["Seagate HDD", "WD SSD", "Samsung"], "price": [1, 2, 3],
+                                 "capacity": [2000.0, 500.0, np.nan], "type": [np.nan, "NVMe", np.nan]}),
+        "psu": pd.DataFrame({"name": ["Corsair", "EVGA", "be quiet! x"], "price": [1, 2, 3],
+                             "wattage": [750, np.nan, 500], "modular": ["Full", np.nan, False]}),
+        "case": pd.DataFrame({"name": ["NZXT", "Lian Li", "Y"], "price": [1, 2, 3],
+                              "type": ["MicroATX Mini Tower", "Mini ITX Tower", np.nan]}),
+        "motherboard": pd.DataFrame({"name": ["ASUS ROG Z790", "MSI B550"], "price": [1, 2], "socket": ["LGA1700", np.nan]}),
+    }
+    for category, price_df in frames.items():
+        (expected, _), (actual, _) = process_both_ways(loader, category, price_df)
+        assert actual == expected, f"{category}: {actual} != {expected}"
+        print(f"✓ SUCCESS: {category}: {len(actual)} unusual rows identical")
+
+if __name__ == "__main__":
+    test_bundled_csvs()
+    test_unusual_values()
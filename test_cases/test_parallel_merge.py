@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Test script to verify merging the CSVs in a process pool gives the same catalog as merging serially
+"""
+
+import json
+import csv_loader
+from csv_loader import CSVDataLoader
+from helpers import temp_dir
+
+def merge(workers: int):
+    """Merge the bundled CSVs with the given number of workers"""
+    loader = CSVDataLoader()
+    loader.benchmark_cache_dir = temp_dir()
+    merged_data = loader.merge_price_performance_data(loader.load_price_data(), loader.load_performance_data(), workers)
+    return merged_data, loader
+
+def test_parallel_merge():
+    """Test that the parallel merge matches the serial one, including source keys and saved matches"""
+    print("=== Testing Parallel Merge ===")
+    # Small chunks, so every category with more than a few hundred rows is split
+    csv_loader.MERGE_CHUNK_ROWS = 400
+
+    serial, serial_loader = merge(1)
+    parallel, parallel_loader = merge(3)
+
+    assert list(parallel.keys()) == list(serial.keys())
+    for category in serial:
+        assert parallel[category] == serial[category], f"{category} differs"
+        print(f"✓ SUCCESS: {category}: {len(parallel[category])} parts identical")
+
+    serial_caches = sorted(path.name for path in serial_loader.benchmark_cache_dir.glob("*.json"))
+    parallel_caches = sorted(path.name for path in parallel_loader.benchmark_cache_dir.glob("*.json"))
+    assert serial_caches == parallel_caches and serial_caches
+    for name in serial_caches:
+        with open(serial_loader.benchmark_cache_dir / name) as f:
+            serial_matches = json.load(f)
+        with open(parallel_loader.benchmark_cache_dir / name) as f:
+            assert json.load(f).keys() == serial_matches.keys(), f"{name} differs"
+    print(f"✓ SUCCESS: Same benchmark matches saved for {len(parallel_caches)} categories")
+
+def test_worker_sends_new_matches():
+    """Test that a merge worker only sends back the matches found since its last chunk"""
+    print("\n=== Testing Merge Worker Matches ===")
+    loader = CSVDataLoader()
+    loader.benchmark_cache_dir = temp_dir()
+    price_data = loader.load_price_data(["gpu"])
+    performance_data = loader.load_performance_data(["gpu"])
+
+    # Run the worker side in this process
+    csv_loader._init_merge_worker(loader.db_path, loader.benchmark_cache_dir, loader.brand_patterns_file,
+                                  performance_data, loader.performance_data_hashes)
+    gpus = price_data["gpu"]
+    half = len(gpus) // 2
+    _, first = csv_loader._merge_chunk_in_worker("gpu", gpus.iloc[:half])
+    _, second = csv_loader._merge_chunk_in_worker("gpu", gpus.iloc[half:])
+    _, repeated = csv_loader._merge_chunk_in_worker("gpu", gpus.iloc[:half])
+
+    memo = csv_loader._worker_loader._benchmark_matchers["gpu"].matches
+    assert first and not first.keys() & second.keys()
+    assert first.keys() | second.keys() == memo.keys()
+    assert repeated == {}, "Names already matched should not be sent again"
+    print(f"✓ SUCCESS: {len(first)} then {len(second)} new matches, none for a repeated chunk")
+
+if __name__ == "__main__":
+    test_parallel_merge()
+    test_worker_sends_new_matches()
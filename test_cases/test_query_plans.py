@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Test script to verify the queries database.py issues are answered from indexes, not full table scans
+"""
+
+import re
+from database import Database, load_specifications
+from helpers import copy_database
+from migrations import SCHEMA_MIGRATIONS, get_schema_version
+
+def capture_queries(db, run):
+    """Run database calls and return the SQL they executed, with parameters filled in"""
+    statements = []
+    conn = db._read_pool.acquire()
+    conn.set_trace_callback(statements.append)
+    db._read_pool.release(conn)
+    run()
+    conn.set_trace_callback(None)
+    return statements
+
+def test_query_plans():
+    """Test that no query does a full scan once migrations are applied"""
+    print("=== Testing Query Plans ===")
+
+    db_path = copy_database()
+    # Query the database itself rather than the in-memory catalog snapshot
+    db = Database(db_path, use_catalog_snapshot=False)
+
+    with db._write_pool.connection() as conn:
+        assert get_schema_version(conn) == SCHEMA_MIGRATIONS[-1][0]
+    print("✓ SUCCESS: Database migrated to the latest schema version")
+
+    def run():
+        db.get_catalog_version()
+        db.get_build_frontier("gaming")
+        db.get_parts_by_ids([1, 2, 3])
+        db.get_parts_by_category("cpu")
+        db.get_parts_by_category("gpu", ("any", "NVIDIA"))
+        db.get_parts_by_category("case", ("NZXT", "any"))
+        for sort_by in ["performance_score", "price", "name"]:
+            db.get_parts_by_category_paginated("gpu", None, 10, 0, sort_by, "desc")
+        db.get_parts_by_category_paginated("cpu", ("any", "AMD"), 10, 0, "performance_score", "desc")
+        db.get_parts_by_category_paginated("psu", ("Corsair", "any"), 10, 0, "price", "asc")
+        db.get_parts_by_category_paginated("psu", None, 10, 0, "price", "asc", min_wattage=750)
+
+    statements = capture_queries(db, run)
+    assert len(statements) == 12
+
+    with db._read_pool.connection() as conn:
+        for statement in statements:
+            plan = [row[3] for row in conn.execute("EXPLAIN QUERY PLAN " + statement)]
+            full_scans = [step for step in plan if re.fullmatch(r"SCAN \w+", step)]
+            print(f"{' '.join(statement.split())[:70]}... -> {'; '.join(plan)}")
+            assert not full_scans, f"Full table scan in: {statement}"
+    print("✓ SUCCESS: No full table scans")
+
+def test_compatibility_columns():
+    """Test the typed compatibility columns match the JSON tags and filter in SQL"""
+    print("\n=== Testing Compatibility Columns ===")
+    # Without the snapshot, so the queries go to SQLite
+    db = Database(copy_database(), use_catalog_snapshot=False)
+
+    psus = db.get_parts_by_category_paginated("psu", None, 100, 0, "price", "asc", min_wattage=750)
+    assert psus, "Expected PSUs of at least 750W"
+    assert all(psu["compatibility_tags"]["wattage"] >= 750 for psu in psus)
+    print(f"✓ SUCCESS: {len(psus)} PSUs of at least 750W filtered in SQL")
+
+    with db._read_pool.connection() as conn:
+        missing = conn.execute(
+            "SELECT COUNT(*) FROM parts WHERE category = 'cpu' AND socket IS NULL"
+        ).fetchone()[0]
+    assert missing == 0, f"{missing} CPUs without a socket column"
+    print("✓ SUCCESS: CPU sockets populated")
+
+    cpus = db.get_parts_by_category("cpu", decode_specifications=False)
+    assert isinstance(cpus[0]["specifications"], str)
+    assert load_specifications(cpus[0]) == db.get_parts_by_category("cpu")[0]["specifications"]
+    print("✓ SUCCESS: Specifications decoded lazily")
+
+if __name__ == "__main__":
+    test_query_plans()
+    test_compatibility_columns()
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Test script to verify the recommendation cache's keys, LRU eviction, TTL and catalog invalidation
+"""
+
+from recommendation_cache import RecommendationCache
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+def test_cache_keys():
+    """Test that equivalent requests share a cache entry"""
+    print("=== Testing Cache Keys ===")
+
+    cache = RecommendationCache(budget_bucket_size=1.0)
+    key = cache.make_key(1000.0, {"cpu": "AMD", "gpu": "NVIDIA"}, "Gaming", 3)
+
+    assert cache.make_key(1000.75, {"gpu": "NVIDIA", "cpu": "AMD", "case": ""}, "gaming", 3) == key
+    assert cache.make_key(999.99, {"cpu": "AMD", "gpu": "NVIDIA"}, "gaming", 3) != key
+    assert cache.make_key(1000.0, {"cpu": "Intel", "gpu": "NVIDIA"}, "gaming", 3) != key
+    assert cache.make_key(1000.0, {"cpu": "AMD", "gpu": "NVIDIA"}, "gaming", 4) != key
+    assert cache.budget_bucket(0.5) == 0.5
+    print("✓ SUCCESS: Keys normalise budget, preferences and use case")
+
+def test_cache_eviction_and_expiry():
+    """Test LRU eviction, TTL expiry and invalidation on catalog reload"""
+    print("\n=== Testing Cache Eviction ===")
+
+    clock = FakeClock()
+    cache = RecommendationCache(max_entries=2, ttl_seconds=60.0, clock=clock)
+    first = cache.make_key(1000.0, {}, "gaming", 1)
+    second = cache.make_key(1500.0, {}, "gaming", 1)
+    third = cache.make_key(2000.0, {}, "gaming", 1)
+
+    cache.put(first, ["first"])
+    cache.put(second, ["second"])
+    assert cache.get(first) == ["first"]
+    cache.put(third, ["third"])
+    # second was the least recently used entry
+    assert cache.get(second) is None
+    assert cache.get(first) == ["first"]
+    print("✓ SUCCESS: Least recently used entry evicted")
+
+    clock.now = 61.0
+    assert cache.get(third) is None
+    print("✓ SUCCESS: Expired entry not served")
+
+    cache.put(first, ["first"])
+    assert cache.get(cache.make_key(1500.0, {}, "gaming", 2)) is None
+    assert cache.get(first) is None
+    print("✓ SUCCESS: Catalog reload invalidates the cache")
+
+    stats = cache.stats()
+    print(f"Stats: {stats}")
+    assert stats["hits"] == 2 and stats["evictions"] == 1 and stats["expirations"] == 1
+
+def test_stale_catalog_versions():
+    """Test that requests still on an older catalog leave the newer entries alone"""
+    print("\n=== Testing Stale Catalog Versions ===")
+
+    cache = RecommendationCache()
+    current = cache.make_key(1000.0, {}, "gaming", 2)
+    stale = cache.make_key(1000.0, {}, "gaming", 1)
+
+    cache.put(current, ["current"])
+    # A slow request that started before the reload finishes after it
+    cache.put(stale, ["stale"])
+    assert cache.get(current) == ["current"]
+    assert cache.get(stale) is None
+    assert cache.stats()["catalog_version"] == 2 and cache.stats()["size"] == 1
+    print("✓ SUCCESS: Older catalog version neither stored nor served")
+
+    cache.put(cache.make_key(1000.0, {}, "gaming", 3), ["newer"])
+    assert cache.get(current) is None and cache.stats()["size"] == 1
+    print("✓ SUCCESS: Newer catalog version still invalidates the cache")
+
+if __name__ == "__main__":
+    test_cache_keys()
+    test_cache_eviction_and_expiry()
+    test_stale_catalog_versions()
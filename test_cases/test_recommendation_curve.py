@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Test script to verify a budget sweep finds the same best build at each budget as one request at a time
+"""
+
+import asyncio
+import time
+from helpers import make_database
+from recommendation_engine import RecommendationEngine
+from search_executor import SearchExecutor
+
+BUDGETS = [500.0 + 100.0 * step for step in range(20)] + [300.0, 1000.0]
+GROUPS = [
+    ({}, "gaming"),
+    ({"cpu": "AMD", "gpu": "NVIDIA"}, "gaming"),
+    ({"cpu": "Intel"}, "workstation"),
+]
+
+def build_key(build):
+    """Part ids and price of a build, or None"""
+    return None if build is None else ([part.id for part in build.parts], build.total_price)
+
+def best_builds(engine: RecommendationEngine, brand_preferences, use_case):
+    """Best build at each budget, one request at a time"""
+    best = []
+    for budget in BUDGETS:
+        builds = engine.get_recommendations(budget, brand_preferences, use_case)
+        best.append(builds[0] if builds else None)
+    return best
+
+def test_curve_matches_single_requests():
+    """Test that the sweep finds the best build of every budget, searching each distinct build once"""
+    print("=== Testing Recommendation Curve ===")
+    db = make_database()
+    for use_frontier in (False, True):
+        engine = RecommendationEngine(db, use_frontier=use_frontier)
+        if use_frontier:
+            engine.frontier.rebuild(engine)
+
+        for brand_preferences, use_case in GROUPS:
+            start = time.perf_counter()
+            curve = engine.get_recommendation_curve(BUDGETS, brand_preferences, use_case)
+            curve_seconds = time.perf_counter() - start
+
+            start = time.perf_counter()
+            expected = best_builds(engine, brand_preferences, use_case)
+            single_seconds = time.perf_counter() - start
+            assert [build_key(build) for build in curve] == [build_key(build) for build in expected]
+            assert curve[BUDGETS.index(300.0)] is None
+
+            distinct = {id(build) for build in curve if build is not None}
+            assert len(distinct) == len({tuple(build_key(build)[0]) for build in curve if build is not None})
+            print(f"✓ SUCCESS: {use_case} {brand_preferences or 'any brand'}"
+                  f"{' with frontier' if use_frontier else ''}: {len(BUDGETS)} budgets, {len(distinct)} distinct "
+                  f"builds, sweep {curve_seconds:.2f}s vs one at a time {single_seconds:.2f}s")
+
+def test_incumbent_seed():
+    """Test that a seeded search returns the incumbent when nothing beats it"""
+    print("\n=== Testing Seeded Search ===")
+    engine = RecommendationEngine(make_database())
+    parts_by_category = engine._candidate_parts({}, "gaming")
+    best = engine._generate_valid_builds(parts_by_category, 1500.0, "gaming", max_results=1)[0]
+
+    cold_nodes = engine.last_search_stats.nodes_visited
+    seeded = engine._generate_valid_builds(parts_by_category, 1500.0, "gaming", max_results=1, incumbent=best)
+    assert [build.parts for build in seeded] == [best.parts]
+    assert engine.last_search_stats.nodes_visited <= cold_nodes
+    print(f"✓ SUCCESS: Seeded search visited {engine.last_search_stats.nodes_visited} nodes, "
+          f"{cold_nodes} without the seed")
+
+    # An incumbent over the budget is ignored
+    cheaper = engine._generate_valid_builds(parts_by_category, 900.0, "gaming", max_results=1, incumbent=best)
+    assert [build.parts for build in cheaper] == \
+        [build.parts for build in engine._generate_valid_builds(parts_by_category, 900.0, "gaming", max_results=1)]
+    print("✓ SUCCESS: Incumbent over the budget ignored")
+
+async def check_executor_curve():
+    db = make_database()
+    engine = RecommendationEngine(db)
+    executor = SearchExecutor(engine, max_concurrent=1, max_queued=1, timeout_seconds=60.0)
+    try:
+        curve = await executor.recommend_curve(BUDGETS, {}, "general")
+    finally:
+        executor.shutdown()
+    assert [build_key(build) for build in curve] == [build_key(build) for build in best_builds(engine, {}, "general")]
+    assert executor.completed == 1
+    print(f"✓ SUCCESS: {len(BUDGETS)} budgets swept in one executor slot")
+
+def test_executor_curve():
+    """Test that a sweep runs as a single executor search"""
+    print("\n=== Testing Curves in the Executor ===")
+    asyncio.run(check_executor_curve())
+
+if __name__ == "__main__":
+    test_curve_matches_single_requests()
+    test_incumbent_seed()
+    test_executor_curve()
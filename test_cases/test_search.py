@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Test script to verify the branch-and-bound build search against brute force enumeration
+"""
+
+from itertools import product
+from database import Database
+from recommendation_engine import RecommendationEngine
+
+def brute_force_top_builds(engine, parts_by_category, budget, use_case):
+    """Enumerate every combination the way the engine used to and score the best diverse builds"""
+    filtered_parts = engine._filter_by_budget_constraints(parts_by_category, budget, use_case)
+    for category in filtered_parts:
+        filtered_parts[category].sort(
+            key=lambda part: part["performance_score"] * 0.6 + (part["performance_score"] / part["price"]) * 0.4,
+            reverse=True
+        )
+        filtered_parts[category] = filtered_parts[category][:engine.max_combinations_per_category]
+
+    best_by_pair = {}
+    categories = engine.required_categories
+    for combination in product(*[filtered_parts[cat] for cat in categories]):
+        build_dict = {cat: part for cat, part in zip(categories, combination)}
+        if (engine._check_compatibility(build_dict) and
+            engine._check_budget(build_dict, budget) and
+            engine._check_minimum_requirements(build_dict)):
+            score = engine._build_score(
+                sum(part["performance_score"] for part in combination),
+                sum(part["price"] for part in combination),
+                budget
+            )
+            # Diversity keeps the best build of each distinct CPU/GPU pair
+            pair = (build_dict["cpu"]["id"], build_dict["gpu"]["id"])
+            best_by_pair[pair] = max(score, best_by_pair.get(pair, float("-inf")))
+    return sorted(best_by_pair.values(), reverse=True)[:3]
+
+def test_branch_and_bound_matches_brute_force():
+    """Test that pruning never loses the best diverse builds"""
+    print("=== Testing Branch and Bound Search ===")
+
+    db = Database()
+    engine = RecommendationEngine(db)
+    # Keep the brute force enumeration small enough to run quickly
+    engine.max_combinations_per_category = 4
+
+    for use_case, budget in [("gaming", 1000.0), ("workstation", 1500.0), ("general", 800.0)]:
+        parts_by_category = {category: db.get_parts_by_category(category) for category in engine.required_categories}
+        parts_by_category = engine._apply_use_case_filtering(parts_by_category, use_case)
+
+        expected = brute_force_top_builds(engine, parts_by_category, budget, use_case)
+
+        found = engine._generate_valid_builds(parts_by_category, budget, use_case)
+        found = engine._ensure_build_diversity(found)[:3]
+
+        stats = engine.last_search_stats
+        print(f"{use_case} ${budget}: visited {stats.nodes_visited} nodes, pruned {stats.nodes_pruned}")
+
+        assert len(found) == len(expected)
+        for candidate, expected_score in zip(found, expected):
+            assert abs(candidate.score - expected_score) < 1e-9
+        print("✓ SUCCESS: Same top builds as brute force")
+
+def test_vectorized_matches_branch_and_bound():
+    """Test that the NumPy backend finds the same builds as branch and bound"""
+    print("\n=== Testing Vectorized Search ===")
+
+    db = Database()
+    engine = RecommendationEngine(db)
+    vectorized_engine = RecommendationEngine(db, search_mode="vectorized")
+
+    for use_case, budget in [("gaming", 1000.0), ("workstation", 2000.0), ("general", 600.0)]:
+        parts_by_category = {category: db.get_parts_by_category(category) for category in engine.required_categories}
+        parts_by_category = engine._apply_use_case_filtering(parts_by_category, use_case)
+
+        expected = engine._generate_valid_builds(parts_by_category, budget, use_case)
+        found = vectorized_engine._generate_valid_builds(parts_by_category, budget, use_case)
+
+        stats = vectorized_engine.last_search_stats
+        print(f"{use_case} ${budget}: evaluated {stats.nodes_visited} combinations")
+
+        assert [round(c.score, 9) for c in found] == [round(c.score, 9) for c in expected]
+        print("✓ SUCCESS: Same top builds as branch and bound")
+
+        # The limit is per search, not a setting of the shared engine
+        single = vectorized_engine._generate_valid_builds(parts_by_category, budget, use_case, max_results=1)
+        assert [round(c.score, 9) for c in single] == [round(c.score, 9) for c in expected[:1]]
+        assert vectorized_engine._vectorized_search.max_results == vectorized_engine.max_recommendations
+        print("✓ SUCCESS: A one-build search leaves the engine's limit alone")
+
+def test_vectorized_stops_when_pairs_run_out():
+    """Test that the NumPy backend stops lowering its threshold once no new CPU/GPU pair can appear"""
+    print("\n=== Testing Vectorized Search With Few Pairs ===")
+
+    db = Database()
+    engine = RecommendationEngine(db)
+    vectorized_engine = RecommendationEngine(db, search_mode="vectorized")
+    search = vectorized_engine._vectorized_search
+    thresholds = []
+    expand = search._expand
+
+    def recording_expand(level_arrays, bounds, budget, build_score, threshold, *args):
+        thresholds.append(threshold)
+        return expand(level_arrays, bounds, budget, build_score, threshold, *args)
+    search._expand = recording_expand
+
+    for use_case, budget in [("gaming", 1500.0), ("general", 3000.0)]:
+        parts_by_category = {category: db.get_parts_by_category(category) for category in engine.required_categories}
+        parts_by_category = engine._apply_use_case_filtering(parts_by_category, use_case)
+        # One CPU and two GPUs allow fewer pairs than the engine recommends
+        parts_by_category["cpu"] = parts_by_category["cpu"][:1]
+        parts_by_category["gpu"] = parts_by_category["gpu"][:2]
+
+        thresholds.clear()
+        expected = engine._generate_valid_builds(parts_by_category, budget, use_case)
+        found = vectorized_engine._generate_valid_builds(parts_by_category, budget, use_case)
+        assert 0 < len(expected) < engine.max_recommendations
+        assert [round(c.score, 9) for c in found] == [round(c.score, 9) for c in expected]
+        assert float("-inf") not in thresholds
+        print(f"✓ SUCCESS: {use_case} ${budget}: {len(found)} pairs after {len(thresholds)} thresholds")
+
+if __name__ == "__main__":
+    test_branch_and_bound_matches_brute_force()
+    test_vectorized_matches_branch_and_bound()
+    test_vectorized_stops_when_pairs_run_out()
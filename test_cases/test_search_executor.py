@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+Test script to verify searches run off the event loop with queue limits and deadlines
+"""
+
+import asyncio
+import time
+from search_executor import SearchExecutor, SearchRejected, SearchTimeout
+
+class SlowEngine:
+    """Stands in for RecommendationEngine with a search that takes a fixed time"""
+    def __init__(self, seconds):
+        self.seconds = seconds
+
+    def get_recommendations(self, budget, brand_preferences, use_case):
+        time.sleep(self.seconds)
+        return [budget]
+
+async def check_event_loop_stays_responsive():
+    executor = SearchExecutor(SlowEngine(0.3), max_concurrent=2, max_queued=4, timeout_seconds=5.0)
+    search = asyncio.ensure_future(executor.recommend(1000.0, {}, "gaming"))
+
+    # The loop keeps serving other work (e.g. /health) while the search runs
+    started = time.monotonic()
+    await asyncio.sleep(0.05)
+    assert time.monotonic() - started < 0.2
+    assert await search == [1000.0]
+    executor.shutdown()
+    print("✓ SUCCESS: Event loop not blocked by a running search")
+
+async def check_limits_and_deadlines():
+    executor = SearchExecutor(SlowEngine(0.5), max_concurrent=1, max_queued=1, timeout_seconds=0.2)
+    first = asyncio.ensure_future(executor.recommend(1000.0, {}, "gaming"))
+    second = asyncio.ensure_future(executor.recommend(1500.0, {}, "gaming"))
+    await asyncio.sleep(0.01)
+
+    # One search running and one waiting, so a third is rejected
+    try:
+        await executor.recommend(2000.0, {}, "gaming")
+        assert False, "expected SearchRejected"
+    except SearchRejected:
+        print("✓ SUCCESS: Search rejected when the queue is full")
+
+    for search in (first, second):
+        try:
+            await search
+            assert False, "expected SearchTimeout"
+        except SearchTimeout:
+            pass
+    print("✓ SUCCESS: Searches past their deadline time out")
+
+    stats = executor.stats()
+    print(f"Stats: {stats}")
+    assert stats["rejected"] == 1 and stats["timeouts"] == 2
+    executor.shutdown()
+
+def test_search_executor():
+    """Test executor offload, queue limit and deadlines"""
+    print("=== Testing Search Executor ===")
+    asyncio.run(check_event_loop_stays_responsive())
+    asyncio.run(check_limits_and_deadlines())
+
+if __name__ == "__main__":
+    test_search_executor()
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Test script to verify streamed price CSVs load the same catalog as reading them whole, in bounded memory
+"""
+
+import math
+import shutil
+import sqlite3
+import tracemalloc
+import pandas as pd
+from pathlib import Path
+from csv_loader import CSVDataLoader
+from helpers import temp_dir
+
+CHUNK_SIZE = 700
+
+def make_loader() -> CSVDataLoader:
+    """Loader with its own copy of the CSVs and a new database"""
+    data_dir = temp_dir()
+    shutil.copytree("price_data", data_dir / "price_data")
+    shutil.copytree("performance_data", data_dir / "performance_data")
+    loader = CSVDataLoader(str(data_dir / "buildmyrig.db"))
+    loader.price_data_dir = data_dir / "price_data"
+    loader.performance_data_dir = data_dir / "performance_data"
+    loader.benchmark_cache_dir = data_dir / "benchmark_cache"
+    return loader
+
+def load_whole(loader: CSVDataLoader, categories=None):
+    """Load the CSVs the way load_all_data does without streaming"""
+    manifest = loader.file_manifest()
+    merged_data = loader.merge_price_performance_data(loader.load_price_data(categories),
+                                                      loader.load_performance_data(categories))
+    loader.populate_database(merged_data, manifest, incremental=categories is not None)
+
+def load_streamed(loader: CSVDataLoader, categories=None):
+    """Load the CSVs streaming the price files"""
+    manifest = loader.file_manifest()
+    loader.stream_database(categories, loader.load_performance_data(categories), CHUNK_SIZE, manifest,
+                           incremental=categories is not None)
+
+def catalog_rows(loader: CSVDataLoader):
+    """Every stored part and manifest entry"""
+    conn = sqlite3.connect(loader.db_path)
+    try:
+        parts = conn.execute("SELECT * FROM parts ORDER BY id").fetchall()
+        manifest = conn.execute("SELECT path, sha256 FROM ingest_manifest ORDER BY path").fetchall()
+    finally:
+        conn.close()
+    return parts, [(Path(path).name, sha256) for path, sha256 in manifest]
+
+def update_gpu_prices(loader: CSVDataLoader):
+    """Reprice one GPU listing and drop another"""
+    gpu_path = loader.price_data_dir / loader.price_files["gpu"]
+    gpus = pd.read_csv(gpu_path)
+    gpus.loc[0, "price"] = gpus.loc[0, "price"] + 10
+    gpus.drop(index=1).to_csv(gpu_path, index=False)
+
+def test_streamed_catalog():
+    """Test that streaming gives the same parts, ids and source keys for full and incremental loads"""
+    print("=== Testing Streamed Ingestion ===")
+    whole, streamed = make_loader(), make_loader()
+    load_whole(whole)
+    load_streamed(streamed)
+    assert catalog_rows(streamed) == catalog_rows(whole)
+
+    expected_chunks = sum(math.ceil(len(pd.read_csv(streamed.price_data_dir / filename)) / CHUNK_SIZE)
+                          for filename in streamed.price_files.values())
+    assert len(streamed.chunk_timings) == expected_chunks
+    assert all(timing["rows"] <= CHUNK_SIZE and timing["write_seconds"] >= 0 for timing in streamed.chunk_timings)
+    print(f"✓ SUCCESS: {len(catalog_rows(streamed)[0])} parts identical, streamed in {expected_chunks} chunks")
+
+    for loader in (whole, streamed):
+        update_gpu_prices(loader)
+    load_whole(whole, ["gpu"])
+    load_streamed(streamed, ["gpu"])
+    assert catalog_rows(streamed) == catalog_rows(whole)
+    print("✓ SUCCESS: Incremental streamed reload identical")
+
+def test_bounded_memory():
+    """Test that streaming a large category peaks lower than merging it whole"""
+    print("\n=== Testing Streaming Memory ===")
+    peaks = {}
+    for description, load in [("whole", load_whole), ("streamed", load_streamed)]:
+        loader = make_loader()
+        loader.price_files = {"ram": loader.price_files["ram"]}
+        loader.performance_files = {"ram": loader.performance_files["ram"]}
+        tracemalloc.start()
+        try:
+            loader.validate_catalog = lambda conn, loaded_counts, live_counts: None
+            load(loader)
+            peaks[description] = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+    assert peaks["streamed"] < peaks["whole"], peaks
+    print(f"✓ SUCCESS: Peak memory {peaks['streamed'] / 2**20:.1f} MiB streamed, "
+          f"{peaks['whole'] / 2**20:.1f} MiB whole")
+
+if __name__ == "__main__":
+    test_streamed_catalog()
+    test_bounded_memory()
@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Test script to verify upgrade recommendations for an existing build
+"""
+
+import time
+from itertools import combinations
+from helpers import make_engine
+from recommendation_engine import RecommendationEngine
+
+UPGRADE_BUDGETS = [50.0, 150.0, 300.0, 800.0]
+
+def best_upgrades(engine: RecommendationEngine, part_ids, upgrade_budget: float, use_case: str):
+    """(gain, -cost, -parts swapped) of the best single and paired swaps, checking every swap with the full rules.
+
+    Parts with the same compatibility attributes and performance are interchangeable
+    apart from their price, so only the cheapest few of each are tried. A part that
+    loses performance is only swapped in when the other part needs it.
+    """
+    current = engine._current_build(part_ids, use_case)
+    index = engine._get_compatibility_index()
+    options = {}
+    for category, parts in engine._candidate_parts({}, use_case).items():
+        interchangeable = {}
+        for part in parts:
+            if part["id"] == current[category]["id"] or not 0 < part["price"] <= upgrade_budget:
+                continue
+            if not engine._check_part_minimum_requirements(category, part):
+                continue
+            key = (tuple(sorted(index.get(category, part).items())), part["performance_score"])
+            interchangeable.setdefault(key, []).append(part)
+        options[category] = [part for same in interchangeable.values()
+                             for part in sorted(same, key=lambda part: part["price"])[:engine.max_upgrades]]
+
+    def gain_of(category, part):
+        return part["performance_score"] - current[category]["performance_score"]
+
+    def compatible(swap):
+        build = dict(current)
+        build.update(swap)
+        return engine._check_compatibility(build)
+
+    keys = []
+    swaps = [[(category, part)] for category in options for part in options[category]]
+    for first, second in combinations(engine.required_categories, 2):
+        swaps += [[(first, a), (second, b)] for a in options[first] for b in options[second]
+                  if a["price"] + b["price"] <= upgrade_budget]
+    for swap in swaps:
+        gain = sum(gain_of(category, part) for category, part in swap)
+        if gain <= 0 or not compatible(swap):
+            continue
+        if len(swap) == 2 and any(gain_of(*swap[position]) <= 0 and compatible([swap[1 - position]])
+                                  for position in range(2)):
+            continue
+        keys.append((gain, -round(sum(part["price"] for _, part in swap), 2), -len(swap)))
+    return sorted(keys, reverse=True)[:engine.max_upgrades]
+
+def test_upgrades():
+    """Test that upgrades fit the budget, stay compatible and are the best possible swaps"""
+    print("=== Testing Upgrade Recommendations ===")
+    engine = make_engine()
+    for budget, use_case in [(800.0, "gaming"), (1500.0, "workstation"), (600.0, "general")]:
+        part_ids = [part.id for part in engine.get_recommendations(budget, {}, use_case)[0].parts]
+        for upgrade_budget in UPGRADE_BUDGETS:
+            start = time.perf_counter()
+            current_build, upgrades = engine.get_upgrade_recommendations(part_ids, upgrade_budget, {}, use_case)
+            upgrade_seconds = time.perf_counter() - start
+            assert sorted(part.id for part in current_build.parts) == sorted(part_ids)
+            assert len(upgrades) <= engine.max_upgrades
+
+            current = engine._current_build(part_ids, use_case)
+            for upgrade in upgrades:
+                assert upgrade.cost <= upgrade_budget and upgrade.performance_gain > 0
+                assert {part.category for part in upgrade.replaced} == {part.category for part in upgrade.added}
+                assert round(sum(part.price for part in upgrade.added), 2) == upgrade.cost
+                build = {part.category: part.model_dump() for part in upgrade.build.parts}
+                assert engine._check_compatibility(build)
+                assert upgrade.build.performance_score == current_build.performance_score + upgrade.performance_gain
+            keys = [(upgrade.performance_gain, -upgrade.cost, -len(upgrade.added)) for upgrade in upgrades]
+            assert keys == sorted(keys, reverse=True)
+
+            expected = best_upgrades(engine, part_ids, upgrade_budget, use_case)
+            assert keys == expected, f"{keys} != {expected}"
+            best = ", ".join(part.category for part in upgrades[0].added) if upgrades else "none"
+            print(f"✓ SUCCESS: ${budget:.0f} {use_case} build, ${upgrade_budget:.0f} upgrade: {len(upgrades)} upgrade(s), "
+                  f"best {best} in {upgrade_seconds * 1000:.1f}ms")
+
+    start = time.perf_counter()
+    engine.get_recommendations(1100.0, {}, "gaming")
+    print(f"  (a full $1100 search takes {(time.perf_counter() - start) * 1000:.1f}ms)")
+
+def test_brand_preferences():
+    """Test that new parts follow the brand preferences"""
+    print("\n=== Testing Upgrade Brand Preferences ===")
+    engine = make_engine()
+    part_ids = [part.id for part in engine.get_recommendations(800.0, {}, "gaming")[0].parts]
+    _, upgrades = engine.get_upgrade_recommendations(part_ids, 800.0, {"gpu": "AMD", "ram": "Corsair"}, "gaming")
+    for upgrade in upgrades:
+        for part in upgrade.added:
+            assert part.category != "gpu" or part.hardware_brand == "AMD"
+            assert part.category != "ram" or part.brand == "Corsair"
+    print(f"✓ SUCCESS: {len(upgrades)} upgrade(s) with preferred brands only")
+
+def test_invalid_builds():
+    """Test that unknown, incomplete and incompatible builds are rejected"""
+    print("\n=== Testing Invalid Existing Builds ===")
+    engine = make_engine()
+    build = engine.get_recommendations(800.0, {}, "gaming")[0]
+    part_ids = [part.id for part in build.parts]
+    cpu = next(part for part in build.parts if part.category == "cpu")
+    other_socket_cpu = next(part for part in engine.db.get_parts_by_category("cpu")
+                            if part["compatibility_tags"].get("socket") != cpu.compatibility_tags.get("socket"))
+
+    for description, ids in [
+        ("unknown part", part_ids + [10**9]),
+        ("missing category", part_ids[1:]),
+        ("two CPUs", part_ids + [other_socket_cpu["id"]]),
+        ("incompatible parts", [other_socket_cpu["id"] if part_id == cpu.id else part_id for part_id in part_ids]),
+    ]:
+        try:
+            engine.get_upgrade_recommendations(ids, 300.0, {}, "gaming")
+            assert False, f"{description} should be rejected"
+        except ValueError as e:
+            print(f"✓ SUCCESS: {description} rejected: {e}")
+
+if __name__ == "__main__":
+    test_upgrades()
+    test_brand_preferences()
+    test_invalid_builds()
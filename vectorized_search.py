@@ -0,0 +1,266 @@
+import numpy as np
+from typing import List, Dict, Optional, Tuple, Callable
+
+from compatibility import CompatibilityIndex, CASE_FORM_FACTOR_COMPATIBILITY
+
+class VectorizedBuildSearch:
+    """Build search that evaluates whole blocks of combinations with NumPy.
+
+    Partial builds are held as arrays and extended one category at a time: every
+    (partial build x candidate) pair of a block is checked for compatibility, budget
+    and score bound with broadcast masks. The score a build has to reach starts just
+    below the best possible score and is lowered until enough CPU/GPU pairs clear it;
+    at that point every build that could rank among them has been evaluated, so the
+    results match the branch-and-bound search. Each lower threshold only expands the
+    partial builds the previous ones set aside, and the search stops as soon as none
+    of those could lead to a CPU/GPU pair not found yet.
+    """
+
+    def __init__(self, search_order: List[str], max_results: int, initial_margin: float = 0.005,
+                 block_size: int = 1 << 20):
+        self.search_order = search_order
+        # Default number of pairs; the engine is shared between requests, so searches pass their own
+        self.max_results = max_results
+        # How far below the best possible score the first pass starts; doubled on every retry
+        self.initial_margin = initial_margin
+        # Upper limit on (partial builds x candidates) evaluated in one broadcast
+        self.block_size = block_size
+
+    def search(self, levels: List[List[Tuple]], index: CompatibilityIndex, budget: float,
+               build_score: Callable, stats,
+               max_results: Optional[int] = None) -> List[Tuple[float, float, float, Tuple[int, ...]]]:
+        """Find the best build of each of the top max_results (default self.max_results) CPU/GPU pairs.
+
+        levels holds the (performance, price, part) candidates for each category in
+        search_order. Returns (score, total price, performance, candidate position per
+        level) tuples, best first.
+        """
+        if max_results is None:
+            max_results = self.max_results
+        arrays = self._encode(levels, index)
+
+        # Suffix bounds for completing a build from each level
+        depth_count = len(self.search_order)
+        min_price_after = np.zeros(depth_count + 1)
+        max_performance_after = np.zeros(depth_count + 1)
+        max_price_after = np.zeros(depth_count + 1)
+        for depth in range(depth_count - 1, -1, -1):
+            min_price_after[depth] = min_price_after[depth + 1] + arrays[depth]["price"].min()
+            max_performance_after[depth] = max_performance_after[depth + 1] + arrays[depth]["performance"].max()
+            max_price_after[depth] = max_price_after[depth + 1] + arrays[depth]["price"].max()
+        bounds = (min_price_after, max_performance_after, max_price_after)
+
+        best_possible = build_score(max_performance_after[0], min(budget, max_price_after[0]), budget)
+        lowest_possible = build_score(0.0, min_price_after[0], budget)
+        margin = self.initial_margin
+        # Partial builds of each level whose children did not reach the thresholds so far
+        deferred = [[] for _ in self.search_order]
+        builds = None
+        while True:
+            threshold = best_possible - margin
+            if threshold <= lowest_possible:
+                threshold = float("-inf")
+            found = self._expand(arrays, bounds, budget, build_score, threshold, stats, deferred, builds is None)
+            builds = found if builds is None else {key: np.concatenate([builds[key], found[key]]) for key in builds}
+            results = self._best_by_pair(builds, arrays, build_score, budget)
+            # Every build scoring at least threshold has been seen, so once enough pairs
+            # clear it, or no set-aside partial build can add a pair, no unseen build can displace them
+            if (len(results) >= max_results or threshold == float("-inf") or
+                    not self._new_pairs_possible(deferred, builds, arrays)):
+                stats.builds_found += len(builds["price"])
+                return results[:max_results]
+            margin *= 2
+
+    def _encode(self, levels: List[List[Tuple]], index: CompatibilityIndex) -> List[Dict[str, np.ndarray]]:
+        """Encode each level's candidates as columns the compatibility masks need"""
+        sockets = {}
+        form_factors = {form_factor: code for code, form_factor in enumerate(CASE_FORM_FACTOR_COMPATIBILITY)}
+        arrays = []
+        attributes_by_category = {}
+
+        for depth, category in enumerate(self.search_order):
+            candidates = levels[depth]
+            attributes = [index.get(category, candidate[2]) for candidate in candidates]
+            attributes_by_category[category] = attributes
+            encoded = {
+                "performance": np.array([candidate[0] for candidate in candidates], dtype=float),
+                "price": np.array([candidate[1] for candidate in candidates], dtype=float)
+            }
+
+            if category in ("cpu", "motherboard"):
+                encoded["socket"] = np.array([sockets.setdefault(a["socket"], len(sockets)) for a in attributes])
+            if category == "cpu":
+                encoded["tdp"] = self._column(attributes, "tdp")
+            elif category == "gpu":
+                encoded["power"] = self._column(attributes, "power")
+                encoded["length"] = self._column(attributes, "length")
+            elif category == "motherboard":
+                encoded["form_factor"] = np.array([form_factors[a["form_factor"]] for a in attributes])
+            elif category == "psu":
+                encoded["wattage"] = self._column(attributes, "wattage")
+            elif category == "case":
+                encoded["max_gpu_length"] = self._column(attributes, "max_gpu_length")
+            arrays.append(encoded)
+
+        # Small pairwise tables for the rules that depend on categorical attributes
+        ram_depth = self.search_order.index("ram")
+        motherboards = [candidate[2] for candidate in levels[self.search_order.index("motherboard")]]
+        rams = [candidate[2] for candidate in levels[ram_depth]]
+        arrays[ram_depth]["fits_motherboard"] = np.array([
+            [index.ram_fits(ram, index.ram_key(motherboard)) for ram in rams]
+            for motherboard in motherboards
+        ], dtype=bool).reshape(len(motherboards), len(rams))
+
+        case_depth = self.search_order.index("case")
+        case_attributes = attributes_by_category["case"]
+        arrays[case_depth]["fits_form_factor"] = np.array([
+            [attributes["form_factor"] in CASE_FORM_FACTOR_COMPATIBILITY[form_factor] for attributes in case_attributes]
+            for form_factor in form_factors
+        ], dtype=bool).reshape(len(form_factors), len(case_attributes))
+        return arrays
+
+    def _column(self, attributes: List[Dict], key: str) -> np.ndarray:
+        """Numeric attribute column, with NaN (never compatible) for unparseable values"""
+        return np.array([np.nan if a[key] is None else a[key] for a in attributes], dtype=float)
+
+    def _compatible(self, category: str, chosen: Dict[str, np.ndarray], arrays: Dict[str, Dict],
+                    rows: np.ndarray) -> Optional[np.ndarray]:
+        """(partial builds x candidates) mask of the rules decided by adding category"""
+        if category == "motherboard":
+            cpu_socket = arrays["cpu"]["socket"][chosen["cpu"][rows]]
+            return cpu_socket[:, None] == arrays["motherboard"]["socket"][None, :]
+        if category == "ram":
+            return arrays["ram"]["fits_motherboard"][chosen["motherboard"][rows]]
+        if category == "psu":
+            # Add overhead for other components, then require 20% headroom
+            cpu_tdp = arrays["cpu"]["tdp"][chosen["cpu"][rows]]
+            gpu_power = arrays["gpu"]["power"][chosen["gpu"][rows]]
+            required = (cpu_tdp + gpu_power + 100) * 1.2
+            return arrays["psu"]["wattage"][None, :] >= required[:, None]
+        if category == "case":
+            form_factor = arrays["motherboard"]["form_factor"][chosen["motherboard"][rows]]
+            gpu_length = arrays["gpu"]["length"][chosen["gpu"][rows]]
+            return (arrays["case"]["fits_form_factor"][form_factor] &
+                    (gpu_length[:, None] <= arrays["case"]["max_gpu_length"][None, :]))
+        return None
+
+    def _expand(self, level_arrays: List[Dict[str, np.ndarray]], bounds: Tuple, budget: float,
+                build_score: Callable, threshold: float, stats, deferred: List[List[Dict]],
+                first_pass: bool) -> Dict[str, np.ndarray]:
+        """Extend partial builds level by level, keeping those that can still reach threshold.
+
+        Each row of deferred[depth] is a partial build of the first depth levels that
+        has children below the threshold they were expanded down to ("expanded_to"),
+        with "ceiling" the best bound among them (infinite until a later pass works it
+        out). Those children are expanded in this
+        pass if they reach threshold, and partial builds with children still below it
+        are added. Returns the complete builds that first reach threshold in this pass.
+        """
+        min_price_after, max_performance_after, max_price_after = bounds
+        arrays = dict(zip(self.search_order, level_arrays))
+        root_count = 1 if first_pass else 0
+        frontier = {"price": np.zeros(root_count), "performance": np.zeros(root_count)}
+
+        for depth, category in enumerate(self.search_order):
+            candidates = arrays[category]
+            candidate_count = len(candidates["price"])
+            rows_per_block = max(1, self.block_size // candidate_count)
+            row_count = len(frontier["price"])
+            frontier["expanded_to"] = np.full(row_count, np.inf)
+            frontier["ceiling"] = np.full(row_count, np.inf)
+            children = []
+
+            for chunk in deferred[depth] + [frontier]:
+                selected = np.nonzero(chunk["ceiling"] >= threshold)[0]
+                ceilings = np.full(len(selected), -np.inf)
+                kept_rows, kept_columns = [], []
+                for start in range(0, len(selected), rows_per_block):
+                    rows = selected[start:start + rows_per_block]
+                    new_price = chunk["price"][rows, None] + candidates["price"][None, :]
+                    new_performance = chunk["performance"][rows, None] + candidates["performance"][None, :]
+
+                    # Remaining budget must still cover the cheapest parts of the remaining levels
+                    mask = new_price + min_price_after[depth + 1] <= budget
+                    best_price = np.minimum(budget, new_price + max_price_after[depth + 1])
+                    upper_bound = build_score(new_performance + max_performance_after[depth + 1], best_price, budget)
+                    compatible = self._compatible(category, chunk, arrays, rows)
+                    if compatible is not None:
+                        stats.incompatible += int(np.count_nonzero(mask & ~compatible))
+                        mask &= compatible
+
+                    # Children at or above expanded_to were extended by an earlier pass
+                    reaching = upper_bound >= threshold
+                    keep = mask & reaching
+                    below = mask & ~reaching
+                    if chunk is frontier:
+                        # Only a pass that resumes these rows needs their exact ceiling
+                        ceilings[start:start + len(rows)] = np.where(below.any(axis=1), np.inf, -np.inf)
+                    else:
+                        keep &= upper_bound < chunk["expanded_to"][rows, None]
+                        ceilings[start:start + len(rows)] = np.where(below, upper_bound, -np.inf).max(axis=1)
+                    stats.nodes_visited += new_price.size
+                    stats.nodes_pruned += int(mask.size - np.count_nonzero(keep))
+
+                    block_rows, columns = np.nonzero(keep)
+                    kept_rows.append(rows[block_rows])
+                    kept_columns.append(columns)
+                chunk["expanded_to"][selected] = threshold
+                chunk["ceiling"][selected] = ceilings
+
+                if kept_rows:
+                    rows = np.concatenate(kept_rows)
+                    columns = np.concatenate(kept_columns)
+                    child = {previous: chunk[previous][rows] for previous in self.search_order[:depth]}
+                    child[category] = columns
+                    child["price"] = chunk["price"][rows] + candidates["price"][columns]
+                    child["performance"] = chunk["performance"][rows] + candidates["performance"][columns]
+                    children.append(child)
+
+            # Only partial builds with children left below the threshold are kept for later passes
+            deferred[depth] = [
+                {key: values[chunk["ceiling"] > -np.inf] for key, values in chunk.items()}
+                for chunk in deferred[depth] + [frontier] if np.any(chunk["ceiling"] > -np.inf)
+            ]
+            if len(children) == 1:
+                frontier = children[0]
+            else:
+                frontier = {previous: np.concatenate([child[previous] for child in children] or [np.zeros(0, dtype=int)])
+                            for previous in self.search_order[:depth + 1]}
+                frontier["price"] = np.concatenate([child["price"] for child in children] or [np.zeros(0)])
+                frontier["performance"] = np.concatenate([child["performance"] for child in children] or [np.zeros(0)])
+
+        return frontier
+
+    def _new_pairs_possible(self, deferred: List[List[Dict]], builds: Dict[str, np.ndarray],
+                            level_arrays: List[Dict]) -> bool:
+        """Whether a set-aside partial build could still complete to a CPU/GPU pair not found yet"""
+        gpu_count = len(level_arrays[self.search_order.index("gpu")]["price"])
+        found = np.unique(builds["cpu"] * gpu_count + builds["gpu"])
+        pair_depth = max(self.search_order.index("cpu"), self.search_order.index("gpu"))
+        for depth, chunks in enumerate(deferred):
+            for chunk in chunks:
+                if depth <= pair_depth:
+                    # Its CPU or GPU is still to be chosen
+                    return True
+                if not np.isin(chunk["cpu"] * gpu_count + chunk["gpu"], found).all():
+                    return True
+        return False
+
+    def _best_by_pair(self, builds: Dict[str, np.ndarray], level_arrays: List[Dict], build_score: Callable,
+                      budget: float) -> List[Tuple[float, float, float, Tuple[int, ...]]]:
+        """Best build for each distinct CPU/GPU pair, best first"""
+        if len(builds["price"]) == 0:
+            return []
+        scores = build_score(builds["performance"], builds["price"], budget)
+        gpu_count = len(level_arrays[self.search_order.index("gpu")]["price"])
+        pairs = builds["cpu"] * gpu_count + builds["gpu"]
+
+        order = np.argsort(-scores, kind="stable")
+        _, first = np.unique(pairs[order], return_index=True)
+        best = order[np.sort(first)]
+
+        return [
+            (float(scores[i]), float(builds["price"][i]), float(builds["performance"][i]),
+             tuple(int(builds[category][i]) for category in self.search_order))
+            for i in best
+        ]